@@ -0,0 +1,201 @@
+"""
+Benchmarks of the NVM parser and writer (no Blender required).
+
+Run from the root directory of the repository, e.g.
+    python -m benchmarks.run_benchmarks --points 10000 100000 1000000 --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+
+from nvm_import_export.nvm_file_handler import NVMFileHandler
+from nvm_import_export.metrics import ImportMetrics
+from nvm_import_export.console_operator import ConsoleOperator
+from benchmarks.synthetic_nvm import write_synthetic_nvm_file, write_reference_nvm_file
+
+
+def parse_points(nvm_file_name, op, num_workers):
+    return NVMFileHandler.parse_nvm_file(nvm_file_name, op, as_point_cloud=True, num_workers=num_workers)
+
+
+def parse_cameras(nvm_file_name, op):
+    with open(nvm_file_name, 'rb') as input_file:
+        calibration_matrix = NVMFileHandler._parse_nvm_header(input_file, op)
+        amount_cameras = NVMFileHandler._parse_amount_cameras(input_file)
+        return NVMFileHandler._parse_cameras(input_file, amount_cameras, calibration_matrix, op)
+
+
+def initialize_principal_points(cameras, width, height):
+    # Without fixed calibration the NVM file contains no principal points
+    for camera in cameras:
+        if not camera.is_principal_point_initialized():
+            camera.set_principal_point([width / 2.0, height / 2.0])
+
+
+def round_trip(nvm_file_name, output_nvm_file_name, op, width, height, num_workers):
+    cameras, point_cloud = parse_points(nvm_file_name, op, num_workers)
+    initialize_principal_points(cameras, width, height)
+    NVMFileHandler.write_nvm_file(op, output_nvm_file_name, cameras, point_cloud, num_workers=num_workers)
+    round_trip_cameras, round_trip_point_cloud = parse_points(output_nvm_file_name, op, num_workers)
+    assert len(round_trip_cameras) == len(cameras)
+    for name in ['coords', 'colors', 'measurement_offsets', 'measurement_image_indices',
+                 'measurement_feature_indices', 'measurement_x', 'measurement_y']:
+        assert np.array_equal(getattr(point_cloud, name), getattr(round_trip_point_cloud, name)), name
+
+
+def measure(function, repetitions, measure_memory):
+    """
+    Returns the durations of the repetitions and the peak memory (in bytes) of a separate run.
+    The peak memory is measured with tracemalloc, which slows down the execution considerably.
+    """
+    durations = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    peak_memory = None
+    if measure_memory:
+        tracemalloc.start()
+        function()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return durations, peak_memory
+
+
+def get_environment():
+    return {'python': sys.version,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count()}
+
+
+def run_benchmarks(amount_cameras,
+                   amounts_points,
+                   mean_track_length,
+                   fixed_calibration,
+                   repetitions,
+                   num_workers,
+                   measure_memory,
+                   work_directory):
+
+    op = ConsoleOperator()
+    width, height = 1920, 1080
+    results = []
+    for amount_points in amounts_points:
+        nvm_file_name = os.path.join(work_directory, 'synthetic_' + str(amount_points) + '.nvm')
+        output_nvm_file_name = os.path.join(work_directory, 'synthetic_' + str(amount_points) + '_out.nvm')
+        cameras, point_cloud = write_synthetic_nvm_file(
+            nvm_file_name, amount_cameras, amount_points, mean_track_length, fixed_calibration,
+            width, height, op=op, num_workers=num_workers)
+        file_size = os.path.getsize(nvm_file_name)
+        amount_measurements = point_cloud.get_num_measurements()
+
+        # The durations of the individual parsing steps
+        metrics = ImportMetrics()
+        NVMFileHandler.parse_nvm_file(
+            nvm_file_name, op, as_point_cloud=True, num_workers=num_workers, metrics=metrics)
+
+        benchmarks = [
+            ('parse_nvm_file', lambda: parse_points(nvm_file_name, op, num_workers), amount_points),
+            ('parse_cameras', lambda: parse_cameras(nvm_file_name, op), amount_cameras),
+            ('write_nvm_file', lambda: NVMFileHandler.write_nvm_file(
+                op, output_nvm_file_name, cameras, point_cloud, num_workers=num_workers), amount_points),
+            # The baseline of the writer, which formats the values point by point with repr()
+            ('write_reference', lambda: write_reference_nvm_file(
+                output_nvm_file_name, [(cameras, point_cloud)], fixed_calibration), amount_points),
+            ('round_trip', lambda: round_trip(
+                nvm_file_name, output_nvm_file_name, op, width, height, num_workers), amount_points)]
+
+        for benchmark_name, function, amount_items in benchmarks:
+            durations, peak_memory = measure(function, repetitions, measure_memory)
+            best_duration = min(durations)
+            result = {
+                'benchmark': benchmark_name,
+                'amount_cameras': amount_cameras,
+                'amount_points': amount_points,
+                'amount_measurements': amount_measurements,
+                'file_size': file_size,
+                'durations': durations,
+                'best_duration': best_duration,
+                'median_duration': float(np.median(durations)),
+                'items_per_second': amount_items / best_duration,
+                # The camera section is only a small part of the file
+                'megabytes_per_second': (file_size / (1024.0 ** 2) / best_duration
+                                         if benchmark_name != 'parse_cameras' else None),
+                'peak_memory': peak_memory}
+            if benchmark_name == 'parse_nvm_file':
+                result['phases'] = metrics.to_dict()
+            results.append(result)
+            print(benchmark_name.ljust(16) +
+                  ' points: ' + str(amount_points).rjust(10) +
+                  ' best: ' + ('%.3f' % best_duration).rjust(9) + ' s' +
+                  ' items/s: ' + ('%.0f' % result['items_per_second']).rjust(12) +
+                  (' MB/s: ' + ('%.1f' % result['megabytes_per_second']).rjust(8)
+                   if result['megabytes_per_second'] is not None else '') +
+                  (' peak memory: ' + ('%.1f' % (peak_memory / 1024.0 ** 2)) + ' MB'
+                   if peak_memory is not None else ''))
+
+        best_durations = {result['benchmark']: result['best_duration'] for result in results
+                          if result['amount_points'] == amount_points}
+        print('write_nvm_file is ' + '%.1f' % (best_durations['write_reference'] / best_durations['write_nvm_file']) +
+              'x faster than the reference writer')
+
+        os.remove(nvm_file_name)
+        if os.path.isfile(output_nvm_file_name):
+            os.remove(output_nvm_file_name)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of the NVM parser and writer.')
+    parser.add_argument('--cameras', type=int, default=100,
+                        help='Number of cameras of the synthetic NVM files.')
+    parser.add_argument('--points', type=int, nargs='+', default=[10000, 100000],
+                        help='Number of points of the synthetic NVM files (one file per value).')
+    parser.add_argument('--track-length', type=float, default=4,
+                        help='Mean number of measurements per point.')
+    parser.add_argument('--no-fixed-calibration', dest='fixed_calibration', action='store_false',
+                        help='Use a different focal length per camera (i.e. no FixedK line).')
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes used to parse and write the points.')
+    parser.add_argument('--no-memory', dest='measure_memory', action='store_false',
+                        help='Do not measure the peak memory.')
+    parser.add_argument('--work-directory', default=None,
+                        help='Directory of the synthetic NVM files (default: temporary directory).')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='JSON file containing the results.')
+    args = parser.parse_args(argv)
+
+    if args.work_directory is None:
+        work_directory = tempfile.mkdtemp(prefix='nvm_benchmark_')
+    else:
+        work_directory = args.work_directory
+        if not os.path.isdir(work_directory):
+            os.makedirs(work_directory)
+    try:
+        results = run_benchmarks(
+            args.cameras, args.points, args.track_length, args.fixed_calibration,
+            args.repetitions, args.workers, args.measure_memory, work_directory)
+    finally:
+        if args.work_directory is None:
+            shutil.rmtree(work_directory, ignore_errors=True)
+
+    config = vars(args)
+    with open(args.output, 'w') as output_file:
+        json.dump({'environment': get_environment(), 'config': config, 'results': results},
+                  output_file, indent=2)
+    print('Results written to: ' + args.output)
+
+
+if __name__ == '__main__':
+    main()
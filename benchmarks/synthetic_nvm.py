@@ -0,0 +1,182 @@
+import numpy as np
+
+from nvm_import_export.camera import CameraArray
+from nvm_import_export.point_cloud import PointCloud
+from nvm_import_export.nvm_file_handler import NVMFileHandler
+from nvm_import_export.console_operator import ConsoleOperator
+
+
+def create_synthetic_cameras(amount_cameras, fixed_calibration, width, height, random_state):
+    """
+    Returns cameras, which are placed on a sphere (radius 10) around the origin and look at the origin.
+    If fixed_calibration is False, each camera gets a different focal length.
+    """
+    directions = random_state.normal(size=(amount_cameras, 3))
+    directions /= np.linalg.norm(directions, axis=1)[:, np.newaxis]
+    centers = 10.0 * directions
+
+    # The rows of the rotation matrices are the camera axes w.r.t. world coordinates
+    z_axes = -directions
+    up = np.tile([0.0, 0.0, 1.0], (amount_cameras, 1))
+    # Avoid degenerated axes for cameras looking (almost) along the up vector
+    up[np.abs(z_axes[:, 2]) > 0.99] = [0.0, 1.0, 0.0]
+    x_axes = np.cross(up, z_axes)
+    x_axes /= np.linalg.norm(x_axes, axis=1)[:, np.newaxis]
+    y_axes = np.cross(z_axes, x_axes)
+    rotation_mats = np.stack([x_axes, y_axes, z_axes], axis=1)
+
+    if fixed_calibration:
+        focal_lengths = np.full(amount_cameras, 1.2 * width)
+    else:
+        focal_lengths = width * random_state.uniform(1.0, 1.5, size=amount_cameras)
+    calibration_mats = np.zeros((amount_cameras, 3, 3), dtype=float)
+    calibration_mats[:, 0, 0] = focal_lengths
+    calibration_mats[:, 1, 1] = focal_lengths
+    calibration_mats[:, 0, 2] = width / 2.0
+    calibration_mats[:, 1, 2] = height / 2.0
+    calibration_mats[:, 2, 2] = 1
+
+    camera_array = CameraArray(
+        file_names=['image_' + str(index).zfill(6) + '.jpg' for index in range(amount_cameras)],
+        quaternions=CameraArray.rotation_mats_to_quaternions(rotation_mats),
+        centers=centers,
+        calibration_mats=calibration_mats)
+    cameras = camera_array.get_cameras()
+    for camera in cameras:
+        camera.width = width
+        camera.height = height
+    return cameras
+
+
+def create_synthetic_point_cloud(cameras, amount_points, mean_track_length, random_state, noise=0.5,
+                                 min_track_length=2):
+    """
+    Returns a PointCloud with points in the cube [-2, 2]^3. Each point is observed by
+    (at least min_track_length) consecutive cameras. The measurements are the projections of the points
+    (relative to the principal point) disturbed by gaussian noise (in pixels).
+    """
+    amount_cameras = len(cameras)
+    assert amount_cameras >= min_track_length
+    camera_array = CameraArray.from_cameras(cameras)
+    coords = random_state.uniform(-2.0, 2.0, size=(amount_points, 3))
+    colors = random_state.randint(0, 256, size=(amount_points, 3))
+
+    track_lengths = min_track_length + random_state.poisson(
+        max(mean_track_length - min_track_length, 0), size=amount_points)
+    track_lengths = np.minimum(track_lengths, amount_cameras)
+    measurement_offsets = np.zeros(amount_points + 1, dtype=np.int64)
+    measurement_offsets[1:] = np.cumsum(track_lengths)
+    amount_measurements = measurement_offsets[-1]
+
+    point_indices = np.repeat(np.arange(amount_points), track_lengths)
+    index_in_track = np.arange(amount_measurements) - measurement_offsets[point_indices]
+    first_camera_indices = random_state.randint(0, amount_cameras, size=amount_points)
+    image_indices = (first_camera_indices[point_indices] + index_in_track) % amount_cameras
+
+    # x_cam = R X + t
+    camera_coords = np.einsum(
+        'nij,nj->ni', camera_array.rotation_mats[image_indices], coords[point_indices])
+    camera_coords += camera_array.translation_vecs[image_indices]
+    focal_lengths = camera_array.calibration_mats[image_indices, 0, 0]
+    measurement_x = focal_lengths * camera_coords[:, 0] / camera_coords[:, 2]
+    measurement_y = focal_lengths * camera_coords[:, 1] / camera_coords[:, 2]
+    measurement_x += random_state.normal(scale=noise, size=amount_measurements)
+    measurement_y += random_state.normal(scale=noise, size=amount_measurements)
+
+    return PointCloud(
+        coords=coords,
+        colors=colors,
+        measurement_offsets=measurement_offsets,
+        measurement_image_indices=image_indices,
+        measurement_feature_indices=np.arange(amount_measurements),
+        # Limit the number of digits, which keeps the file size similar to real NVM files
+        measurement_x=np.round(measurement_x, 4),
+        measurement_y=np.round(measurement_y, 4))
+
+
+def create_synthetic_model(amount_cameras,
+                           amount_points,
+                           mean_track_length=4,
+                           fixed_calibration=True,
+                           width=1920,
+                           height=1080,
+                           random_state=None,
+                           min_track_length=2):
+    """
+    Returns the cameras and the PointCloud of a synthetic model. The coordinates are rounded
+    to 6 decimals, which keeps the file size similar to real NVM files.
+    """
+    if random_state is None:
+        random_state = np.random.RandomState(0)
+    cameras = create_synthetic_cameras(amount_cameras, fixed_calibration, width, height, random_state)
+    point_cloud = create_synthetic_point_cloud(
+        cameras, amount_points, mean_track_length, random_state, min_track_length=min_track_length)
+    point_cloud.coords = np.round(point_cloud.coords, 6)
+    return cameras, point_cloud
+
+
+def format_nvm_model_lines(cameras, point_cloud):
+    """
+    Returns the lines of a <model> in a NVM file. The lines are formatted point by point
+    (independently of NVMFileHandler.write_nvm_file), i.e. this is the reference to check
+    the parser and the (plain Python) baseline of the writer benchmark.
+    """
+    lines = [str(len(cameras))]
+    for camera in cameras:
+        values = ([float(camera.get_focal_length())] + camera.get_quaternion().tolist() +
+                  camera.get_camera_center().tolist() + [0, 0])
+        lines.append(camera.file_name + '\t' + ' '.join(repr(value) for value in values))
+    lines.append('')
+    lines.append(str(len(point_cloud)))
+    for index in range(len(point_cloud)):
+        start, end = point_cloud.measurement_offsets[index:index + 2]
+        values = point_cloud.coords[index].tolist() + point_cloud.colors[index].tolist() + [int(end - start)]
+        for measurement_index in range(start, end):
+            values += [point_cloud.measurement_image_indices[measurement_index].item(),
+                       point_cloud.measurement_feature_indices[measurement_index].item(),
+                       point_cloud.measurement_x[measurement_index].item(),
+                       point_cloud.measurement_y[measurement_index].item()]
+        lines.append(' '.join(repr(value) for value in values))
+    lines.append('')
+    return lines
+
+
+def write_reference_nvm_file(output_nvm_file_name, models, fixed_calibration=False, line_separator='\n'):
+    """
+    Writes the models (a list of (cameras, PointCloud) tuples) to a NVM file (see format_nvm_model_lines).
+    If fixed_calibration is True, the calibration of the first camera is written to the first line.
+    """
+    if fixed_calibration:
+        calibration_mat = models[0][0][0].get_calibration_mat()
+        values = [calibration_mat[0][0], calibration_mat[0][2], calibration_mat[1][1], calibration_mat[1][2], 0]
+        lines = ['NVM_V3 FixedK ' + ' '.join(repr(float(value)) for value in values), '']
+    else:
+        lines = ['NVM_V3', '']
+    for cameras, point_cloud in models:
+        lines += format_nvm_model_lines(cameras, point_cloud)
+    # The empty model and the (empty) PLY section
+    lines += ['0', '', '0']
+    with open(output_nvm_file_name, 'wb') as output_file:
+        output_file.write((line_separator.join(lines) + line_separator).encode())
+
+
+def write_synthetic_nvm_file(output_nvm_file_name,
+                             amount_cameras,
+                             amount_points,
+                             mean_track_length=4,
+                             fixed_calibration=True,
+                             width=1920,
+                             height=1080,
+                             seed=0,
+                             op=None,
+                             num_workers=1):
+    """
+    Writes a synthetic NVM file and returns the corresponding cameras and PointCloud.
+    """
+    cameras, point_cloud = create_synthetic_model(
+        amount_cameras, amount_points, mean_track_length, fixed_calibration, width, height,
+        np.random.RandomState(seed))
+    if op is None:
+        op = ConsoleOperator()
+    NVMFileHandler.write_nvm_file(op, output_nvm_file_name, cameras, point_cloud, num_workers=num_workers)
+    return cameras, point_cloud
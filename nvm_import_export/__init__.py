@@ -30,52 +30,95 @@ bl_info = {
     "category": "Import-Export" }
 
 
-import bpy
-
-
-# load and reload submodules
-##################################
-
-import importlib
-from . import developer_utils
-importlib.reload(developer_utils)
-modules = developer_utils.setup_addon_modules(__path__, __name__, "bpy" in locals())
-
-# The root dir is blenders addon folder, 
-# therefore we need the "nvm_import_export" specifier for this addon  
-from nvm_import_export.import_nvm_op import ImportNVM
-from nvm_import_export.export_nvm_op import ExportNVM
-
-
-# register
+import os
+import sys
+import time
+_import_start_time = time.perf_counter()
+# Used to check, which modules are loaded by this addon during the startup of Blender
+_modules_before_import = set(sys.modules)
+
+try:
+    import bpy
+except ImportError:
+    # The parser and the writer do not depend on Blender, 
+    # i.e. they can be used without Blender (e.g. in benchmarks)
+    bpy = None
+
+if bpy is not None:
+
+    # reload submodules
+    ##################################
+
+    import importlib
+    from . import developer_utils
+    importlib.reload(developer_utils)
+    # Only modules, which have been imported before (i.e. if the addon is reloaded), are reloaded.
+    # The remaining modules (e.g. the parser and numpy) are imported when an operator is executed.
+    modules = developer_utils.reload_loaded_addon_modules(__name__)
+
+    # The root dir is blenders addon folder, 
+    # therefore we need the "nvm_import_export" specifier for this addon  
+    from nvm_import_export.import_nvm_op import ImportNVM, LoadFullResolutionPoints
+    from nvm_import_export.export_nvm_op import ExportNVM
+
+
+    # register
+    ##################################
+
+    import traceback
+
+    def menu_func_import(self, context):
+        self.layout.operator(ImportNVM.bl_idname, text="VSFM NVM Import (.nvm)")
+        
+    def menu_func_export(self, context):
+        self.layout.operator(ExportNVM.bl_idname, text="VSFM NVM Export (.nvm)")
+
+    def menu_func_object(self, context):
+        self.layout.separator()
+        self.layout.operator(LoadFullResolutionPoints.bl_idname)
+
+    def register():
+        register_start_time = time.perf_counter()
+        try: bpy.utils.register_module(__name__)
+        except: traceback.print_exc()
+
+        bpy.types.INFO_MT_file_import.append(menu_func_import)
+        bpy.types.INFO_MT_file_export.append(menu_func_export)
+        bpy.types.VIEW3D_MT_object.append(menu_func_object)
+
+        startup_timings['register'] = time.perf_counter() - register_start_time
+        print("Registered {} with {} modules".format(bl_info["name"], len(modules)))
+        if os.environ.get('NVM_IMPORT_EXPORT_STARTUP_TIMING'):
+            print(get_startup_report())
+        
+
+    def unregister():
+        try: bpy.utils.unregister_module(__name__)
+        except: traceback.print_exc()
+
+        bpy.types.INFO_MT_file_import.remove(menu_func_import)
+        bpy.types.INFO_MT_file_export.remove(menu_func_export)
+        bpy.types.VIEW3D_MT_object.remove(menu_func_object)
+
+        print("Unregistered {}".format(bl_info["name"]))
+
+# startup time
 ##################################
 
-import traceback
-
-def menu_func_import(self, context):
-    self.layout.operator(ImportNVM.bl_idname, text="VSFM NVM Import (.nvm)")
-    
-def menu_func_export(self, context):
-    self.layout.operator(ExportNVM.bl_idname, text="VSFM NVM Export (.nvm)")
-
-def register():
-    try: bpy.utils.register_module(__name__)
-    except: traceback.print_exc()
-
-    bpy.types.INFO_MT_file_import.append(menu_func_import)
-    bpy.types.INFO_MT_file_export.append(menu_func_export)
-
-    print("Registered {} with {} modules".format(bl_info["name"], len(modules)))
-    
-
-def unregister():
-    try: bpy.utils.unregister_module(__name__)
-    except: traceback.print_exc()
-
-    bpy.types.INFO_MT_file_import.remove(menu_func_import)
-    bpy.types.INFO_MT_file_export.remove(menu_func_export)
-
-    print("Unregistered {}".format(bl_info["name"]))
+# Set the environment variable NVM_IMPORT_EXPORT_STARTUP_TIMING to print the report during the startup
+startup_timings = {'import': time.perf_counter() - _import_start_time,
+                   'register': None,
+                   'loaded_modules': sorted(set(sys.modules) - _modules_before_import)}
+
+def get_startup_report():
+    """
+    Returns the time spent to import and register this addon and the modules loaded by the import.
+    """
+    report = 'Startup of {}: import {:.1f} ms'.format(bl_info["name"], startup_timings['import'] * 1000)
+    if startup_timings['register'] is not None:
+        report += ', register {:.1f} ms'.format(startup_timings['register'] * 1000)
+    report += '\nLoaded modules: ' + ', '.join(startup_timings['loaded_modules'])
+    return report
 
 if __name__ == '__main__':
     print('main called')
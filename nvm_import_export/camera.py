@@ -1,7 +1,6 @@
 __author__ = 'sebastian'
 
 import numpy as np
-import math
 
 class Camera:
     def __init__(self):
@@ -115,26 +114,7 @@ class Camera:
         Parallel bundle adjustment (pba) code (used by visualsfm) is provided here:
             http://grail.cs.washington.edu/projects/mcba/
         """
-        qq = math.sqrt(q[0]*q[0]+q[1]*q[1]+q[2]*q[2]+q[3]*q[3])
-        if qq > 0:  # Normalize the quaternion
-            qw = q[0]/qq
-            qx = q[1]/qq
-            qy = q[2]/qq
-            qz = q[3]/qq
-        else:
-            qw = 1
-            qx = qy = qz = 0
-        m = np.zeros((3, 3), dtype=float)
-        m[0][0] = float(qw*qw + qx*qx- qz*qz- qy*qy )
-        m[0][1] = float(2*qx*qy -2*qz*qw )
-        m[0][2] = float(2*qy*qw + 2*qz*qx)
-        m[1][0] = float(2*qx*qy+ 2*qw*qz)
-        m[1][1] = float(qy*qy+ qw*qw - qz*qz- qx*qx)
-        m[1][2] = float(2*qz*qy- 2*qx*qw)
-        m[2][0] = float(2*qx*qz- 2*qy*qw)
-        m[2][1] = float(2*qy*qz + 2*qw*qx )
-        m[2][2] = float(qz*qz+ qw*qw- qy*qy- qx*qx)
-        return m
+        return CameraArray.quaternions_to_rotation_mats(q)[0]
 
     @staticmethod
     def rotation_matrix_to_quaternion(m):
@@ -143,34 +123,157 @@ class Camera:
         Parallel bundle adjustment (pba) code (used by visualsfm) is provided here:
             http://grail.cs.washington.edu/projects/mcba/
         """
-        q = np.array([0, 0, 0, 0], dtype=float)
-        q[0] = 1 + m[0][0] + m[1][1] + m[2][2]
-        if q[0] > 0.000000001:
-            q[0] = math.sqrt(q[0]) / 2.0
-            q[1] = (m[2][1] - m[1][2]) / ( 4.0 * q[0])
-            q[2] = (m[0][2] - m[2][0]) / ( 4.0 * q[0])
-            q[3] = (m[1][0] - m[0][1]) / ( 4.0 * q[0])
-        else:
-            if m[0][0] > m[1][1] and m[0][0] > m[2][2]:
-                s = 2.0 * math.sqrt(1.0 + m[0][0] - m[1][1] - m[2][2])
-                q[1] = 0.25 * s
-                q[2] = (m[0][1] + m[1][0]) / s
-                q[3] = (m[0][2] + m[2][0]) / s
-                q[0] = (m[1][2] - m[2][1]) / s
-            elif m[1][1] > m[2][2]:
-                s = 2.0 * math.sqrt(1.0 + m[1][1] - m[0][0] - m[2][2])
-                q[1] = (m[0][1] + m[1][0]) / s
-                q[2] = 0.25 * s
-                q[3] = (m[1][2] + m[2][1]) / s
-                q[0] = (m[0][2] - m[2][0]) / s
-            else:
-                s = 2.0 * math.sqrt(1.0 + m[2][2] - m[0][0] - m[1][1])
-                q[1] = (m[0][2] + m[2][0]) / s
-                q[2] = (m[1][2] + m[2][1]) / s
-                q[3] = 0.25 * s
-                q[0] = (m[0][1] - m[1][0]) / s
-        return q
+        return CameraArray.rotation_mats_to_quaternions(m)[0]
+
+
+class CameraArray:
+    """
+    Stores the parameters of N cameras in (batched) NumPy arrays, i.e.
+        quaternions (N,4), rotation_mats (N,3,3), centers (N,3), translation_vecs (N,3),
+        normals (N,3) and calibration_mats (N,3,3)
+    Individual Camera objects are created on demand with get_camera().
+    """
+
+    # The names of the arrays, which are passed to the constructor (e.g. when loading stored arrays)
+    array_names = ['quaternions', 'centers', 'calibration_mats', 'ids', 'rotation_mats',
+                   'translation_vecs', 'normals']
+
+    def __init__(self,
+                 file_names,
+                 quaternions,
+                 centers,
+                 calibration_mats,
+                 ids=None,
+                 rotation_mats=None,
+                 translation_vecs=None,
+                 normals=None):
+
+        self.file_names = list(file_names)
+        num_cameras = len(self.file_names)
+        self.quaternions = np.asarray(quaternions, dtype=float).reshape(num_cameras, 4)
+        self.centers = np.asarray(centers, dtype=float).reshape(num_cameras, 3)
+        self.calibration_mats = np.asarray(calibration_mats, dtype=float).reshape(num_cameras, 3, 3)
+
+        if ids is None:
+            ids = np.arange(num_cameras)
+        self.ids = np.asarray(ids, dtype=np.int64)
+
+        if rotation_mats is None:
+            rotation_mats = CameraArray.quaternions_to_rotation_mats(self.quaternions)
+        self.rotation_mats = np.asarray(rotation_mats, dtype=float).reshape(num_cameras, 3, 3)
+
+        if translation_vecs is None:
+            # t = -R C
+            translation_vecs = CameraArray.compute_translation_vecs(self.centers, self.rotation_mats)
+        self.translation_vecs = np.asarray(translation_vecs, dtype=float).reshape(num_cameras, 3)
+
+        if normals is None:
+            # The camera view direction (0, 0, 1) w.r.t. world coordinates, i.e. R^T (0, 0, 1)
+            normals = self.rotation_mats[:, 2, :]
+        self.normals = np.asarray(normals, dtype=float).reshape(num_cameras, 3)
+
+    def __len__(self):
+        return len(self.file_names)
+
+    def get_camera(self, index):
+        camera = Camera()
+        camera._quaternion = self.quaternions[index].copy()
+        camera._rotation_mat = self.rotation_mats[index].copy()
+        camera._center = self.centers[index].copy()
+        camera._translation_vec = self.translation_vecs[index].copy()
+        camera.normal = self.normals[index].copy()
+        camera.set_calibration_mat(self.calibration_mats[index].copy())
+        camera.file_name = self.file_names[index]
+        camera.id = int(self.ids[index])
+        return camera
+
+    def get_cameras(self):
+        return [self.get_camera(index) for index in range(len(self))]
+
+    @staticmethod
+    def from_cameras(cameras):
+        return CameraArray(
+            file_names=[camera.file_name for camera in cameras],
+            quaternions=[camera.get_quaternion() for camera in cameras],
+            centers=[camera.get_camera_center() for camera in cameras],
+            calibration_mats=[camera._calibration_mat for camera in cameras],
+            ids=[camera.id for camera in cameras],
+            rotation_mats=[camera.get_rotation_mat() for camera in cameras],
+            translation_vecs=[camera.get_translation_vec() for camera in cameras],
+            normals=[camera.normal for camera in cameras])
 
+    @staticmethod
+    def compute_translation_vecs(centers, rotation_mats):
+        # t = -R C
+        return -np.einsum('nij,nj->ni', rotation_mats, centers)
 
+    @staticmethod
+    def quaternions_to_rotation_mats(quaternions):
+        """
+        Batched version of Camera.quaternion_to_rotation_matrix()
+        """
+        q = np.asarray(quaternions, dtype=float).reshape(-1, 4)
+        qq = np.sqrt(np.sum(q * q, axis=1))
+        valid = qq > 0
+        # Normalize the quaternions (invalid quaternions are replaced with the identity)
+        q_normalized = np.zeros_like(q)
+        q_normalized[:, 0] = 1
+        q_normalized[valid] = q[valid] / qq[valid, np.newaxis]
+        qw, qx, qy, qz = q_normalized.T
 
+        m = np.empty((len(q), 3, 3), dtype=float)
+        m[:, 0, 0] = qw*qw + qx*qx - qz*qz - qy*qy
+        m[:, 0, 1] = 2*qx*qy - 2*qz*qw
+        m[:, 0, 2] = 2*qy*qw + 2*qz*qx
+        m[:, 1, 0] = 2*qx*qy + 2*qw*qz
+        m[:, 1, 1] = qy*qy + qw*qw - qz*qz - qx*qx
+        m[:, 1, 2] = 2*qz*qy - 2*qx*qw
+        m[:, 2, 0] = 2*qx*qz - 2*qy*qw
+        m[:, 2, 1] = 2*qy*qz + 2*qw*qx
+        m[:, 2, 2] = qz*qz + qw*qw - qy*qy - qx*qx
+        return m
 
+    @staticmethod
+    def rotation_mats_to_quaternions(rotation_mats):
+        """
+        Batched version of Camera.rotation_matrix_to_quaternion()
+        """
+        m = np.asarray(rotation_mats, dtype=float).reshape(-1, 3, 3)
+        q = np.zeros((len(m), 4), dtype=float)
+        m00, m01, m02 = m[:, 0, 0], m[:, 0, 1], m[:, 0, 2]
+        m10, m11, m12 = m[:, 1, 0], m[:, 1, 1], m[:, 1, 2]
+        m20, m21, m22 = m[:, 2, 0], m[:, 2, 1], m[:, 2, 2]
+
+        trace_case = 1 + m00 + m11 + m22 > 0.000000001
+        x_case = ~trace_case & (m00 > m11) & (m00 > m22)
+        y_case = ~trace_case & ~x_case & (m11 > m22)
+        z_case = ~trace_case & ~x_case & ~y_case
+
+        c = trace_case
+        qw = np.sqrt(1 + m00[c] + m11[c] + m22[c]) / 2.0
+        q[c, 0] = qw
+        q[c, 1] = (m21[c] - m12[c]) / (4.0 * qw)
+        q[c, 2] = (m02[c] - m20[c]) / (4.0 * qw)
+        q[c, 3] = (m10[c] - m01[c]) / (4.0 * qw)
+
+        c = x_case
+        s = 2.0 * np.sqrt(1.0 + m00[c] - m11[c] - m22[c])
+        q[c, 1] = 0.25 * s
+        q[c, 2] = (m01[c] + m10[c]) / s
+        q[c, 3] = (m02[c] + m20[c]) / s
+        q[c, 0] = (m12[c] - m21[c]) / s
+
+        c = y_case
+        s = 2.0 * np.sqrt(1.0 + m11[c] - m00[c] - m22[c])
+        q[c, 1] = (m01[c] + m10[c]) / s
+        q[c, 2] = 0.25 * s
+        q[c, 3] = (m12[c] + m21[c]) / s
+        q[c, 0] = (m02[c] - m20[c]) / s
+
+        c = z_case
+        s = 2.0 * np.sqrt(1.0 + m22[c] - m00[c] - m11[c])
+        q[c, 1] = (m02[c] + m20[c]) / s
+        q[c, 2] = (m12[c] + m21[c]) / s
+        q[c, 3] = 0.25 * s
+        q[c, 0] = (m01[c] - m10[c]) / s
+        return q
@@ -0,0 +1,256 @@
+"""
+Converts NVM files without Blender, e.g.
+    python -m nvm_import_export.cli reconstruction.nvm --format ply
+    python -m nvm_import_export.cli reconstructions/ --format npz --output-directory converted --workers 8
+"""
+
+import os
+import sys
+import glob
+import argparse
+import concurrent.futures
+from collections import namedtuple
+import numpy as np
+
+from nvm_import_export.nvm_file_handler import NVMFileHandler
+from nvm_import_export.camera import CameraArray
+from nvm_import_export.console_operator import ConsoleOperator
+from nvm_import_export.metrics import ImportMetrics
+from nvm_import_export.principal_points import initialize_principal_points
+from nvm_import_export.point_cloud import PointCloud
+from nvm_import_export.stop_watch import StopWatch
+
+ConversionResult = namedtuple(
+    'ConversionResult', ['input_nvm_file_name', 'output_file_name', 'amount_cameras', 'amount_points',
+                         'duration', 'error'])
+
+output_format_to_extension = {'ply': '.ply', 'npz': '.npz', 'nvm': '.nvm'}
+
+
+def write_ply_file(output_ply_file_name, point_cloud):
+    """
+    Writes the coordinates and colors of the points to a binary PLY file.
+    """
+    vertices = np.empty(
+        len(point_cloud),
+        dtype=[('x', '<f8'), ('y', '<f8'), ('z', '<f8'), ('red', 'u1'), ('green', 'u1'), ('blue', 'u1')])
+    vertices['x'] = point_cloud.coords[:, 0]
+    vertices['y'] = point_cloud.coords[:, 1]
+    vertices['z'] = point_cloud.coords[:, 2]
+    vertices['red'] = point_cloud.colors[:, 0]
+    vertices['green'] = point_cloud.colors[:, 1]
+    vertices['blue'] = point_cloud.colors[:, 2]
+    header = ['ply',
+              'format binary_little_endian 1.0',
+              'element vertex ' + str(len(point_cloud)),
+              'property double x',
+              'property double y',
+              'property double z',
+              'property uchar red',
+              'property uchar green',
+              'property uchar blue',
+              'end_header']
+    with open(output_ply_file_name, 'wb') as output_file:
+        output_file.write(('\n'.join(header) + '\n').encode())
+        output_file.write(vertices.tobytes())
+
+
+def write_npz_file(output_npz_file_name, cameras, point_cloud, compress=False):
+    """
+    Writes the camera arrays (prefix 'camera_') and the point arrays (prefix 'point_') to a NPZ file.
+    """
+    camera_array = CameraArray.from_cameras(cameras)
+    arrays = {'camera_file_names': np.array(camera_array.file_names)}
+    for name in CameraArray.array_names:
+        arrays['camera_' + name] = getattr(camera_array, name)
+    for name in PointCloud.array_names:
+        arrays['point_' + name] = getattr(point_cloud, name)
+    if compress:
+        np.savez_compressed(output_npz_file_name, **arrays)
+    else:
+        np.savez(output_npz_file_name, **arrays)
+
+
+def normalize_reconstruction(cameras, point_cloud):
+    """
+    Translates and scales the reconstruction, so that the centroid of the points is the origin
+    and the root mean square distance of the points to the origin is 1.
+    The rotations of the cameras and the measurements are not affected.
+    """
+    if len(point_cloud) == 0:
+        return cameras, point_cloud
+    centroid = point_cloud.coords.mean(axis=0)
+    rms_distance = np.sqrt(np.mean(np.sum((point_cloud.coords - centroid) ** 2, axis=1)))
+    scale = 1.0 / rms_distance if rms_distance > 0 else 1.0
+    point_cloud.coords = (point_cloud.coords - centroid) * scale
+
+    camera_array = CameraArray.from_cameras(cameras)
+    camera_array.centers = (camera_array.centers - centroid) * scale
+    camera_array.translation_vecs = CameraArray.compute_translation_vecs(
+        camera_array.centers, camera_array.rotation_mats)
+    normalized_cameras = camera_array.get_cameras()
+    for camera, normalized_camera in zip(cameras, normalized_cameras):
+        normalized_camera.width = camera.width
+        normalized_camera.height = camera.height
+    return normalized_cameras, point_cloud
+
+
+def convert_nvm_file(input_nvm_file_name,
+                     output_file_name,
+                     output_format,
+                     model_index=0,
+                     normalize=False,
+                     principal_point=None,
+                     image_directory=None,
+                     compress=False,
+                     verbose=False):
+    """
+    Converts the model with model_index of the NVM file to PLY, NPZ or NVM.
+    Returns a ConversionResult, the error is None if the conversion succeeded.
+    """
+    op = ConsoleOperator(verbose)
+    # In verbose mode all messages (including the per model messages) are printed
+    metrics = ImportMetrics(2 if verbose else 0)
+    stop_watch = StopWatch()
+    try:
+        models = NVMFileHandler.index_nvm_models(input_nvm_file_name, op, model_index + 1, metrics)
+        if model_index >= len(models):
+            raise ValueError('The NVM file contains only ' + str(len(models)) + ' model(s)')
+        cameras, point_cloud = NVMFileHandler.parse_nvm_file(
+            input_nvm_file_name, op, as_point_cloud=True, model=models[model_index], metrics=metrics)
+        if normalize:
+            cameras, point_cloud = normalize_reconstruction(cameras, point_cloud)
+
+        if output_format == 'ply':
+            write_ply_file(output_file_name, point_cloud)
+        elif output_format == 'npz':
+            write_npz_file(output_file_name, cameras, point_cloud, compress)
+        elif output_format == 'nvm':
+            if image_directory is None:
+                image_directory = os.path.dirname(input_nvm_file_name)
+            if principal_point is None:
+                # Use the image centers
+                principal_point = [float('nan'), float('nan')]
+            if not initialize_principal_points(
+                    op, cameras, image_directory, principal_point[0], principal_point[1], metrics=metrics):
+                raise ValueError('Can not determine the principal points (use --principal-point)')
+            NVMFileHandler.write_nvm_file(op, output_file_name, cameras, point_cloud)
+        else:
+            raise ValueError('Unknown output format: ' + str(output_format))
+    except (IOError, OSError, ValueError, AssertionError) as error:
+        return ConversionResult(input_nvm_file_name, output_file_name, 0, 0,
+                                stop_watch.get_elapsed_time(), repr(error))
+    return ConversionResult(input_nvm_file_name, output_file_name, len(cameras), len(point_cloud),
+                            stop_watch.get_elapsed_time(), None)
+
+
+def _convert_nvm_file_kwargs(kwargs):
+    # Worker function of convert_nvm_files (runs in a separate process)
+    return convert_nvm_file(**kwargs)
+
+
+def collect_nvm_file_names(input_paths):
+    """
+    Returns the NVM files, input paths can be files or directories (containing NVM files).
+    """
+    nvm_file_names = []
+    for input_path in input_paths:
+        if os.path.isdir(input_path):
+            nvm_file_names.extend(sorted(glob.glob(os.path.join(input_path, '*.nvm'))))
+        else:
+            nvm_file_names.append(input_path)
+    return nvm_file_names
+
+
+def get_output_file_name(input_nvm_file_name, output_format, output_directory=None, normalize=False):
+    stem = os.path.splitext(os.path.basename(input_nvm_file_name))[0]
+    if output_directory is None:
+        output_directory = os.path.dirname(input_nvm_file_name)
+    extension = output_format_to_extension[output_format]
+    output_file_name = os.path.join(output_directory, stem + extension)
+    if os.path.realpath(output_file_name) == os.path.realpath(input_nvm_file_name):
+        # Do not overwrite the input file
+        stem += '_normalized' if normalize else '_converted'
+        output_file_name = os.path.join(output_directory, stem + extension)
+    return output_file_name
+
+
+def convert_nvm_files(input_nvm_file_names, output_format, output_directory=None, num_workers=1, **kwargs):
+    """
+    Converts the NVM files in parallel processes (one file per task).
+    The remaining keyword arguments are passed to convert_nvm_file.
+    Yields the ConversionResults in the order of completion.
+    """
+    if output_directory is not None and not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+    tasks = []
+    for input_nvm_file_name in input_nvm_file_names:
+        task = dict(kwargs)
+        task['input_nvm_file_name'] = input_nvm_file_name
+        task['output_file_name'] = get_output_file_name(
+            input_nvm_file_name, output_format, output_directory, kwargs.get('normalize', False))
+        task['output_format'] = output_format
+        tasks.append(task)
+
+    if num_workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield convert_nvm_file(**task)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [executor.submit(_convert_nvm_file_kwargs, task) for task in tasks]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Convert NVM files to PLY (points), NPZ (cameras and points) or NVM.')
+    parser.add_argument('input_paths', nargs='+',
+                        help='NVM files or directories containing NVM files.')
+    parser.add_argument('--format', dest='output_format', choices=sorted(output_format_to_extension),
+                        default='ply')
+    parser.add_argument('--output-directory', default=None,
+                        help='Directory of the converted files (default: directory of each NVM file).')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes, each process converts one file at a time.')
+    parser.add_argument('--model', dest='model_index', type=int, default=0,
+                        help='Index of the converted model in each NVM file.')
+    parser.add_argument('--normalize', action='store_true',
+                        help='Move the centroid of the points to the origin and scale the reconstruction ' +
+                             'to a root mean square point distance of 1.')
+    parser.add_argument('--principal-point', type=float, nargs=2, default=None,
+                        help='Principal point used to write NVM files without fixed calibration ' +
+                             '(default: image centers).')
+    parser.add_argument('--image-directory', default=None,
+                        help='Directory of the images used to determine the image centers ' +
+                             '(default: directory of each NVM file).')
+    parser.add_argument('--compress', action='store_true', help='Compress NPZ files.')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    input_nvm_file_names = collect_nvm_file_names(args.input_paths)
+    amount_failed = 0
+    for result in convert_nvm_files(input_nvm_file_names,
+                                    args.output_format,
+                                    args.output_directory,
+                                    args.workers,
+                                    model_index=args.model_index,
+                                    normalize=args.normalize,
+                                    principal_point=args.principal_point,
+                                    image_directory=args.image_directory,
+                                    compress=args.compress,
+                                    verbose=args.verbose):
+        if result.error is None:
+            print(result.input_nvm_file_name + ' -> ' + result.output_file_name +
+                  ' (' + str(result.amount_cameras) + ' cameras, ' + str(result.amount_points) + ' points, ' +
+                  '%.2f' % result.duration + ' s)')
+        else:
+            amount_failed += 1
+            print(result.input_nvm_file_name + ' FAILED: ' + result.error)
+    print('Converted ' + str(len(input_nvm_file_names) - amount_failed) + ' of ' +
+          str(len(input_nvm_file_names)) + ' file(s)')
+    return 1 if amount_failed > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
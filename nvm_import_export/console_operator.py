@@ -0,0 +1,16 @@
+import sys
+
+
+class ConsoleOperator(object):
+    """
+    Replaces the Blender operator (i.e. the op parameter) of the NVMFileHandler methods
+    outside of Blender (e.g. in the command line converter or in worker processes).
+    INFO messages are only printed, if verbose is True.
+    """
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+
+    def report(self, report_type, message):
+        if self.verbose or 'INFO' not in report_type:
+            sys.stderr.write(', '.join(sorted(report_type)) + ': ' + message + '\n')
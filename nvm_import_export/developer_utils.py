@@ -40,3 +40,18 @@ def setup_addon_modules(path, package_name, reload):
     if reload:
         reload_modules(modules)
     return modules
+
+def reload_loaded_addon_modules(package_name):
+    """
+    Reloads the modules of this addon, which have already been imported (i.e. if the 
+    addon is reloaded). In contrast to setup_addon_modules() no additional modules are 
+    imported, which allows to import modules on demand (e.g. when an operator is executed).
+
+    package_name -- __name__ from __init__.py
+    """
+    modules = [module for module_name, module in list(sys.modules.items())
+               if module_name.startswith(package_name + ".") and module is not None]
+    modules.sort(key = lambda module: getattr(module, "__reload_order_index__", 0))
+    for module in modules:
+        importlib.reload(module)
+    return modules
@@ -1,8 +1,8 @@
 import bpy
 import os
-import numpy as np
-from nvm_import_export.point import Point
-from nvm_import_export.camera import Camera
+
+# NumPy and the modules depending on NumPy are imported in the functions using them, 
+# i.e. they are not loaded before the first export (keeps the startup time of Blender low)
 
 from bpy.props import (CollectionProperty,
                        StringProperty,
@@ -28,6 +28,7 @@ def invert_y_and_z_axis(input_matrix_or_vector):
     return output_matrix_or_vector
 
 def get_calibration_mat(op, blender_camera):
+    from nvm_import_export.camera import Camera
     op.report({'INFO'}, 'get_calibration_mat: ...')
     scene = bpy.context.scene
     render_resolution_width = scene.render.resolution_x
@@ -60,6 +61,7 @@ def get_computer_vision_camera_matrix(op, blender_camera):
     :param blender_camera:
     :return:
     """
+    import numpy as np
 
     # Only if the objects have a scale of 1, the 3x3 part 
     # of the corresponding matrix_world contains a pure rotation.
@@ -83,12 +85,54 @@ def get_computer_vision_camera_matrix(op, blender_camera):
     return rotated_camera_matrix_around_x_by_180
 
 
+def get_vertex_colors(mesh):
+    """
+    Returns the vertex colors (uint8) of the active vertex color layer or None.
+    Blender stores the colors per loop (face corner), the colors of loops
+    sharing a vertex are averaged.
+    """
+    import numpy as np
+    if mesh.vertex_colors.active is None or len(mesh.loops) == 0:
+        return None
+    color_layer_data = mesh.vertex_colors.active.data
+    num_components = len(color_layer_data[0].color)
+    loop_colors = np.empty(len(mesh.loops) * num_components, dtype=np.float32)
+    color_layer_data.foreach_get('color', loop_colors)
+    loop_colors = loop_colors.reshape(-1, num_components)[:, 0:3]
+    loop_vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_vertex_indices)
+
+    num_vertices = len(mesh.vertices)
+    loops_per_vertex = np.bincount(loop_vertex_indices, minlength=num_vertices)
+    vertex_colors = np.ones((num_vertices, 3), dtype=np.float64)
+    has_loops = loops_per_vertex > 0
+    for channel in range(3):
+        channel_sum = np.bincount(
+            loop_vertex_indices, weights=loop_colors[:, channel], minlength=num_vertices)
+        vertex_colors[has_loops, channel] = channel_sum[has_loops] / loops_per_vertex[has_loops]
+    return np.round(vertex_colors * 255).astype(np.uint8)
+
+def get_world_vertex_coords(obj):
+    """
+    Reads the vertex coordinates with foreach_get and transforms them 
+    to world coordinates with a single matrix multiplication
+    """
+    import numpy as np
+    mesh = obj.data
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', coords)
+    coords = coords.reshape(-1, 3).astype(np.float64)
+    world_matrix = np.array(obj.matrix_world)
+    return coords.dot(world_matrix[0:3, 0:3].T) + world_matrix[0:3, 3]
+
 def export_selected_cameras_and_vertices_of_meshes(op):
+    import numpy as np
+    from nvm_import_export.point_cloud import PointCloud
+    from nvm_import_export.camera import Camera
     op.report({'INFO'}, 'export_selected_cameras_and_vertices_of_meshes: ...')
     cameras = []
-    points = []
+    point_clouds = []
     
-    point_index = 0
     camera_index = 0
     for obj in bpy.context.selected_objects:
         if obj.type == 'CAMERA':
@@ -106,19 +150,15 @@ def export_selected_cameras_and_vertices_of_meshes(op):
             cameras.append(cam)
             camera_index += 1
             
-        else:
-            if obj.data is not None:
-                obj_points = []
-                for vert in obj.data.vertices:
-                    coord_world = obj.matrix_world * vert.co
-                    obj_points.append(Point(coord=coord_world, 
-                                            color=[255,255,255],
-                                            measurements=[],
-                                            id=point_index,
-                                            scalars=[]))
-                                            
-                    point_index += 1
-                points += obj_points
+        elif obj.type == 'MESH':
+            coords = get_world_vertex_coords(obj)
+            # Points without color are exported as white points
+            colors = get_vertex_colors(obj.data)
+            point_clouds.append(PointCloud(coords=coords, colors=colors))
+
+    points = PointCloud.concatenate(point_clouds)
+    # The point ids are consecutive across all meshes
+    points.ids = np.arange(len(points), dtype=np.int64)
     op.report({'INFO'}, 'export_selected_cameras_and_vertices_of_meshes: Done')
     return cameras, points
 
@@ -136,6 +176,13 @@ class ExportNVM(bpy.types.Operator, ExportHelper):
         description="File path used for exporting the NVM file",
         type=bpy.types.OperatorFileListElement)
         
+    num_write_workers = IntProperty(
+        name="Write Workers",
+        description = "Number of processes used to format the points. " +
+                      "Values larger than 1 format the points in parallel.",
+        default=1,
+        min=1)
+
     filename_ext = ".nvm"
     filter_glob = StringProperty(default="*.nvm", options={'HIDDEN'})
         
@@ -154,7 +201,8 @@ class ExportNVM(bpy.types.Operator, ExportHelper):
             assert cam.get_calibration_mat() is not None
         
         from nvm_import_export.nvm_file_handler import NVMFileHandler
-        NVMFileHandler.write_nvm_file(self, paths[0], cameras, points)
+        NVMFileHandler.write_nvm_file(
+            self, paths[0], cameras, points, num_workers=self.num_write_workers)
                 
                  
         return {'FINISHED'}
\ No newline at end of file
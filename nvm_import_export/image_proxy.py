@@ -0,0 +1,78 @@
+import os
+import hashlib
+import tempfile
+import concurrent.futures
+
+from nvm_import_export.image_size import PILImage
+from nvm_import_export.process_pool import create_process_pool_executor
+
+
+def get_default_proxy_directory():
+    return os.path.join(tempfile.gettempdir(), 'nvm_import_export_proxies')
+
+
+def get_proxy_path(image_path, max_edge_length, proxy_directory):
+    """
+    The proxy is keyed by a hash of the image path, the image size (in bytes),
+    the modification time of the image and the maximum edge length of the proxy.
+    """
+    stat_result = os.stat(image_path)
+    source_key = '|'.join([os.path.abspath(image_path),
+                           str(stat_result.st_size),
+                           repr(stat_result.st_mtime),
+                           str(max_edge_length)])
+    source_hash = hashlib.sha1(source_key.encode()).hexdigest()
+    image_stem = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(proxy_directory, image_stem + '_' + source_hash + '.jpg')
+
+
+def _create_proxy(image_path, proxy_path, max_edge_length):
+    # Worker function of create_image_proxies (runs in a separate process)
+    image = PILImage.open(image_path)
+    # Let the JPEG decoder downscale while decoding (considerably faster)
+    image.draft('RGB', (max_edge_length, max_edge_length))
+    image = image.convert('RGB')
+    image.thumbnail((max_edge_length, max_edge_length), PILImage.LANCZOS)
+    # Write to a temporary file first, so incomplete proxies are never used
+    temp_proxy_path = proxy_path + '.tmp'
+    image.save(temp_proxy_path, 'JPEG', quality=90)
+    os.replace(temp_proxy_path, proxy_path)
+    return proxy_path
+
+
+def create_image_proxies(image_paths, max_edge_length, proxy_directory, num_workers, op):
+    """
+    Returns a dict mapping each image path to a downsampled proxy image, whose longest edge
+    is at most max_edge_length. Missing proxies are generated in parallel worker processes.
+    If a proxy can not be created, the original image is used.
+    """
+    if proxy_directory is None or proxy_directory == '':
+        proxy_directory = get_default_proxy_directory()
+    image_paths = [image_path for image_path in image_paths if os.path.isfile(image_path)]
+    if PILImage is None:
+        op.report({'WARNING'}, 'PIL/PILLOW is not installed. Can not create image proxies, using the original images.')
+        return {image_path: image_path for image_path in image_paths}
+    if not os.path.isdir(proxy_directory):
+        os.makedirs(proxy_directory)
+
+    image_to_proxy_path = {}
+    missing_image_paths = []
+    for image_path in image_paths:
+        proxy_path = get_proxy_path(image_path, max_edge_length, proxy_directory)
+        image_to_proxy_path[image_path] = proxy_path
+        if not os.path.isfile(proxy_path):
+            missing_image_paths.append(image_path)
+
+    op.report({'INFO'}, 'Creating image proxies: ' + str(len(missing_image_paths)) +
+              ' (' + str(len(image_paths) - len(missing_image_paths)) + ' cached)')
+    if len(missing_image_paths) > 0:
+        with create_process_pool_executor(max(num_workers, 1)) as executor:
+            future_to_image_path = {
+                executor.submit(_create_proxy, image_path, image_to_proxy_path[image_path], max_edge_length): image_path
+                for image_path in missing_image_paths}
+            for future in concurrent.futures.as_completed(future_to_image_path):
+                image_path = future_to_image_path[future]
+                if future.exception() is not None:
+                    op.report({'WARNING'}, 'Could not create image proxy for: ' + image_path)
+                    image_to_proxy_path[image_path] = image_path
+    return image_to_proxy_path
@@ -0,0 +1,197 @@
+import os
+import json
+import struct
+import tempfile
+import concurrent.futures
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+
+def _read_jpeg_size(image_file):
+    # The size is stored in the start of frame (SOF) segment
+    if image_file.read(2) != b'\xff\xd8':
+        return None
+    while True:
+        marker_start = image_file.read(1)
+        if marker_start == b'':
+            return None
+        if marker_start != b'\xff':
+            continue
+        marker = image_file.read(1)
+        # Skip fill bytes
+        while marker == b'\xff':
+            marker = image_file.read(1)
+        if marker == b'':
+            return None
+        marker = ord(marker)
+        # Markers without segment (TEM, RSTn, SOI, EOI)
+        if marker == 0x01 or 0xd0 <= marker <= 0xd9:
+            continue
+        segment_length_bytes = image_file.read(2)
+        if len(segment_length_bytes) != 2:
+            return None
+        segment_length = struct.unpack('>H', segment_length_bytes)[0]
+        # SOF0 - SOF15 except DHT (0xc4), JPG (0xc8) and DAC (0xcc)
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+            sof = image_file.read(5)
+            if len(sof) != 5:
+                return None
+            height, width = struct.unpack('>HH', sof[1:5])
+            return width, height
+        image_file.seek(segment_length - 2, os.SEEK_CUR)
+
+
+def _read_png_size(image_file):
+    # The size is stored in the IHDR chunk, which follows the signature
+    header = image_file.read(24)
+    if len(header) != 24 or header[0:8] != b'\x89PNG\r\n\x1a\n' or header[12:16] != b'IHDR':
+        return None
+    width, height = struct.unpack('>II', header[16:24])
+    return width, height
+
+
+def _read_tiff_size(image_file):
+    # The size is stored in the ImageWidth (256) and ImageLength (257) tags of the first IFD
+    header = image_file.read(8)
+    if len(header) != 8:
+        return None
+    if header[0:4] == b'II*\x00':
+        byte_order = '<'
+    elif header[0:4] == b'MM\x00*':
+        byte_order = '>'
+    else:
+        return None
+    ifd_offset = struct.unpack(byte_order + 'I', header[4:8])[0]
+    image_file.seek(ifd_offset)
+    amount_entries_bytes = image_file.read(2)
+    if len(amount_entries_bytes) != 2:
+        return None
+    amount_entries = struct.unpack(byte_order + 'H', amount_entries_bytes)[0]
+    entries = image_file.read(12 * amount_entries)
+    width = height = None
+    for entry_index in range(len(entries) // 12):
+        tag, field_type, _ = struct.unpack(byte_order + 'HHI', entries[entry_index * 12:entry_index * 12 + 8])
+        value_bytes = entries[entry_index * 12 + 8:entry_index * 12 + 12]
+        if field_type == 3:     # SHORT
+            value = struct.unpack(byte_order + 'H', value_bytes[0:2])[0]
+        elif field_type == 4:   # LONG
+            value = struct.unpack(byte_order + 'I', value_bytes)[0]
+        else:
+            continue
+        if tag == 256:
+            width = value
+        elif tag == 257:
+            height = value
+    if width is None or height is None:
+        return None
+    return width, height
+
+
+def read_image_size(image_path):
+    """
+    Returns the (width, height) of the image or None, if the size can not be determined.
+    The size of JPEG, PNG and TIFF files is read from the file header,
+    for other formats PIL/Pillow is used (if installed).
+    """
+    if not os.path.isfile(image_path):
+        return None
+    with open(image_path, 'rb') as image_file:
+        for read_size in [_read_jpeg_size, _read_png_size, _read_tiff_size]:
+            image_file.seek(0)
+            try:
+                image_size = read_size(image_file)
+            except struct.error:
+                image_size = None
+            if image_size is not None:
+                return image_size
+    if PILImage is not None:
+        try:
+            # this does NOT load the data into memory -> should be fast!
+            return PILImage.open(image_path).size
+        except IOError:
+            pass
+    return None
+
+
+class ImageSizeCache(object):
+    """
+    Persistent cache of image sizes. The entries are keyed by the image path
+    and validated by the file size and the modification time of the image.
+    """
+
+    def __init__(self, cache_file_name=None):
+        if cache_file_name is None or cache_file_name == '':
+            cache_file_name = ImageSizeCache.get_default_cache_file_name()
+        self.cache_file_name = cache_file_name
+        self.entries = {}
+        if os.path.isfile(self.cache_file_name):
+            try:
+                with open(self.cache_file_name, 'r') as cache_file:
+                    self.entries = json.load(cache_file)
+            except ValueError:
+                self.entries = {}
+
+    @staticmethod
+    def get_default_cache_file_name():
+        return os.path.join(tempfile.gettempdir(), 'nvm_import_export_image_sizes.json')
+
+    @staticmethod
+    def _get_signature(image_path):
+        stat_result = os.stat(image_path)
+        return [stat_result.st_size, stat_result.st_mtime]
+
+    def get(self, image_path, signature):
+        entry = self.entries.get(os.path.abspath(image_path))
+        if entry is None or entry[0:2] != signature:
+            return None
+        return tuple(entry[2:4])
+
+    def set(self, image_path, signature, image_size):
+        self.entries[os.path.abspath(image_path)] = list(signature) + list(image_size)
+
+    def save(self):
+        # Write to a temporary file first, so the cache is never left in an incomplete state
+        temp_file_name = self.cache_file_name + '.tmp'
+        try:
+            with open(temp_file_name, 'w') as cache_file:
+                json.dump(self.entries, cache_file)
+            os.replace(temp_file_name, self.cache_file_name)
+        except OSError:
+            pass
+
+
+def _probe_image_size(image_path, cache):
+    # Returns (image_size, signature), the signature is None if the image does not exist
+    try:
+        signature = ImageSizeCache._get_signature(image_path)
+    except OSError:
+        return None, None
+    if cache is not None:
+        image_size = cache.get(image_path, signature)
+        if image_size is not None:
+            return image_size, None
+    return read_image_size(image_path), signature
+
+
+def probe_image_sizes(image_paths, num_workers=8, cache=None):
+    """
+    Returns the (width, height) (or None) of each image. The images are probed
+    concurrently in a thread pool, sizes contained in the cache are not read again.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+        results = list(executor.map(lambda image_path: _probe_image_size(image_path, cache), image_paths))
+
+    image_sizes = []
+    cache_modified = False
+    for image_path, (image_size, signature) in zip(image_paths, results):
+        # Only newly read sizes have a signature
+        if cache is not None and image_size is not None and signature is not None:
+            cache.set(image_path, signature, image_size)
+            cache_modified = True
+        image_sizes.append(image_size)
+    if cache_modified:
+        cache.save()
+    return image_sizes
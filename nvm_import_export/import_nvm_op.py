@@ -2,11 +2,14 @@ import bpy
 import os
 from mathutils import Matrix, Vector
 import math
-from math import radians
-import time
-from nvm_import_export.stop_watch import StopWatch
-import numpy as np
-from nvm_import_export.point import Point
+from collections import namedtuple
+from nvm_import_export.metrics import ImportMetrics
+from nvm_import_export.principal_points import (initialize_principal_points, 
+                                                 principal_points_initialized, 
+                                                 set_principal_point_for_cameras)
+
+# NumPy, PIL and the parser modules are imported in the functions using them, 
+# i.e. they are not loaded before the first import (keeps the startup time of Blender low)
 
 def get_world_matrix_from_translation_vec(translation_vec, rotation):
     t = Vector(translation_vec).to_4d()
@@ -59,22 +62,111 @@ def add_empty(empty_name):
     bpy.context.scene.objects.link(empty_obj)
     return empty_obj
 
-def add_points_as_mesh(op, points, add_points_as_particle_system, mesh_type, point_extent):
-    op.report({'INFO'}, 'Adding Points: ...')
-    stop_watch = StopWatch()
-    name = "Point_Cloud"
-    mesh = bpy.data.meshes.new(name)
+def get_or_add_empty(empty_name, reuse_existing=False):
+    if reuse_existing and empty_name in bpy.context.scene.objects:
+        return bpy.context.scene.objects[empty_name]
+    return add_empty(empty_name)
+
+def get_or_add_group(group_name, reuse_existing=False):
+    if reuse_existing and group_name in bpy.data.groups:
+        return bpy.data.groups[group_name]
+    return bpy.data.groups.new(group_name)
+
+def set_object_properties(obj, object_properties):
+    for key, value in object_properties.items():
+        obj[key] = value
+
+def remove_object(obj):
+    bpy.data.objects.remove(obj, do_unlink=True)
+
+def remove_particle_point_cloud_object(obj):
+    """
+    Removes a point cloud object represented with a particle system (see add_point_cloud_object)
+    and the datablocks, which are not used anymore, i.e. the point cloud mesh, the particle settings, 
+    the object instanced by the particles (and its mesh), the material and the particle color image.
+    """
+    settings = obj.particle_systems[0].settings
+    dupli_object = settings.dupli_object
+    meshes = [obj.data]
+    materials = []
+    images = []
+    if dupli_object is not None:
+        meshes.append(dupli_object.data)
+        for material in dupli_object.data.materials:
+            if material is None:
+                continue
+            materials.append(material)
+            if material.node_tree is not None:
+                images.extend(node.image for node in material.node_tree.nodes 
+                              if node.type == 'TEX_IMAGE' and node.image is not None)
+    remove_object(obj)
+    if dupli_object is not None:
+        remove_object(dupli_object)
+    # The datablocks are removed in the order of their dependencies (i.e. the meshes use the 
+    # materials and the materials use the images)
+    for datablocks, collection in [([settings], bpy.data.particles), 
+                                   (meshes, bpy.data.meshes), 
+                                   (materials, bpy.data.materials), 
+                                   (images, bpy.data.images)]:
+        for datablock in datablocks:
+            if datablock.users == 0:
+                collection.remove(datablock)
+
+# The particle index is a (32 bit) float in the shader nodes, i.e. the index (and therefore
+# the pixel of the particle color texture) is only exact for up to 2^24 particles
+max_amount_particle_colors = 2 ** 24
+
+def compute_particle_color_pixels(colors):
+    """
+    Returns the width, the height and the (flat) RGBA pixels of a near square texture 
+    containing the colors (uint8) row by row. 
+    """
+    import numpy as np
+    num_points = len(colors)
+    tex_width = max(int(math.ceil(math.sqrt(num_points))), 1)
+    tex_height = max(int(math.ceil(num_points / float(tex_width))), 1)
+    pixels = np.ones((tex_width * tex_height, 4), dtype=np.float32)
+    # Order is R,G,B, opacity (0 = transparent, 1 = opaque)
+    pixels[:num_points, 0:3] = colors / 255.0
+    return tex_width, tex_height, pixels.ravel()
+
+def set_mesh_vertices(mesh, coords):
+    """
+    Adds the vertices to the mesh using a flat float32 array 
+    (considerably faster than mesh.from_pydata())
+    """
+    import numpy as np
+    mesh.vertices.add(len(coords))
+    mesh.vertices.foreach_set('co', np.ascontiguousarray(coords, dtype=np.float32).ravel())
     mesh.update()
     mesh.validate()
 
-    point_world_coordinates = [tuple(point.coord) for point in points]
+def create_point_cloud_mesh(name, point_world_coordinates, selected_vertices=None):
+    """
+    Creates a mesh with a vertex per point.
+    selected_vertices is an (optional) boolean mask of the selected vertices.
+    """
+    mesh = bpy.data.meshes.new(name)
+    set_mesh_vertices(mesh, point_world_coordinates)
+    if selected_vertices is not None:
+        mesh.vertices.foreach_set('select', selected_vertices.tolist())
+    return mesh
 
-    mesh.from_pydata(point_world_coordinates, [], [])
+def add_point_cloud_object(op, name, point_world_coordinates, point_colors, add_points_as_particle_system, 
+                           mesh_type, point_extent, metrics=None, selected_vertices=None):
+    """
+    Adds a single point cloud object with the provided coordinates and colors.
+    selected_vertices is an (optional) boolean mask of the selected vertices.
+    """
+    if metrics is None:
+        metrics = ImportMetrics()
+    mesh = create_point_cloud_mesh(name, point_world_coordinates, selected_vertices)
     meshobj = add_obj(mesh, name)
+    metrics.increment('objects_created')
 
     if add_points_as_particle_system or add_meshes_at_vertex_positions:
-        op.report({'INFO'}, 'Representing Points in the Point Cloud with Meshes: True')
-        op.report({'INFO'}, 'Mesh Type: ' + str(mesh_type))
+        metrics.log(op, 'Representing Points in the Point Cloud with Meshes: True')
+        metrics.log(op, 'Mesh Type: ' + str(mesh_type))
 
         # The default size of elements added with 
         #   primitive_cube_add, primitive_uv_sphere_add, etc. is (2,2,2)
@@ -117,38 +209,46 @@ def add_points_as_mesh(op, points, add_points_as_particle_system, mesh_type, poi
                 image_texture_node = node_tree.nodes.new("ShaderNodeTexImage")
             node_tree.links.new(image_texture_node.outputs['Color'], diffuse_node.inputs['Color'])
             
-            vis_image_height = 1
-            
-            # To view the texture we set the height of the texture to vis_image_height 
-            image = bpy.data.images.new('ParticleColor', len(point_world_coordinates), vis_image_height)
-            
-            # working on a copy of the pixels results in a MASSIVE performance speed
-            local_pixels = list(image.pixels[:])
-            
-            num_points = len(points)
-            
-            for j in range(vis_image_height):
-                for point_index, point in enumerate(points):
-                    column_offset = point_index * 4     # (R,G,B,A)
-                    row_offset = j * 4 * num_points
-                    color = point.color 
-                    # Order is R,G,B, opacity
-                    local_pixels[row_offset + column_offset] = color[0] / 255.0
-                    local_pixels[row_offset + column_offset + 1] = color[1] / 255.0
-                    local_pixels[row_offset + column_offset + 2] = color[2] / 255.0
-                    # opacity (0 = transparent, 1 = opaque)
-                    #local_pixels[row_offset + column_offset + 3] = 1.0    # already set by default   
-                
-            image.pixels = local_pixels[:]  
+            # The colors are stored in a (near) square texture, since the width 
+            # of a single texture row is limited
+            if len(point_colors) > max_amount_particle_colors:
+                op.report({'WARNING'}, 'The particle colors are only exact for up to ' + 
+                          str(max_amount_particle_colors) + ' points, particles with larger indices of ' + 
+                          name + ' may show the color of a neighboring point (in file order).')
+            tex_width, tex_height, pixels = compute_particle_color_pixels(point_colors)
+            image = bpy.data.images.new('ParticleColor', tex_width, tex_height)
+            if hasattr(image.pixels, 'foreach_set'):
+                image.pixels.foreach_set(pixels)
+            else:
+                image.pixels[:] = pixels
             
             image_texture_node.image = image
+            # Avoid blending the colors of neighboring particles
+            image_texture_node.interpolation = 'Closest'
             particle_info_node = node_tree.nodes.new('ShaderNodeParticleInfo')
-            divide_node = node_tree.nodes.new('ShaderNodeMath')
-            divide_node.operation = 'DIVIDE'
-            node_tree.links.new(particle_info_node.outputs['Index'], divide_node.inputs[0])
-            divide_node.inputs[1].default_value = num_points
+
+            # Map the particle index to the center of the corresponding pixel, i.e.
+            #   u = (index mod width + 0.5) / width
+            #   v = ((index - index mod width) / width + 0.5) / height
+            def add_math_node(operation, input_0, input_1):
+                math_node = node_tree.nodes.new('ShaderNodeMath')
+                math_node.operation = operation
+                for input_index, input_value in enumerate([input_0, input_1]):
+                    if isinstance(input_value, float):
+                        math_node.inputs[input_index].default_value = input_value
+                    else:
+                        node_tree.links.new(input_value, math_node.inputs[input_index])
+                return math_node.outputs['Value']
+
+            particle_index = particle_info_node.outputs['Index']
+            column = add_math_node('MODULO', particle_index, float(tex_width))
+            u = add_math_node('DIVIDE', add_math_node('ADD', column, 0.5), float(tex_width))
+            row = add_math_node('DIVIDE', add_math_node('SUBTRACT', particle_index, column), float(tex_width))
+            v = add_math_node('DIVIDE', add_math_node('ADD', row, 0.5), float(tex_height))
+
             shader_node_combine = node_tree.nodes.new('ShaderNodeCombineXYZ')
-            node_tree.links.new(divide_node.outputs['Value'], shader_node_combine.inputs['X'])
+            node_tree.links.new(u, shader_node_combine.inputs['X'])
+            node_tree.links.new(v, shader_node_combine.inputs['Y'])
             node_tree.links.new(shader_node_combine.outputs['Vector'], image_texture_node.inputs['Vector'])
             
             if len(meshobj.particle_systems) == 0:
@@ -167,11 +267,125 @@ def add_points_as_mesh(op, points, add_points_as_particle_system, mesh_type, poi
             
         bpy.context.scene.update
     else:
-        op.report({'INFO'}, 'Representing Points in the Point Cloud with Meshes: False')
-    op.report({'INFO'}, 'Duration: ' + str(stop_watch.get_elapsed_time()))
-    op.report({'INFO'}, 'Adding Points: Done')
+        metrics.log(op, 'Representing Points in the Point Cloud with Meshes: False')
+    return meshobj
+
+def add_points_as_mesh(op, points, add_points_as_particle_system, mesh_type, point_extent, 
+                       metrics=None, lod_voxel_sizes=None, 
+                       add_full_resolution_points=True, selected_points=None, object_properties=None, 
+                       parent=None):
+    """
+    points can be a list of Point objects, a PointCloud or an iterable of
+    PointCloud batches (see NVMFileHandler.iter_nvm_points)
+
+    selected_points is an (optional) boolean mask of the points, which are selected
+    in the mesh of the full resolution point cloud.
+    object_properties are custom properties stored in each point cloud object (see update_point_clouds).
+    parent is an (optional) object, which becomes the parent of the full resolution point cloud object.
+
+    For each voxel size in lod_voxel_sizes an additional level of detail (LOD) object is created,
+    which contains a single point per voxel. Only the coarsest level is visible.
+    If add_full_resolution_points is False, only the LOD objects are created 
+    (see LoadFullResolutionPoints).
+    Returns the parent of the LOD objects (or None, if no LOD objects are created).
+    """
+    from nvm_import_export.point_cloud import get_coords_and_colors, voxel_grid_downsample
+    if metrics is None:
+        metrics = ImportMetrics()
+    if object_properties is None:
+        object_properties = {}
+    metrics.log(op, 'Adding Points: ...')
+    metrics.begin_span('build_points')
+
+    # Batches are consumed incrementally, only coordinates and colors are kept
+    point_world_coordinates, point_colors = get_coords_and_colors(points)
+    metrics.log(op, 'Number points: ' + str(len(point_world_coordinates)))
+
+    lod_parent = None
+    if lod_voxel_sizes:
+        lod_parent = add_empty('Point_Cloud_LODs')
+        # The coarsest level (i.e. the largest voxel size) is the first level
+        for level, voxel_size in enumerate(sorted(lod_voxel_sizes, reverse=True)):
+            with metrics.span('voxel_grid_downsample'):
+                lod_coordinates, lod_colors = voxel_grid_downsample(
+                    point_world_coordinates, point_colors, voxel_size)
+            metrics.log(op, 'Number points of LOD ' + str(level) + ' (voxel size ' + str(voxel_size) + '): ' + 
+                        str(len(lod_coordinates)))
+            metrics.increment('lod_points_added', len(lod_coordinates))
+            lod_obj = add_point_cloud_object(
+                op, 
+                'Point_Cloud_LOD_' + str(level), 
+                lod_coordinates, 
+                lod_colors, 
+                add_points_as_particle_system, 
+                mesh_type, 
+                point_extent, 
+                metrics)
+            lod_obj['voxel_size'] = voxel_size
+            set_object_properties(lod_obj, object_properties)
+            set_object_parent(lod_obj, lod_parent, keep_transform=True)
+            lod_obj.hide = level > 0
+
+    if add_full_resolution_points or not lod_voxel_sizes:
+        metrics.increment('points_added', len(point_world_coordinates))
+        meshobj = add_point_cloud_object(
+            op, 
+            "Point_Cloud", 
+            point_world_coordinates, 
+            point_colors, 
+            add_points_as_particle_system, 
+            mesh_type, 
+            point_extent, 
+            metrics,
+            selected_vertices=selected_points)
+        set_object_properties(meshobj, object_properties)
+        if lod_parent is not None:
+            # Show the full resolution points only on request
+            meshobj.hide = True
+        if parent is not None:
+            set_object_parent(meshobj, parent, keep_transform=True)
+
+    duration = metrics.end_span()
+    metrics.log(op, 'Duration: ' + str(duration))
+    metrics.log(op, 'Adding Points: Done')
+    return lod_parent
+
+def compute_camera_lens(camera, focal_length):
+    """
+    Returns the field of view and the shift (w.r.t. the principal point) of the Blender camera
+    """
+    angle = math.atan(max(camera.width, camera.height) / (focal_length * 2.0)) * 2.0
+
+    # Adjust principal point
+    p_x, p_y = camera.get_principal_point()
+
+    # https://blender.stackexchange.com/questions/58235/what-are-the-units-for-camera-shift
+    # This is measured however in relation to the largest dimension of the rendered frame size. 
+    # So lets say you are rendering in Full HD, that is 1920 x 1080 pixel image; 
+    # a frame shift if 1 unit will shift exactly 1920 pixels in any direction, that is up/down/left/right.
+    max_extent = max(camera.width, camera.height)
+    shift_x = (camera.width / 2.0 - p_x) / float(max_extent)
+    shift_y = (camera.height / 2.0 - p_y) / float(max_extent)
+    return angle, shift_x, shift_y
+
+def create_camera_data(name, camera, focal_length):
+    """
+    Create a camera datablock with the field of view and the principal point of camera.
+    """
+    bcamera = bpy.data.cameras.new(name)
+    bcamera.angle, bcamera.shift_x, bcamera.shift_y = compute_camera_lens(camera, focal_length)
+    return bcamera
+
+def get_blender_camera_pose(camera):
+    """
+    Transform the camera coordinate system from computer vision camera coordinate frames to the computer
+    vision camera coordinate frames
+    That is, rotate the camera matrix around the x axis by 180 degree, i.e. invert the x and y axis
+    """
+    rotation_mat = invert_y_and_z_axis(camera.get_rotation_mat())
+    translation_vec = invert_y_and_z_axis(camera.get_translation_vec())
+    return rotation_mat, translation_vec
 
-    
 def add_cameras(op, 
                 cameras, 
                 path_to_images=None,
@@ -181,7 +395,15 @@ def add_cameras(op,
                 camera_group_name='Camera Group',
                 image_planes_parent='Image Planes',
                 image_plane_group_name='Image Plane Group',
-                camera_scale=1.0):
+                camera_scale=1.0,
+                share_camera_data=False,
+                share_image_plane_meshes=False,
+                image_plane_proxy_size=0,
+                image_plane_proxy_directory=None,
+                num_proxy_workers=1,
+                metrics=None,
+                reuse_parents=False,
+                object_properties=None):
 
     """
     ======== The images are currently only shown in BLENDER RENDER ========
@@ -194,26 +416,59 @@ def add_cameras(op,
     :param cameras_parent:
     :param camera_group_name:
     :param image_plane_group_name:
+    :param share_camera_data: Use a single camera datablock for cameras with identical intrinsics
+    :param share_image_plane_meshes: Use a single mesh for image planes of cameras with identical intrinsics
+    :param image_plane_proxy_size: If larger than 0, downsampled proxies (with this maximum edge length) 
+        are used as textures of the image planes
+    :param image_plane_proxy_directory:
+    :param num_proxy_workers:
+    :param metrics: ImportMetrics, which record the durations and the number of created objects
+    :param reuse_parents: Add the cameras and image planes to existing parent objects and groups
+        with the provided names (if they exist), e.g. to add cameras to a previous import
+    :param object_properties: Custom properties stored in each camera and image plane object
+        (additionally, the image file name is stored in nvm_image_file_name, see update_cameras)
     :return:
     """
-    op.report({'INFO'}, 'Adding Cameras: ...')
-    stop_watch = StopWatch()
-    cameras_parent = add_empty(cameras_parent)
+    from nvm_import_export.image_proxy import create_image_proxies
+    if metrics is None:
+        metrics = ImportMetrics()
+    metrics.log(op, 'Adding Cameras: ...')
+    metrics.begin_span('build_cameras')
+    if object_properties is None:
+        object_properties = {}
+    cameras_parent = get_or_add_empty(cameras_parent, reuse_parents)
     cameras_parent.hide = True
     cameras_parent.hide_render = True
-    camera_group = bpy.data.groups.new(camera_group_name)
+    camera_group = get_or_add_group(camera_group_name, reuse_parents)
+    # Maps the camera intrinsics to the corresponding camera datablock
+    camera_data_cache = {}
 
     if add_image_planes:
-        op.report({'INFO'}, 'Adding image planes: True')
-        image_planes_parent = add_empty(image_planes_parent)
-        image_planes_group = bpy.data.groups.new(image_plane_group_name)
+        metrics.log(op, 'Adding image planes: True')
+        image_planes_parent = get_or_add_empty(image_planes_parent, reuse_parents)
+        image_planes_group = get_or_add_group(image_plane_group_name, reuse_parents)
+        if share_image_plane_meshes:
+            # Maps the camera intrinsics to the corresponding image plane mesh
+            image_plane_mesh_cache = {}
+        else:
+            image_plane_mesh_cache = None
+        image_paths = [os.path.join(path_to_images, os.path.basename(camera.file_name)) for camera in cameras]
+        if image_plane_proxy_size > 0:
+            with metrics.span('create_image_proxies'):
+                image_to_texture_path = create_image_proxies(
+                    image_paths, 
+                    image_plane_proxy_size, 
+                    image_plane_proxy_directory, 
+                    num_proxy_workers, 
+                    op)
+        else:
+            image_to_texture_path = {image_path: image_path for image_path in image_paths}
     else:
-        op.report({'INFO'}, 'Adding image planes: False')
+        metrics.log(op, 'Adding image planes: False')
 
     # Adding cameras and image planes:
     for index, camera in enumerate(cameras):
 
-        start_time = stop_watch.get_elapsed_time()
         assert camera.width is not None and camera.height is not None
 
         # camera_name = "Camera %d" % index     # original code
@@ -222,40 +477,29 @@ def add_cameras(op,
         camera_name = image_file_name_stem + '_cam'
 
         focal_length = camera.get_focal_length()
-        op.report({'INFO'}, 'focal_length: ' + str(focal_length))
-        #op.report({'INFO'}, 'camera.get_calibration_mat(): ' + str(camera.get_calibration_mat()))
-        op.report({'INFO'}, 'width: ' + str(camera.width))
-        op.report({'INFO'}, 'height: ' + str(camera.height))
+        # Per camera messages are only reported with the highest verbosity
+        metrics.log(op, 'focal_length: ' + str(focal_length), level=2)
+        #metrics.log(op, 'camera.get_calibration_mat(): ' + str(camera.get_calibration_mat()), level=2)
+        metrics.log(op, 'width: ' + str(camera.width), level=2)
+        metrics.log(op, 'height: ' + str(camera.height), level=2)
 
         # Add camera:
-        bcamera = bpy.data.cameras.new(camera_name)
-        #  Adjust field of view
-        bcamera.angle = math.atan(max(camera.width, camera.height) / (focal_length * 2.0)) * 2.0
-
-        # Adjust principal point
-        p_x, p_y = camera.get_principal_point()
-        
-        op.report({'INFO'}, 'p_x: ' + str(p_x))
-        op.report({'INFO'}, 'p_y: ' + str(p_y))
-
-
-        # https://blender.stackexchange.com/questions/58235/what-are-the-units-for-camera-shift
-        # This is measured however in relation to the largest dimension of the rendered frame size. 
-        # So lets say you are rendering in Full HD, that is 1920 x 1080 pixel image; 
-        # a frame shift if 1 unit will shift exactly 1920 pixels in any direction, that is up/down/left/right.
-        max_extent = max(camera.width, camera.height)
-        bcamera.shift_x = (camera.width / 2.0 - p_x) / float(max_extent)
-        bcamera.shift_y = (camera.height / 2.0 - p_y) / float(max_extent)
+        if share_camera_data:
+            intrinsics_key = (camera.width, camera.height, tuple(camera.get_calibration_mat().flatten()))
+            if intrinsics_key not in camera_data_cache:
+                camera_data_cache[intrinsics_key] = create_camera_data(
+                    'camera_data_' + str(len(camera_data_cache)), camera, focal_length)
+            bcamera = camera_data_cache[intrinsics_key]
+        else:
+            bcamera = create_camera_data(camera_name, camera, focal_length)
 
         camera_object = add_obj(bcamera, camera_name)
+        set_object_properties(camera_object, object_properties)
+        camera_object['nvm_image_file_name'] = os.path.basename(camera.file_name)
+        metrics.increment('cameras_added')
+        metrics.increment('objects_created')
 
-        translation_vec = camera.get_translation_vec()
-        rotation_mat = camera.get_rotation_mat()
-        # Transform the camera coordinate system from computer vision camera coordinate frames to the computer
-        # vision camera coordinate frames
-        # That is, rotate the camera matrix around the x axis by 180 degree, i.e. invert the x and y axis
-        rotation_mat = invert_y_and_z_axis(rotation_mat)
-        translation_vec = invert_y_and_z_axis(translation_vec)
+        rotation_mat, translation_vec = get_blender_camera_pose(camera)
         camera_object.matrix_world = get_world_matrix_from_translation_vec(translation_vec, rotation_mat)
 
         camera_object.scale *= camera_scale
@@ -268,7 +512,8 @@ def add_cameras(op,
             
             if os.path.isfile(path_to_image):
                 
-                op.report({'INFO'}, 'Adding image plane for: ' + str(path_to_image))
+                metrics.log(op, 'Adding image plane for: ' + str(path_to_image), level=2)
+                metrics.begin_span('build_image_planes')
 
                 # Group image plane and camera:
                 camera_image_plane_pair = bpy.data.groups.new(
@@ -280,7 +525,7 @@ def add_cameras(op,
                 px, py = camera.get_principal_point()
 
                 # do not add image planes by default, this is slow !
-                bimage = bpy.data.images.load(path_to_image)
+                bimage = bpy.data.images.load(image_to_texture_path[path_to_image])
                 image_plane_obj = add_camera_image_plane(
                     rotation_mat, 
                     translation_vec, 
@@ -291,24 +536,29 @@ def add_cameras(op,
                     px=px,
                     py=py,
                     name=image_plane_name, 
-                    op=op)
+                    op=op,
+                    mesh_cache=image_plane_mesh_cache,
+                    metrics=metrics)
                 camera_image_plane_pair.objects.link(image_plane_obj)
+                set_object_properties(image_plane_obj, object_properties)
+                image_plane_obj['nvm_image_file_name'] = os.path.basename(camera.file_name)
 
                 set_object_parent(image_plane_obj, image_planes_parent, keep_transform=True)
                 image_planes_group.objects.link(image_plane_obj)
+                metrics.end_span()
+                metrics.increment('image_planes_added')
+                metrics.increment('objects_created')
 
-        end_time = stop_watch.get_elapsed_time()
-
-    op.report({'INFO'}, 'Duration: ' + str(stop_watch.get_elapsed_time()))
-    op.report({'INFO'}, 'Adding Cameras: Done')
+    if share_camera_data:
+        metrics.log(op, 'Number camera datablocks: ' + str(len(camera_data_cache)))
+    duration = metrics.end_span()
+    metrics.log(op, 'Duration: ' + str(duration))
+    metrics.log(op, 'Adding Cameras: Done')
 
-def add_camera_image_plane(rotation_mat, translation_vec, bimage, width, height, focal_length, px, py, name, op):
+def create_image_plane_mesh(name, width, height, focal_length, px, py, op, metrics=None):
     """
-    Create mesh for image plane
+    Create mesh for image plane. The geometry depends only on the intrinsics of the camera.
     """
-    op.report({'INFO'}, 'add_camera_image_plane: ...')
-    op.report({'INFO'}, 'name: ' + str(name))
-    bpy.context.scene.render.engine = 'CYCLES'
     mesh = bpy.data.meshes.new(name)
     mesh.update()
     mesh.validate()
@@ -325,8 +575,10 @@ def add_camera_image_plane(rotation_mat, translation_vec, bimage, width, height,
     relative_shift_x = float((width / 2.0 - px) / float(width))
     relative_shift_y = float((height / 2.0 - py) / float(height))
     
-    op.report({'INFO'}, 'relative_shift_x: ' + str(relative_shift_x))
-    op.report({'INFO'}, 'relative_shift_y:' + str(relative_shift_y))
+    if metrics is None:
+        metrics = ImportMetrics()
+    metrics.log(op, 'relative_shift_x: ' + str(relative_shift_x), level=2)
+    metrics.log(op, 'relative_shift_y:' + str(relative_shift_y), level=2)
 
     corners = ((-0.5, -0.5),
                (+0.5, -0.5),
@@ -334,11 +586,36 @@ def add_camera_image_plane(rotation_mat, translation_vec, bimage, width, height,
                (-0.5, +0.5))
     points = [(plane_center + (c[0] + relative_shift_x) * right + (c[1] + relative_shift_y) * up)[0:3] for c in corners]
     mesh.from_pydata(points, [], [[0, 1, 2, 3]])
-    
-    # Assign image to face of image plane:
-    uvmap = mesh.uv_textures.new()
-    face = uvmap.data[0]
-    face.image = bimage
+    mesh.uv_textures.new()
+    return mesh
+
+def add_camera_image_plane(rotation_mat, translation_vec, bimage, width, height, focal_length, px, py, name, op, 
+                           mesh_cache=None, metrics=None):
+    """
+    Create an object for image plane.
+
+    If a mesh_cache (dict) is provided, cameras with identical intrinsics share a single mesh 
+    datablock. In this case the image is assigned only via an object linked material 
+    (i.e. the image is not assigned to the face of the uv map). 
+    """
+    if metrics is None:
+        metrics = ImportMetrics()
+    metrics.log(op, 'add_camera_image_plane: ...', level=2)
+    metrics.log(op, 'name: ' + str(name), level=2)
+    bpy.context.scene.render.engine = 'CYCLES'
+
+    if mesh_cache is None:
+        mesh = create_image_plane_mesh(name, width, height, focal_length, px, py, op, metrics)
+        # Assign image to face of image plane:
+        uvmap = mesh.uv_textures[0]
+        face = uvmap.data[0]
+        face.image = bimage
+    else:
+        intrinsics_key = (width, height, float(focal_length), float(px), float(py))
+        if intrinsics_key not in mesh_cache:
+            mesh_cache[intrinsics_key] = create_image_plane_mesh(
+                'image_plane_mesh', width, height, focal_length, px, py, op, metrics)
+        mesh = mesh_cache[intrinsics_key]
 
     # Add mesh to new image plane object:
     mesh_obj = add_obj(mesh, name)
@@ -363,40 +640,238 @@ def add_camera_image_plane(rotation_mat, translation_vec, bimage, width, height,
     shader_node_tex_image.image = bimage
     
     # Assign it to object
-    if mesh_obj.data.materials:
-        # assign to 1st material slot
-        mesh_obj.data.materials[0] = image_plane_material
+    if mesh_cache is None:
+        if mesh_obj.data.materials:
+            # assign to 1st material slot
+            mesh_obj.data.materials[0] = image_plane_material
+        else:
+            # no slots
+            mesh_obj.data.materials.append(image_plane_material)
     else:
-        # no slots
-        mesh_obj.data.materials.append(image_plane_material)
+        # The mesh is shared, i.e. the material must be linked to the object
+        if not mesh.materials:
+            mesh.materials.append(None)
+        mesh_obj.material_slots[0].link = 'OBJECT'
+        mesh_obj.material_slots[0].material = image_plane_material
     
     world_matrix = get_world_matrix_from_translation_vec(translation_vec, rotation_mat)
     mesh_obj.matrix_world = world_matrix
     mesh.update()
     mesh.validate()
-    op.report({'INFO'}, 'add_camera_image_plane: Done')
+    metrics.log(op, 'add_camera_image_plane: Done', level=2)
     return mesh_obj
 
-def set_principal_point_for_cameras(cameras, default_pp_x, default_pp_y, op):
-    
-    if not math.isnan(default_pp_x) and not math.isnan(default_pp_y):
-        op.report({'WARNING'}, 'Setting principal points to default values!')
+def is_pose_close(matrix_1, matrix_2, tolerance=1e-6):
+    # The scale is ignored
+    translation_difference = (matrix_1.to_translation() - matrix_2.to_translation()).length
+    rotation_difference = matrix_1.to_quaternion().rotation_difference(matrix_2.to_quaternion()).angle
+    return translation_difference <= tolerance and rotation_difference <= tolerance
+
+def replace_image_plane_mesh(image_plane_obj, camera, focal_length, op, metrics):
+    """
+    Replaces the mesh of the image plane (the geometry depends on the intrinsics of the camera).
+    The material (and the image) of the image plane is kept.
+    """
+    old_mesh = image_plane_obj.data
+    px, py = camera.get_principal_point()
+    mesh = create_image_plane_mesh(
+        image_plane_obj.name, camera.width, camera.height, focal_length, px, py, op, metrics)
+    if len(image_plane_obj.material_slots) > 0 and image_plane_obj.material_slots[0].link == 'OBJECT':
+        # The material is linked to the object (see add_camera_image_plane)
+        material = image_plane_obj.material_slots[0].material
+        image_plane_obj.data = mesh
+        mesh.materials.append(None)
+        image_plane_obj.material_slots[0].link = 'OBJECT'
+        image_plane_obj.material_slots[0].material = material
     else:
-        op.report({'WARNING'}, 'Setting principal points to image centers!')
-        default_pp_x = cameras[0].width / 2.0
-        default_pp_y = cameras[0].height / 2.0
-    
-    for camera in cameras:
-        if not camera.is_principal_point_initialized():
-            camera.set_principal_point([default_pp_x, default_pp_y])
+        for material in old_mesh.materials:
+            mesh.materials.append(material)
+        mesh.uv_textures[0].data[0].image = old_mesh.uv_textures[0].data[0].image
+        image_plane_obj.data = mesh
+    if old_mesh.users == 0:
+        bpy.data.meshes.remove(old_mesh)
+
+def update_cameras(op, cameras, source_file, model_index, path_to_images=None, add_image_planes=False, 
+                   camera_scale=1.0, metrics=None, **add_cameras_kwargs):
+    """
+    Updates the cameras of a previous import of the model of source_file in place. Existing 
+    camera and image plane objects are matched by their source file, their model index and 
+    their image file name (see add_cameras), i.e. cameras of other files or models are not changed. 
+    Only the pose (matrix_world) and the lens of changed cameras are updated, missing cameras are 
+    added and cameras of the model, which are not contained in cameras anymore, are removed.
+    The remaining keyword arguments are passed to add_cameras.
+    """
+    if metrics is None:
+        metrics = ImportMetrics()
+    metrics.log(op, 'Updating Cameras: ...')
+    metrics.begin_span('update_cameras')
+    existing_camera_objects = {}
+    existing_image_plane_objects = {}
+    for obj in bpy.context.scene.objects:
+        if (obj.get('nvm_source_file') != source_file or obj.get('nvm_model_index') != model_index or 
+                'nvm_image_file_name' not in obj):
+            continue
+        if obj.type == 'CAMERA':
+            existing_camera_objects[obj['nvm_image_file_name']] = obj
+        else:
+            existing_image_plane_objects[obj['nvm_image_file_name']] = obj
 
-def principal_points_initialized(cameras):
-    principal_points_initialized = True
+    added_cameras = []
+    image_file_names = set()
     for camera in cameras:
-        if not camera.is_principal_point_initialized():
-            principal_points_initialized = False
-            break
-    return principal_points_initialized
+        image_file_name = os.path.basename(camera.file_name)
+        image_file_names.add(image_file_name)
+        camera_object = existing_camera_objects.get(image_file_name)
+        if camera_object is None:
+            added_cameras.append(camera)
+            continue
+        image_plane_obj = existing_image_plane_objects.get(image_file_name)
+        updated = False
+
+        rotation_mat, translation_vec = get_blender_camera_pose(camera)
+        world_matrix = get_world_matrix_from_translation_vec(translation_vec, rotation_mat)
+        if not is_pose_close(camera_object.matrix_world, world_matrix):
+            # Keep the scale of the camera (which may have been adjusted after importing)
+            scale = camera_object.scale.copy()
+            camera_object.matrix_world = world_matrix
+            camera_object.scale = scale
+            if image_plane_obj is not None:
+                image_plane_obj.matrix_world = world_matrix
+            updated = True
+
+        focal_length = camera.get_focal_length()
+        lens = compute_camera_lens(camera, focal_length)
+        bcamera = camera_object.data
+        if any(abs(value - current) > 1e-9 for value, current in zip(
+                lens, (bcamera.angle, bcamera.shift_x, bcamera.shift_y))):
+            if bcamera.users > 1:
+                # Do not modify camera data shared with cameras, whose lens did not change
+                camera_object.data = create_camera_data(camera_object.name, camera, focal_length)
+            else:
+                bcamera.angle, bcamera.shift_x, bcamera.shift_y = lens
+            if image_plane_obj is not None:
+                replace_image_plane_mesh(image_plane_obj, camera, focal_length, op, metrics)
+            updated = True
+        metrics.increment('cameras_updated' if updated else 'cameras_unchanged')
+        metrics.log(op, 'Camera ' + camera_object.name + ' updated: ' + str(updated), level=2)
+
+    for image_file_name, camera_object in existing_camera_objects.items():
+        if image_file_name in image_file_names:
+            continue
+        image_plane_obj = existing_image_plane_objects.get(image_file_name)
+        if image_plane_obj is not None:
+            remove_object(image_plane_obj)
+        remove_object(camera_object)
+        metrics.increment('cameras_removed')
+    metrics.end_span()
+
+    if len(added_cameras) > 0:
+        add_cameras(
+            op, 
+            added_cameras, 
+            path_to_images=path_to_images, 
+            add_image_planes=add_image_planes, 
+            camera_scale=camera_scale, 
+            metrics=metrics, 
+            reuse_parents=True, 
+            object_properties={'nvm_source_file': source_file, 'nvm_model_index': model_index},
+            **add_cameras_kwargs)
+    metrics.log(op, 'Updating Cameras: Done')
+
+def update_point_clouds(op, points, source_file, model_index, add_points_as_particle_system, mesh_type, 
+                        point_extent, metrics=None, selected_points=None):
+    """
+    Replaces the points of the point cloud objects (including the LOD objects) of a previous import 
+    of the model of source_file. Returns False, if there is no such point cloud object.
+    Image planes (i.e. meshes with an image file name, see add_cameras) are ignored.
+    The meshes are replaced in place. Point clouds represented with particle systems are
+    re-created, since the particle color texture depends on the number of points.
+    """
+    from nvm_import_export.point_cloud import get_coords_and_colors, voxel_grid_downsample
+    if metrics is None:
+        metrics = ImportMetrics()
+    point_cloud_objects = [
+        obj for obj in bpy.context.scene.objects 
+        if obj.type == 'MESH' and obj.get('nvm_source_file') == source_file and 
+        obj.get('nvm_model_index') == model_index and 'nvm_image_file_name' not in obj]
+    if len(point_cloud_objects) == 0:
+        return False
+
+    metrics.log(op, 'Updating Points: ...')
+    metrics.begin_span('update_points')
+    point_world_coordinates, point_colors = get_coords_and_colors(points)
+    for obj in point_cloud_objects:
+        if 'voxel_size' in obj:
+            with metrics.span('voxel_grid_downsample'):
+                coords, colors = voxel_grid_downsample(point_world_coordinates, point_colors, obj['voxel_size'])
+            selected_vertices = None
+        else:
+            coords, colors = point_world_coordinates, point_colors
+            selected_vertices = selected_points
+
+        if len(obj.particle_systems) > 0:
+            object_properties = {key: obj[key] for key in obj.keys() if not key.startswith('_')}
+            parent, hide, name = obj.parent, obj.hide, obj.name
+            remove_particle_point_cloud_object(obj)
+            new_obj = add_point_cloud_object(
+                op, name, coords, colors, add_points_as_particle_system, mesh_type, point_extent, 
+                metrics, selected_vertices)
+            set_object_properties(new_obj, object_properties)
+            if parent is not None:
+                set_object_parent(new_obj, parent, keep_transform=True)
+            new_obj.hide = hide
+        else:
+            old_mesh = obj.data
+            obj.data = create_point_cloud_mesh(old_mesh.name, coords, selected_vertices)
+            if old_mesh.users == 0:
+                bpy.data.meshes.remove(old_mesh)
+        metrics.increment('points_updated', len(coords))
+    duration = metrics.end_span()
+    metrics.log(op, 'Duration: ' + str(duration))
+    metrics.log(op, 'Updating Points: Done')
+    return True
+
+def parse_model_indices(model_indices_str):
+    """
+    Returns the indices in model_indices_str or None, if all models should be imported.
+    If no index is provided, only the first model is imported.
+    """
+    if model_indices_str.strip().lower() == 'all':
+        return None
+    model_indices = [int(model_index) for model_index in model_indices_str.split(',') if model_index.strip() != '']
+    if len(model_indices) == 0:
+        model_indices = [0]
+    return model_indices
+
+def parse_camera_indices(camera_references_str, cameras, op):
+    """
+    Returns the indices of the cameras in camera_references_str. A camera is referenced
+    by its index or by the name of its image (with or without extension), e.g. '0, 3, IMG_0042'
+    """
+    image_name_to_index = {}
+    for index, camera in enumerate(cameras):
+        image_name = os.path.basename(camera.file_name)
+        image_name_to_index[image_name] = index
+        image_name_to_index[os.path.splitext(image_name)[0]] = index
+    camera_indices = []
+    for camera_reference in camera_references_str.split(','):
+        camera_reference = camera_reference.strip()
+        if camera_reference == '':
+            continue
+        if camera_reference in image_name_to_index:
+            camera_indices.append(image_name_to_index[camera_reference])
+        elif camera_reference.isdigit() and int(camera_reference) < len(cameras):
+            camera_indices.append(int(camera_reference))
+        else:
+            op.report({'WARNING'}, 'Camera not found: ' + camera_reference)
+    return camera_indices
+
+def parse_voxel_sizes(voxel_sizes_str):
+    """
+    Returns the (positive) voxel sizes in voxel_sizes_str, e.g. '0.5, 0.1'
+    """
+    voxel_sizes = [float(voxel_size) for voxel_size in voxel_sizes_str.split(',') if voxel_size.strip() != '']
+    return [voxel_size for voxel_size in voxel_sizes if voxel_size > 0]
 
 def adjust_render_settings_if_possible(op, cameras):
     
@@ -412,6 +887,155 @@ def adjust_render_settings_if_possible(op, cameras):
         bpy.context.scene.render.resolution_y = height
     
 
+# The import options used by filter_points. They are stored in the LOD parent (see ImportNVM),
+# i.e. the full resolution points are filtered like the points of the LOD objects.
+PointFilterOptions = namedtuple('PointFilterOptions', [
+    'min_track_length', 
+    'max_mean_reprojection_error', 
+    'remove_outliers', 
+    'outlier_neighbors', 
+    'outlier_std_ratio', 
+    'observing_cameras', 
+    'observed_points_mode', 
+    'path_to_images', 
+    'default_width', 
+    'default_height', 
+    'default_pp_x', 
+    'default_pp_y', 
+    'use_image_size_cache', 
+    'num_image_probe_workers'])
+
+def initialize_principal_points_from_options(op, cameras, options, metrics):
+    """
+    Returns True, if the principal points of the cameras are initialized, which is required
+    to compute the reprojection errors of files with absolute measurement coordinates.
+    If the cameras are not imported, the principal points are set to the default values
+    or to the image centers (i.e. the image sizes are read).
+    """
+    from nvm_import_export.image_size import ImageSizeCache
+    image_size_cache = ImageSizeCache() if options.use_image_size_cache else None
+    if not initialize_principal_points(
+            op, cameras, options.path_to_images, options.default_pp_x, options.default_pp_y, 
+            options.default_width, options.default_height, options.num_image_probe_workers, 
+            image_size_cache, metrics):
+        op.report({'ERROR'}, 'The reprojection errors require the principal points of the cameras ' +
+                  '(i.e. the image sizes or the default principal point). ' + 
+                  'Skipping the reprojection errors.')
+        return False
+    return True
+
+def remove_unreliable_points(op, points, cameras, min_track_length, metrics, max_mean_reprojection_error=None):
+    """
+    Removes the points with less than min_track_length measurements and (if 
+    max_mean_reprojection_error is not None) with larger mean reprojection errors.
+    """
+    from nvm_import_export.point_cloud import PointCloud
+    if not isinstance(points, PointCloud):
+        # The reliability of a point depends only on its own measurements, i.e. the streamed
+        # batches are filtered one by one (the memory consumption remains bounded)
+        return _iter_reliable_point_batches(op, points, cameras, min_track_length, metrics, max_mean_reprojection_error)
+    metrics.log(op, 'Removing unreliable points: ...')
+    points, amount_removed = _remove_unreliable_points_of_batch(
+        op, points, cameras, min_track_length, metrics, max_mean_reprojection_error)
+    metrics.log(op, 'Number removed unreliable points: ' + str(amount_removed))
+    return points
+
+def _iter_reliable_point_batches(op, point_batches, cameras, min_track_length, metrics, max_mean_reprojection_error):
+    metrics.log(op, 'Removing unreliable points (batch by batch): ...')
+    absolute_measurements = None
+    total_amount_removed = 0
+    for point_batch in point_batches:
+        if (max_mean_reprojection_error is not None and absolute_measurements is None and
+                point_batch.get_num_measurements() > 0):
+            # The coordinate convention of the measurements is determined with the first batch
+            absolute_measurements = _detect_absolute_measurements(op, point_batch, cameras, metrics)
+        point_batch, amount_removed = _remove_unreliable_points_of_batch(
+            op, point_batch, cameras, min_track_length, metrics, max_mean_reprojection_error, absolute_measurements)
+        total_amount_removed += amount_removed
+        yield point_batch
+    metrics.log(op, 'Number removed unreliable points: ' + str(total_amount_removed))
+
+def _detect_absolute_measurements(op, points, cameras, metrics):
+    from nvm_import_export.reprojection import detect_absolute_measurements
+    absolute_measurements = detect_absolute_measurements(cameras, points)
+    metrics.log(op, 'Absolute measurement coordinates: ' + str(absolute_measurements))
+    return absolute_measurements
+
+def _remove_unreliable_points_of_batch(op, points, cameras, min_track_length, metrics, max_mean_reprojection_error,
+                                       absolute_measurements=None):
+    from nvm_import_export.point_filter import compute_reliable_point_mask
+    with metrics.span('remove_unreliable_points'):
+        if max_mean_reprojection_error is None:
+            absolute_measurements = False
+        elif absolute_measurements is None:
+            absolute_measurements = _detect_absolute_measurements(op, points, cameras, metrics)
+        reliable = compute_reliable_point_mask(
+            cameras, points, min_track_length, max_mean_reprojection_error, absolute_measurements)
+        amount_removed = len(points) - int(reliable.sum())
+        if amount_removed > 0:
+            points = points.select(reliable)
+    metrics.increment('unreliable_points_removed', amount_removed)
+    return points, amount_removed
+
+def remove_outlier_points(op, points, amount_neighbors, std_ratio, metrics):
+    from nvm_import_export.point_cloud import PointCloud
+    from nvm_import_export.point_filter import remove_statistical_outliers
+    if not isinstance(points, PointCloud):
+        # The outliers depend on all points, i.e. the streamed batches are collected
+        points = PointCloud.concatenate(points)
+    metrics.log(op, 'Removing outliers: ...')
+    with metrics.span('remove_outliers'):
+        points, amount_removed = remove_statistical_outliers(points, amount_neighbors, std_ratio)
+    metrics.increment('outliers_removed', amount_removed)
+    metrics.log(op, 'Number removed outliers: ' + str(amount_removed))
+    return points
+
+def get_observed_points(op, points, cameras, observing_cameras, observed_points_mode, metrics):
+    """
+    Returns the points (all points or only the observed points, see ImportNVM.observed_points_mode)
+    and the boolean mask of the points to select (or None).
+    """
+    import numpy as np
+    from nvm_import_export.nvm_file_handler import NVMFileHandler
+    from nvm_import_export.point_cloud import PointCloud
+    if not isinstance(points, PointCloud):
+        # The visibility index requires the measurements of all points
+        points = PointCloud.concatenate(points)
+    camera_indices = parse_camera_indices(observing_cameras, cameras, op)
+    visibility_index = NVMFileHandler.compute_visibility_index(cameras, points, metrics)
+    observed_point_indices = visibility_index.get_points_observed_by_cameras(camera_indices)
+    metrics.increment('observed_points', len(observed_point_indices))
+    metrics.log(op, 'Number points observed by the cameras ' + str(camera_indices) + ': ' + 
+                str(len(observed_point_indices)))
+    if observed_points_mode == 'EXTRACT':
+        return points.select(observed_point_indices), None
+    selected_points = np.zeros(len(points), dtype=bool)
+    selected_points[observed_point_indices] = True
+    return points, selected_points
+
+def filter_points(op, points, cameras, options, metrics, use_reprojection_errors=True):
+    """
+    Applies the point filters selected in the (PointFilterOptions) options, i.e. removes
+    unreliable points and outliers and selects or extracts the points observed by the 
+    observing cameras. If use_reprojection_errors is False, the reprojection error filter 
+    is skipped (e.g. if the principal points are not available).
+    Returns the points and the boolean mask of the points to select (or None).
+    """
+    max_mean_reprojection_error = None
+    if (use_reprojection_errors and options.max_mean_reprojection_error > 0 and 
+            initialize_principal_points_from_options(op, cameras, options, metrics)):
+        max_mean_reprojection_error = options.max_mean_reprojection_error
+    if options.min_track_length > 0 or max_mean_reprojection_error is not None:
+        points = remove_unreliable_points(
+            op, points, cameras, options.min_track_length, metrics, max_mean_reprojection_error)
+    if options.remove_outliers:
+        points = remove_outlier_points(op, points, options.outlier_neighbors, options.outlier_std_ratio, metrics)
+    selected_points = None
+    if options.observing_cameras.strip() != '':
+        points, selected_points = get_observed_points(
+            op, points, cameras, options.observing_cameras, options.observed_points_mode, metrics)
+    return points, selected_points
+
 
 from bpy.props import (CollectionProperty,
                        StringProperty,
@@ -464,6 +1088,16 @@ class ImportNVM(bpy.types.Operator, ImportHelper):
         description = "Principal Point Y Component, which will be used if not contained in the NVM file. " + \
                       "If no value is provided, the principal point is set to the image center.", 
         default=float('nan'))
+    num_image_probe_workers = IntProperty(
+        name="Image Size Workers",
+        description = "Number of threads used to read the image sizes.",
+        default=8,
+        min=1)
+    use_image_size_cache = BoolProperty(
+        name="Use Image Size Cache",
+        description = "Store the image sizes in a persistent cache, " +
+                      "so subsequent imports do not need to read the images again.",
+        default=True)
     add_image_planes = BoolProperty(
         name="Add an Image Plane for each Camera",
         description = "Add an Image Plane for each Camera", 
@@ -474,6 +1108,27 @@ class ImportNVM(bpy.types.Operator, ImportHelper):
         default="",
         # Can not use subtype='DIR_PATH' while importing another file (i.e. .nvm)
         )
+    share_image_plane_meshes = BoolProperty(
+        name="Share Image Plane Meshes",
+        description = "Use a single mesh for the image planes of cameras with identical intrinsics " +
+                      "(the images are only visible with Cycles materials).",
+        default=True)
+    image_plane_proxy_size = IntProperty(
+        name="Image Plane Proxy Size",
+        description = "If larger than 0, downsampled copies of the images (with this maximum edge length in pixels) " +
+                      "are used as image plane textures. Requires PIL/PILLOW.",
+        default=0,
+        min=0)
+    image_plane_proxy_directory = StringProperty(
+        name="Image Plane Proxy Directory",
+        description = "Directory of the image plane proxies. If no path is provided, a directory in the " +
+                      "temporary directory of the system is used.",
+        default="")
+    num_proxy_workers = IntProperty(
+        name="Proxy Workers",
+        description = "Number of processes used to create the image plane proxies.",
+        default=4,
+        min=1)
     adjust_render_settings = BoolProperty(
         name="Adjust Render Settings",
         description = "Adjust the render settings according to the corresponding images. "  +
@@ -484,6 +1139,12 @@ class ImportNVM(bpy.types.Operator, ImportHelper):
         name="Initial Camera Extent (in Blender Units)", 
         description = "Initial Camera Extent (Visualization)",
         default=1)
+    share_camera_data = BoolProperty(
+        name="Share Camera Data",
+        description = "Use a single camera datablock for all cameras with identical intrinsics " +
+                      "(i.e. identical image size and calibration matrix). " +
+                      "Changing the lens settings of one camera affects all cameras of the same group.",
+        default=False)
 
     import_points = BoolProperty(
         name="Import Points",
@@ -491,7 +1152,9 @@ class ImportNVM(bpy.types.Operator, ImportHelper):
         default=True)
     add_points_as_particle_system = BoolProperty(
         name="Add Points as Particle System",
-        description="Use a particle system to represent vertex positions with objects",
+        description="Use a particle system to represent vertex positions with objects. " +
+                    "The colors of the particles are exact for up to 16777216 (2^24) points, since " +
+                    "the particle index is a float in the shader nodes.",
         default=True)
     mesh_items = [
         ("CUBE", "Cube", "", 1),
@@ -506,6 +1169,157 @@ class ImportNVM(bpy.types.Operator, ImportHelper):
         name="Initial Point Extent (in Blender Units)", 
         description = "Initial Point Extent for meshes at vertex positions",
         default=0.01)
+    lod_voxel_sizes = StringProperty(
+        name="LOD Voxel Sizes",
+        description = "Comma separated voxel sizes (e.g. '0.5, 0.1'). For each voxel size a downsampled " + 
+                      "point cloud (level of detail) with a single point per voxel is added. " +
+                      "Only the coarsest level is visible.",
+        default="")
+    add_full_resolution_points = BoolProperty(
+        name="Add Full Resolution Points",
+        description = "Add the point cloud with all points, if LOD voxel sizes are provided (without LOD voxel " +
+                      "sizes the full resolution points are always added). If disabled, the full resolution " +
+                      "points can be added later with 'Object > Load Full Resolution Points' " +
+                      "(select the corresponding LOD object).",
+        default=False)
+    report_reprojection_errors = BoolProperty(
+        name="Report Reprojection Errors",
+        description = "Report the reprojection errors of the imported points (overall and per camera). " +
+                      "Requires the principal points, i.e. the image sizes (if the cameras are not imported, " +
+                      "the image sizes are read) or the default principal point. " +
+                      "If the points are streamed, all batches are collected for the report.",
+        default=False)
+    reprojection_report_file = StringProperty(
+        name="Reprojection Report File",
+        description = "If a path is provided, the reprojection errors per camera are written to this " +
+                      "JSON file (and the errors per point to a NPZ file with the same name).",
+        default="")
+    min_track_length = IntProperty(
+        name="Minimum Track Length",
+        description = "Remove points observed by less than this number of cameras. " +
+                      "0 disables the filter (NVM files without measurements contain only points " +
+                      "with a track length of 0). Streamed points are filtered batch by batch.",
+        default=0,
+        min=0)
+    max_mean_reprojection_error = FloatProperty(
+        name="Maximum Mean Reprojection Error",
+        description = "Remove points, whose mean reprojection error (in pixels) exceeds this value. " +
+                      "0 disables the filter. The radial distortion is not considered.",
+        default=0.0,
+        min=0.0)
+    remove_outliers = BoolProperty(
+        name="Remove Outliers",
+        description = "Remove points, whose mean distance to their nearest neighbors is larger than " +
+                      "the mean of all points by more than the outlier standard deviation ratio. " +
+                      "If the points are streamed, all batches are collected before the removal.",
+        default=False)
+    outlier_neighbors = IntProperty(
+        name="Outlier Neighbors",
+        description = "Number of nearest neighbors used to compute the mean distance of a point.",
+        default=8,
+        min=1)
+    outlier_std_ratio = FloatProperty(
+        name="Outlier Standard Deviation Ratio",
+        description = "Points are removed, if their mean neighbor distance exceeds the mean " +
+                      "by more than this multiple of the standard deviation.",
+        default=2.0,
+        min=0.0)
+    observing_cameras = StringProperty(
+        name="Observing Cameras",
+        description = "Comma separated indices or image names of cameras (e.g. '0, 3, IMG_0042'). " +
+                      "If provided, the points observed by these cameras are selected or extracted " +
+                      "(see Observed Points).",
+        default="")
+    observed_points_items = [
+        ("SELECT", "Select", "Add all points and select the points observed by the cameras " +
+                             "(in the full resolution point cloud)", 1),
+        ("EXTRACT", "Extract", "Add only the points observed by the cameras", 2)
+        ]
+    observed_points_mode = EnumProperty(
+        name="Observed Points",
+        description = "Handling of the points observed by the observing cameras.",
+        items=observed_points_items,
+        default="SELECT")
+    stream_points = BoolProperty(
+        name="Stream Points",
+        description = "Read the points in batches. " +
+                      "This limits the memory required to parse large NVM files.",
+        default=False)
+    point_batch_size = IntProperty(
+        name="Point Batch Size",
+        description = "Number of points read at once, if the points are streamed.",
+        default=1000000,
+        min=1)
+    num_parse_workers = IntProperty(
+        name="Parse Workers",
+        description = "Number of processes used to parse the points section. " +
+                      "Values larger than 1 parse the points in parallel (ignored if the points are streamed).",
+        default=1,
+        min=1)
+    use_parse_cache = BoolProperty(
+        name="Use Parse Cache",
+        description = "Store the parsed NVM file in a binary cache, which speeds up subsequent imports " +
+                      "of the same file (not used if the points are streamed).",
+        default=False)
+    parse_cache_directory = StringProperty(
+        name="Parse Cache Directory",
+        description = "Directory of the parse cache. If no path is provided, a directory in the " +
+                      "temporary directory of the system is used.",
+        default="")
+    parse_cache_size_limit = IntProperty(
+        name="Parse Cache Size Limit (in MB)",
+        description = "The least recently used cache entries are removed, if the cache exceeds this size.",
+        default=4096,
+        min=0)
+    parse_cache_use_content_hash = BoolProperty(
+        name="Validate Parse Cache with Content Hash",
+        description = "Validate cache entries additionally with a hash of the file content " +
+                      "(slower than validating size and modification time only).",
+        default=False)
+    rebuild_parse_cache = BoolProperty(
+        name="Rebuild Parse Cache",
+        description = "Invalidate the cache entries of the imported file(s).",
+        default=False)
+    num_file_parse_workers = IntProperty(
+        name="File Parse Workers",
+        description = "Number of processes used to parse multiple selected files concurrently. " +
+                      "The objects of each file are added as soon as the file is parsed, while the " +
+                      "remaining files are parsed (ignored if the points are streamed).",
+        default=1,
+        min=1)
+    model_indices = StringProperty(
+        name="Models",
+        description = "Comma separated indices of the models in the NVM file, which will be imported " +
+                      "(e.g. '0, 3, 37'). Use 'all' to import all models.",
+        default="0")
+    verbosity = IntProperty(
+        name="Verbosity",
+        description = "0: Report only a summary of the import. 1: Report the import steps. " +
+                      "2: Report each camera (slow for large imports).",
+        default=0,
+        min=0,
+        max=2)
+    metrics_file = StringProperty(
+        name="Metrics File",
+        description = "If a path is provided, the durations and counters of the import are written " +
+                      "to this JSON file.",
+        default="")
+    update_existing = BoolProperty(
+        name="Update Existing Objects",
+        description = "Update the objects of a previous import of the same file in place, i.e. " +
+                      "update the pose and the lens of changed cameras (matched by file, model and image name), " +
+                      "add and remove cameras and replace the points of the point cloud objects.",
+        default=False)
+    watch_file = BoolProperty(
+        name="Watch File",
+        description = "Update the imported objects (see Update Existing Objects), whenever the " +
+                      "modification time of the file changes (press ESC to stop watching).",
+        default=False)
+    watch_interval = FloatProperty(
+        name="Watch Interval (in Seconds)",
+        description = "Time between two checks of the modification time.",
+        default=1.0,
+        min=0.1)
 
 
     filename_ext = ".nvm"
@@ -517,56 +1331,331 @@ class ImportNVM(bpy.types.Operator, ImportHelper):
         if not paths:
             paths.append(self.filepath)
             
-        self.report({'INFO'}, 'paths: ' + str(paths))
+        metrics = ImportMetrics(self.verbosity)
+        metrics.log(self, 'paths: ' + str(paths))
+        # The modification times are determined before parsing, i.e. changes during the import are detected
+        self._modification_times = {path: os.path.getmtime(path) for path in paths if os.path.isfile(path)}
+        self.import_files(paths, metrics, self.update_existing)
+        self.report_metrics(metrics)
+
+        if self.watch_file:
+            window_manager = context.window_manager
+            self._timer = window_manager.event_timer_add(self.watch_interval, context.window)
+            window_manager.modal_handler_add(self)
+            self.report({'INFO'}, 'Watching ' + ', '.join(paths) + ' (press ESC to stop)')
+            return {'RUNNING_MODAL'}
+        return {'FINISHED'}
 
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            context.window_manager.event_timer_remove(self._timer)
+            self.report({'INFO'}, 'Stopped watching')
+            return {'FINISHED'}
+        if event.type == 'TIMER':
+            changed_paths = []
+            for path, modification_time in self._modification_times.items():
+                if os.path.isfile(path) and os.path.getmtime(path) != modification_time:
+                    changed_paths.append(path)
+                    self._modification_times[path] = os.path.getmtime(path)
+            if changed_paths:
+                metrics = ImportMetrics(self.verbosity)
+                try:
+                    # Re-imports always update the existing objects
+                    self.import_files(changed_paths, metrics, update_existing=True)
+                except (IOError, OSError, ValueError, AssertionError) as error:
+                    # E.g. if the file is still being written, the next modification triggers an update
+                    self.report({'WARNING'}, 'Updating ' + ', '.join(changed_paths) + ' failed: ' + repr(error))
+                self.report_metrics(metrics)
+        return {'PASS_THROUGH'}
+
+    def import_files(self, paths, metrics, update_existing=False):
         from nvm_import_export.nvm_file_handler import NVMFileHandler
 
+        model_indices = parse_model_indices(self.model_indices)
+        if model_indices is None:
+            max_amount_models = None
+        else:
+            max_amount_models = max(model_indices) + 1
+
+        if self.num_file_parse_workers > 1 and len(paths) > 1 and not (self.import_points and self.stream_points):
+            return self.import_files_concurrently(paths, model_indices, metrics, update_existing)
+
+        success = True
         for path in paths:
             
             # by default search for the images in the nvm directory
             if self.path_to_images == '':
                 self.path_to_images = os.path.dirname(path)
+
+            # The index contains the byte offsets of each model, 
+            # i.e. the selected models are parsed without parsing the models before them
+            with metrics.span('index_models'):
+                models = NVMFileHandler.index_nvm_models(path, self, max_amount_models, metrics)
+            if model_indices is not None:
+                models = [model for model in models if model.index in model_indices]
+                self.report_missing_models(path, models, model_indices)
             
-            cameras, points = NVMFileHandler.parse_nvm_file(path, self)
-            
-            # https://blender.stackexchange.com/questions/717/is-it-possible-to-print-to-the-report-window-in-the-info-view
-            #   The color depends on the type enum: INFO gets green, WARNING light red, and ERROR dark red
-            # https://docs.blender.org/api/blender_python_api_2_78_release/bpy.types.Operator.html?highlight=report#bpy.types.Operator.report
-            self.report({'INFO'}, 'Number cameras: ' + str(len(cameras)))
-            self.report({'INFO'}, 'Number points: ' + str(len(points)))
+            for model in models:
+                with metrics.span('import_model'):
+                    success = self.import_model(path, model, metrics, update_existing)
+                if not success:
+                    break
+            if not success:
+                break
+        return success
+
+    def import_files_concurrently(self, paths, model_indices, metrics, update_existing):
+        from nvm_import_export.nvm_file_handler import NVMFileHandler
+        success = True
+        # The files are parsed in separate processes, while the objects of parsed files are added
+        parsed_files = NVMFileHandler.iter_parsed_nvm_files(
+            paths, 
+            self.num_file_parse_workers, 
+            model_indices, 
+            parse_points=self.import_points,
+            cache=self.create_parse_cache(), 
+            rebuild_cache=self.rebuild_parse_cache)
+        while True:
+            # The time, which the scene construction waits for the parsing processes
+            with metrics.span('wait_for_parsed_files'):
+                parsed_file = next(parsed_files, None)
+            if parsed_file is None:
+                break
+            path, models, parsed_models, parse_metrics = parsed_file
+            metrics.log(self, 'Parsed file: ' + path)
+            if model_indices is not None:
+                self.report_missing_models(path, models, model_indices)
+            # The parse durations of the processes overlap with the scene construction
+            metrics.merge(parse_metrics, 'parse_processes')
+            if self.path_to_images == '':
+                self.path_to_images = os.path.dirname(path)
+            for model, parsed_model in zip(models, parsed_models):
+                with metrics.span('import_model'):
+                    success = self.import_model(path, model, metrics, update_existing, parsed_model)
+                if not success:
+                    break
+            if not success:
+                # Cancels the files, which have not been parsed yet
+                parsed_files.close()
+                break
+        return success
+
+    def report_missing_models(self, path, models, model_indices):
+        found_model_indices = set(model.index for model in models)
+        for model_index in sorted(set(model_indices) - found_model_indices):
+            self.report({'ERROR'}, 'Model ' + str(model_index) + ' not found in: ' + path)
+
+    def create_parse_cache(self):
+        from nvm_import_export.parse_cache import NVMParseCache
+        if not self.use_parse_cache:
+            return None
+        return NVMParseCache(
+            self.parse_cache_directory, 
+            self.parse_cache_size_limit * 1024 ** 2, 
+            self.parse_cache_use_content_hash)
+
+    def report_metrics(self, metrics):
+        metrics.report_summary(self)
+        if self.metrics_file != '':
+            try:
+                metrics.write_json(self.metrics_file)
+            except (IOError, OSError):
+                self.report({'WARNING'}, 'Could not write metrics file: ' + self.metrics_file)
+
+    def import_model(self, path, model, metrics, update_existing=False, parsed_model=None):
+        """
+        parsed_model is an (optional) tuple of the cameras and the points of the model,
+        which have been parsed before (e.g. see import_files_concurrently).
+        """
+
+        from nvm_import_export.nvm_file_handler import NVMFileHandler
+        from nvm_import_export.image_size import ImageSizeCache
+
+        metrics.log(self, 'Importing model: ' + str(model.index))
+        metrics.increment('models_imported')
+        cache = self.create_parse_cache()
+        if cache is not None and self.rebuild_parse_cache and parsed_model is None:
+            cache.invalidate(path, model.index)
+        if parsed_model is not None:
+            cameras, points = parsed_model
+            metrics.log(self, 'Number points: ' + str(len(points)))
+        elif self.import_points and self.stream_points:
+            cameras, _ = NVMFileHandler.parse_nvm_file(
+                path, self, as_point_cloud=True, parse_points=False, model=model, metrics=metrics)
+            # The points are parsed batch by batch while adding them to the scene
+            points = NVMFileHandler.iter_nvm_points(
+                path, self.point_batch_size, self, model=model, metrics=metrics)
+        else:
+            cameras, points = NVMFileHandler.parse_nvm_file(
+                path, self, as_point_cloud=True, parse_points=self.import_points, model=model,
+                num_workers=self.num_parse_workers, cache=cache, metrics=metrics)
+            metrics.log(self, 'Number points: ' + str(len(points)))
+        
+        # https://blender.stackexchange.com/questions/717/is-it-possible-to-print-to-the-report-window-in-the-info-view
+        #   The color depends on the type enum: INFO gets green, WARNING light red, and ERROR dark red
+        # https://docs.blender.org/api/blender_python_api_2_78_release/bpy.types.Operator.html?highlight=report#bpy.types.Operator.report
+        metrics.log(self, 'Number cameras: ' + str(len(cameras)))
+        
+        if self.import_cameras:
+            if self.use_image_size_cache:
+                image_size_cache = ImageSizeCache()
+            else:
+                image_size_cache = None
+            cameras, success = NVMFileHandler.parse_camera_image_files(
+                cameras, self.path_to_images, self.default_width, self.default_height, self,
+                num_workers=self.num_image_probe_workers, image_size_cache=image_size_cache, metrics=metrics)
             
-            if self.import_cameras:
-                cameras, success = NVMFileHandler.parse_camera_image_files(
-                    cameras, self.path_to_images, self.default_width, self.default_height, self)
+            if success:
+                # principal point information may be provided in the NVM file
+                if not principal_points_initialized(cameras):
+                    set_principal_point_for_cameras(
+                        cameras, 
+                        self.default_pp_x,
+                        self.default_pp_y,
+                        self)
                 
-                if success:
-                    # principal point information may be provided in the NVM file
-                    if not principal_points_initialized(cameras):
-                        set_principal_point_for_cameras(
-                            cameras, 
-                            self.default_pp_x,
-                            self.default_pp_y,
-                            self)
-                    
-                    if self.adjust_render_settings:
-                        adjust_render_settings_if_possible(
-                            self, 
-                            cameras)
-                    add_cameras(
+                if self.adjust_render_settings:
+                    adjust_render_settings_if_possible(
+                        self, 
+                        cameras)
+                add_cameras_kwargs = dict(
+                    share_camera_data=self.share_camera_data,
+                    share_image_plane_meshes=self.share_image_plane_meshes,
+                    image_plane_proxy_size=self.image_plane_proxy_size,
+                    image_plane_proxy_directory=self.image_plane_proxy_directory,
+                    num_proxy_workers=self.num_proxy_workers)
+                if update_existing:
+                    update_cameras(
                         self, 
                         cameras, 
+                        path, 
+                        model.index,
                         path_to_images=self.path_to_images, 
                         add_image_planes=self.add_image_planes, 
-                        camera_scale=self.camera_extent)
+                        camera_scale=self.camera_extent,
+                        metrics=metrics,
+                        **add_cameras_kwargs)
                 else:
-                    return {'FINISHED'}
-                
-            if self.import_points:
-                add_points_as_mesh(
+                    add_cameras(
+                        self, 
+                        cameras, 
+                        path_to_images=self.path_to_images, 
+                        add_image_planes=self.add_image_planes, 
+                        camera_scale=self.camera_extent,
+                        metrics=metrics,
+                        object_properties={'nvm_source_file': path, 'nvm_model_index': model.index},
+                        **add_cameras_kwargs)
+            else:
+                return False
+            
+        if self.import_points:
+            use_reprojection_errors = (self.report_reprojection_errors or self.reprojection_report_file != '' or
+                                       self.max_mean_reprojection_error > 0)
+            if use_reprojection_errors:
+                # The report and the filter are skipped, if the principal points are not available
+                use_reprojection_errors = initialize_principal_points_from_options(self, cameras, self, metrics)
+            if use_reprojection_errors and (self.report_reprojection_errors or self.reprojection_report_file != ''):
+                points = self.report_reprojection_error_statistics(points, cameras, metrics)
+            # The operator provides all PointFilterOptions
+            points, selected_points = filter_points(self, points, cameras, self, metrics, use_reprojection_errors)
+            if update_existing and update_point_clouds(
                     self, 
                     points, 
+                    path, 
+                    model.index, 
                     self.add_points_as_particle_system, 
                     self.mesh_type, 
-                    self.point_extent)
+                    self.point_extent, 
+                    metrics=metrics, 
+                    selected_points=selected_points):
+                return True
+            lod_parent = add_points_as_mesh(
+                self, 
+                points, 
+                self.add_points_as_particle_system, 
+                self.mesh_type, 
+                self.point_extent,
+                metrics=metrics,
+                lod_voxel_sizes=parse_voxel_sizes(self.lod_voxel_sizes),
+                add_full_resolution_points=self.add_full_resolution_points,
+                selected_points=selected_points,
+                object_properties={'nvm_source_file': path, 'nvm_model_index': model.index})
+            if lod_parent is not None and not self.add_full_resolution_points:
+                # Required to load (and filter) the full resolution points on request
+                lod_parent['nvm_file_path'] = path
+                lod_parent['nvm_model_index'] = model.index
+                lod_parent['add_points_as_particle_system'] = self.add_points_as_particle_system
+                lod_parent['mesh_type'] = self.mesh_type
+                lod_parent['point_extent'] = self.point_extent
+                for option_name in PointFilterOptions._fields:
+                    lod_parent[option_name] = getattr(self, option_name)
+        return True
+
+    def report_reprojection_error_statistics(self, points, cameras, metrics):
+        from nvm_import_export.point_cloud import PointCloud
+        from nvm_import_export.reprojection import ReprojectionErrorReport, detect_absolute_measurements
+        if not isinstance(points, PointCloud):
+            points = PointCloud.concatenate(points)
+        with metrics.span('compute_reprojection_errors'):
+            absolute_measurements = detect_absolute_measurements(cameras, points)
+            report = ReprojectionErrorReport.compute(cameras, points, absolute_measurements)
+        metrics.log(self, 'Absolute measurement coordinates: ' + str(absolute_measurements))
+        self.report({'INFO'}, report.get_summary())
+        if self.reprojection_report_file != '':
+            try:
+                report.write_json(self.reprojection_report_file)
+                report.write_point_errors(os.path.splitext(self.reprojection_report_file)[0] + '.npz', points)
+            except (IOError, OSError):
+                self.report({'WARNING'}, 'Could not write reprojection report file: ' + self.reprojection_report_file)
+        return points
+
+
+class LoadFullResolutionPoints(bpy.types.Operator):
+    """Add the full resolution points of the selected point cloud LOD object"""
+    bl_idname = "import_scene.nvm_full_resolution_points"
+    bl_label = "Load Full Resolution Points"
+    bl_options = {'UNDO'}
+
+    @staticmethod
+    def get_lod_parent(obj):
+        # The LOD objects are children of the object storing the file path
+        if obj is not None and 'nvm_file_path' not in obj:
+            obj = obj.parent
+        if obj is None or 'nvm_file_path' not in obj:
+            return None
+        return obj
+
+    @classmethod
+    def poll(cls, context):
+        return LoadFullResolutionPoints.get_lod_parent(context.active_object) is not None
+
+    def execute(self, context):
+        from nvm_import_export.nvm_file_handler import NVMFileHandler
+        lod_parent = LoadFullResolutionPoints.get_lod_parent(context.active_object)
+        if lod_parent is None:
+            self.report({'ERROR'}, 'Select a point cloud LOD object, which has been imported without full resolution points.')
+            return {'CANCELLED'}
 
+        path = lod_parent['nvm_file_path']
+        model_index = lod_parent['nvm_model_index']
+        metrics = ImportMetrics()
+        models = NVMFileHandler.index_nvm_models(path, self, model_index + 1, metrics)
+        if model_index >= len(models):
+            self.report({'ERROR'}, 'Model ' + str(model_index) + ' not found in: ' + path)
+            return {'CANCELLED'}
+        cameras, points = NVMFileHandler.parse_nvm_file(
+            path, self, as_point_cloud=True, model=models[model_index], metrics=metrics)
+        # Apply the filters of the import, i.e. the full resolution points correspond to the LOD objects
+        options = PointFilterOptions(*[lod_parent[option_name] for option_name in PointFilterOptions._fields])
+        points, selected_points = filter_points(self, points, cameras, options, metrics)
+        add_points_as_mesh(
+            self, 
+            points, 
+            bool(lod_parent['add_points_as_particle_system']), 
+            lod_parent['mesh_type'], 
+            lod_parent['point_extent'], 
+            metrics=metrics,
+            selected_points=selected_points,
+            object_properties={'nvm_source_file': path, 'nvm_model_index': model_index},
+            parent=lod_parent)
         return {'FINISHED'}
@@ -0,0 +1,96 @@
+import json
+import contextlib
+from collections import OrderedDict
+
+from nvm_import_export.stop_watch import StopWatch
+
+
+class ImportMetrics(object):
+    """
+    Collects (nested) timing spans and counters, e.g. of a single import.
+
+    Spans are identified by the names of the enclosing spans and their own name
+    (e.g. 'import/build_cameras/build_image_planes'). Spans with the same
+    identifier are accumulated, i.e. a span entered once per camera reports
+    the total duration and the number of calls.
+    Per item messages are only reported, if the verbosity is at least the level of the message.
+    """
+
+    def __init__(self, verbosity=0):
+        self.verbosity = verbosity
+        self.span_durations = OrderedDict()
+        self.span_counts = OrderedDict()
+        self.counters = OrderedDict()
+        self._open_spans = []
+
+    def begin_span(self, name):
+        span_id = '/'.join([open_span_id for open_span_id, _ in self._open_spans[-1:]] + [name])
+        # Register the span at the beginning, i.e. enclosing spans are listed before nested spans
+        if span_id not in self.span_durations:
+            self.span_durations[span_id] = 0.0
+            self.span_counts[span_id] = 0
+        self._open_spans.append((span_id, StopWatch()))
+
+    def end_span(self):
+        span_id, stop_watch = self._open_spans.pop()
+        duration = stop_watch.get_elapsed_time()
+        self.span_durations[span_id] += duration
+        self.span_counts[span_id] += 1
+        return duration
+
+    @contextlib.contextmanager
+    def span(self, name):
+        self.begin_span(name)
+        try:
+            yield
+        finally:
+            self.end_span()
+
+    def merge(self, other, name):
+        """
+        Adds the spans and the counters of other (e.g. recorded in a different process).
+        The spans of other are nested into a span with the provided name, whose duration is
+        the total duration of the top level spans of other.
+        """
+        span_id = '/'.join([open_span_id for open_span_id, _ in self._open_spans[-1:]] + [name])
+        merged_durations = [(span_id, sum(duration for other_span_id, duration in other.span_durations.items()
+                                          if '/' not in other_span_id), 1)]
+        for other_span_id, duration in other.span_durations.items():
+            merged_durations.append((span_id + '/' + other_span_id, duration, other.span_counts[other_span_id]))
+        for merged_span_id, duration, count in merged_durations:
+            self.span_durations[merged_span_id] = self.span_durations.get(merged_span_id, 0.0) + duration
+            self.span_counts[merged_span_id] = self.span_counts.get(merged_span_id, 0) + count
+        for counter_name, value in other.counters.items():
+            self.increment(counter_name, value)
+
+    def increment(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def log(self, op, message, level=1):
+        if self.verbosity >= level:
+            op.report({'INFO'}, message)
+
+    def to_dict(self):
+        spans = OrderedDict()
+        for span_id, duration in self.span_durations.items():
+            spans[span_id] = {'duration': duration, 'count': self.span_counts[span_id]}
+        return {'spans': spans, 'counters': self.counters}
+
+    def get_summary(self):
+        lines = ['Import summary:']
+        for span_id, duration in self.span_durations.items():
+            depth = span_id.count('/')
+            line = '  ' * (depth + 1) + span_id.split('/')[-1] + ': ' + '%.3f' % duration + ' s'
+            if self.span_counts[span_id] > 1:
+                line += ' (' + str(self.span_counts[span_id]) + ' calls)'
+            lines.append(line)
+        for name, value in self.counters.items():
+            lines.append('  ' + name + ': ' + str(value))
+        return '\n'.join(lines)
+
+    def report_summary(self, op):
+        op.report({'INFO'}, self.get_summary())
+
+    def write_json(self, metrics_file_name):
+        with open(metrics_file_name, 'w') as metrics_file:
+            json.dump(self.to_dict(), metrics_file, indent=2)
@@ -1,50 +1,58 @@
 
 import os
-from collections import defaultdict
+import itertools
+import concurrent.futures
+from collections import namedtuple
 import numpy as np
 
-try:
-    from PIL import Image as PILImage
-except ImportError:
-    PILImage = None
-
-from nvm_import_export.camera import Camera
-from collections import namedtuple
+from nvm_import_export.camera import CameraArray
+from nvm_import_export.image_size import PILImage, probe_image_sizes
+from nvm_import_export.point_cloud import PointCloud, VisibilityIndex
+from nvm_import_export.metrics import ImportMetrics
+from nvm_import_export.console_operator import ConsoleOperator
+from nvm_import_export.process_pool import create_process_pool_executor
 
-Measurement = namedtuple('Measurement', ['image_index', 'feature_index', 'x', 'y'])
-Point = namedtuple('Point', ['coord', 'color', 'measurements', 'id', 'scalars']) 
+# Byte offsets of the camera and the point section of a <model> in a NVM file
+NVMModel = namedtuple('NVMModel', ['index', 'amount_cameras', 'camera_offset', 'amount_points', 'point_offset'])
 
 
 class NVMFileHandler(object):
 
     @staticmethod
-    def parse_camera_image_files(cameras, path_to_images, default_width, default_height, op):
-        op.report({'INFO'}, 'parse_camera_image_files: ' + path_to_images)
+    def parse_camera_image_files(cameras, path_to_images, default_width, default_height, op,
+                                 num_workers=8, image_size_cache=None, metrics=None):
+        """
+        The image sizes are read concurrently (using num_workers threads) from the image headers.
+        Sizes stored in the (optional) ImageSizeCache are not read from disc again.
+        """
+        if metrics is None:
+            metrics = ImportMetrics()
+        metrics.log(op, 'parse_camera_image_files: ' + path_to_images)
         success = True 
-        for camera in cameras:
-            image_path = os.path.join(path_to_images, camera.file_name)
-            if PILImage is not None and os.path.isfile(image_path):
-                # this does NOT load the data into memory -> should be fast!
-                image = PILImage.open(image_path)
-                camera.width, camera.height = image.size
+        image_paths = [os.path.join(path_to_images, camera.file_name) for camera in cameras]
+        with metrics.span('probe_images'):
+            image_sizes = probe_image_sizes(image_paths, num_workers, image_size_cache)
+        metrics.increment('images_probed', len(image_paths))
+        for camera, image_path, image_size in zip(cameras, image_paths, image_sizes):
+            if image_size is not None:
+                camera.width, camera.height = image_size
             elif default_width > 0 and default_height > 0:
                 camera.width = default_width
                 camera.height = default_height
                 op.report({'WARNING'}, 'Set width and height to provided default values! (' + str(default_width) + ', ' + str(default_height) + ')')
             else:
-                if PILImage is None:
-                    op.report({'ERROR'}, 'PIL/PILLOW is not installed. Can not read image from disc to get image size.')
+                if os.path.isfile(image_path):
+                    op.report({'ERROR'}, 'Can not read the image size of: ' + image_path)
+                    if PILImage is None:
+                        op.report({'ERROR'}, 'Only JPEG, PNG and TIFF are supported without PIL/PILLOW.')
                 else:
                     op.report({'ERROR'}, 'Corresponding image not found at: ' + image_path)
                 op.report({'ERROR'}, 'Invalid default values provided for width (' + str(default_width) + ') and height (' + str(default_height) + ')')
-                if PILImage is None:
-                    op.report({'ERROR'}, 'Adjust the default width/height values to import the NVM file.')
-                else:
-                    op.report({'ERROR'}, 'Adjust the image path or the default width/height values to import the NVM file.')
+                op.report({'ERROR'}, 'Adjust the image path or the default width/height values to import the NVM file.')
                 success = False
                 break
 
-        op.report({'INFO'}, 'parse_camera_image_files: Done')
+        metrics.log(op, 'parse_camera_image_files: Done')
         return cameras, success
 
     # Check the LoadNVM function in util.h of Multicore bundle adjustment code for more details.
@@ -67,99 +75,165 @@ class NVMFileHandler(object):
         i.e. the y and z axis of the CAMERA MATRICES are inverted
         therefore, the y and z axis of the TRANSLATION VECTOR are also inverted
         """
-        # op.report({'INFO'}, '_parse_cameras: ...')
-        cameras = []
+        camera_array = NVMFileHandler._parse_camera_array(
+            input_file, num_cameras, camera_calibration_matrix, op)
+        return camera_array.get_cameras()
 
-        for i in range(num_cameras):
-            line = input_file.readline()
+    @staticmethod
+    def _parse_camera_array(input_file, num_cameras, camera_calibration_matrix, op):
+        # op.report({'INFO'}, '_parse_camera_array: ...')
 
-            # Read the camera section
-            # From the docs:
-            # <Camera> = <File name> <focal length> <quaternion WXYZ> <camera center> <radial distortion> 0
-            line_values = line.split()
-            file_name = os.path.basename(line_values[0])
-            focal_length = float(line_values[1])
-
-            quaternion_w = float(line_values[2])
-            quaternion_x = float(line_values[3])
-            quaternion_y = float(line_values[4])
-            quaternion_z = float(line_values[5])
-            quaternion = np.array([quaternion_w, quaternion_x, quaternion_y, quaternion_z], dtype=float)
-
-            camera_center_x = float(line_values[6])
-            camera_center_y = float(line_values[7])
-            camera_center_z = float(line_values[8])
-            center_vec = np.array([camera_center_x, camera_center_y, camera_center_z])
-
-            radial_distortion = float(line_values[9])
-
-            # TODO radial_distortion in camera_calibration_matrix
-            if camera_calibration_matrix is None:
-                camera_calibration_matrix = np.array([[focal_length, 0, 0],
-                                          [0, focal_length, 0],
-                                          [0, 0, 1]])
-
-            zero_value = float(line_values[10])
-            assert(zero_value == 0)
-
-            current_camera = Camera()
-            # Setting the quaternion also sets the rotation matrix
-            current_camera.set_quaternion(quaternion)
-
-            # Set the camera center after rotation
-            # COMMENT FROM PBA CODE:
-            #   older format for compability
-            #   camera_data[i].SetQuaternionRotation(q); // quaternion from the file
-            #   camera_data[i].SetCameraCenterAfterRotation(c); // camera center from the file
-            current_camera._center = center_vec
-
-            # set the camera view direction as normal w.r.t world coordinates
-            cam_view_vec_cam_coord = np.array([0, 0, 1]).T
-            cam_rotation_matrix_inv = np.linalg.inv(current_camera.get_rotation_mat())
-            cam_view_vec_world_coord = cam_rotation_matrix_inv.dot(cam_view_vec_cam_coord)
-            current_camera.normal = cam_view_vec_world_coord
-
-            translation_vec = NVMFileHandler.compute_camera_coordinate_system_translation_vector(center_vec, current_camera.get_rotation_mat())
-            current_camera._translation_vec = translation_vec
-
-            current_camera.set_calibration_mat(camera_calibration_matrix)
-            # op.report({'INFO'}, 'Calibration mat:')
-            # op.report({'INFO'}, str(camera_calibration_matrix))
-            current_camera.file_name = file_name
-            current_camera.id = i
-            cameras.append(current_camera)
-        # op.report({'INFO'}, '_parse_cameras: Done')
-        return cameras
+        # Read the camera section
+        # From the docs:
+        # <Camera> = <File name> <focal length> <quaternion WXYZ> <camera center> <radial distortion> 0
+        lines_values = [input_file.readline().decode().split() for i in range(num_cameras)]
+        file_names = [os.path.basename(line_values[0]) for line_values in lines_values]
+        values = np.array(
+            [line_values[1:11] for line_values in lines_values], dtype=float).reshape(num_cameras, 10)
+
+        focal_lengths = values[:, 0]
+        quaternions = values[:, 1:5]
+        centers = values[:, 5:8]
+        radial_distortions = values[:, 8]
+        zero_values = values[:, 9]
+        assert np.all(zero_values == 0)
+
+        # TODO radial_distortion in camera_calibration_matrix
+        if camera_calibration_matrix is None:
+            calibration_mats = np.zeros((num_cameras, 3, 3), dtype=float)
+            calibration_mats[:, 0, 0] = focal_lengths
+            calibration_mats[:, 1, 1] = focal_lengths
+            calibration_mats[:, 2, 2] = 1
+        else:
+            calibration_mats = np.tile(camera_calibration_matrix, (num_cameras, 1, 1))
+
+        # The rotation matrices are computed from the quaternions.
+        # Set the camera center after rotation
+        # COMMENT FROM PBA CODE:
+        #   older format for compability
+        #   camera_data[i].SetQuaternionRotation(q); // quaternion from the file
+        #   camera_data[i].SetCameraCenterAfterRotation(c); // camera center from the file
+        # The camera view direction (i.e. the normal) and the translation vectors are
+        # computed by the CameraArray as well.
+        camera_array = CameraArray(
+            file_names=file_names,
+            quaternions=quaternions,
+            centers=centers,
+            calibration_mats=calibration_mats)
+        # op.report({'INFO'}, '_parse_camera_array: Done')
+        return camera_array
 
     @staticmethod
     def _parse_nvm_points(input_file, num_3D_points):
+        point_cloud = NVMFileHandler._parse_nvm_point_cloud(input_file, num_3D_points)
+        return point_cloud.get_points()
 
-        points = []
-        for point_index in range(num_3D_points):
-            # From the VSFM docs:
-            # <Point>  = <XYZ> <RGB> <number of measurements> <List of Measurements>
-            point_line = input_file.readline()
-            point_line_elements = (point_line.rstrip()).split()
-            xyz_vec = list(map(float, point_line_elements[0:3]))
-            rgb_vec = list(map(int, point_line_elements[3:6]))
-            number_measurements = int(point_line_elements[6])
-            measurements = point_line_elements[7:]
-
-            current_point_measurement = []
-            for measurement_index in range(0, number_measurements):
-                # From the VSFM docs:
-                # <Measurement> = <Image index> <Feature Index> <xy>
-                current_measurement = measurements[measurement_index*4:(measurement_index+1)*4]
-                image_index = int(current_measurement[0])
-                feature_index = int(current_measurement[1])
-                x_in_nvm_file = float(current_measurement[2])
-                y_in_nvm_file = float(current_measurement[3])
-                current_point_measurement.append(
-                    Measurement(image_index, feature_index, x_in_nvm_file, y_in_nvm_file))
-            current_point = Point(coord=xyz_vec, color=rgb_vec, measurements = current_point_measurement, id=point_index, scalars=None)
-            points.append(current_point)
-
-        return points
+    @staticmethod
+    def _parse_nvm_point_cloud(input_file, num_3D_points, num_workers=1):
+        if num_workers > 1 and num_3D_points > 0:
+            return NVMFileHandler._parse_nvm_point_cloud_parallel(input_file, num_3D_points, num_workers)
+        # The points section is read as one block of bytes and converted at once
+        point_lines = itertools.islice(input_file, num_3D_points)
+        return NVMFileHandler._parse_nvm_point_block(b''.join(point_lines), num_3D_points)
+
+    @staticmethod
+    def _split_at_line_breaks(input_file, start, end, amount_chunks):
+        # Returns the boundaries of (approximately) equally sized byte ranges,
+        # which start at the beginning of a line
+        boundaries = [start]
+        for chunk_index in range(1, amount_chunks):
+            approximate_boundary = start + (end - start) * chunk_index // amount_chunks
+            if approximate_boundary <= boundaries[-1]:
+                continue
+            input_file.seek(approximate_boundary - 1)
+            input_file.readline()
+            boundary = min(input_file.tell(), end)
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+        if end > boundaries[-1]:
+            boundaries.append(end)
+        return boundaries
+
+    @staticmethod
+    def _parse_nvm_point_cloud_parallel(input_file, num_3D_points, num_workers):
+        # The point lines are independent, i.e. the points section can be split
+        # into byte ranges at line breaks, which are parsed in separate processes
+        start = input_file.tell()
+        NVMFileHandler._skip_lines(input_file, num_3D_points)
+        end = input_file.tell()
+        boundaries = NVMFileHandler._split_at_line_breaks(input_file, start, end, num_workers)
+        input_file.seek(end)
+
+        amount_ranges = len(boundaries) - 1
+        with create_process_pool_executor(num_workers) as executor:
+            # map() returns the results in the order of the byte ranges
+            point_clouds = list(executor.map(
+                _parse_nvm_point_byte_range,
+                [input_file.name] * amount_ranges,
+                boundaries[:-1],
+                boundaries[1:]))
+
+        point_cloud = PointCloud.concatenate(point_clouds)
+        assert len(point_cloud) == num_3D_points
+        # Use the same point ids as the serial parser
+        point_cloud.ids = np.arange(num_3D_points, dtype=np.int64)
+        return point_cloud
+
+    @staticmethod
+    def _parse_nvm_point_block(point_block, num_3D_points=None, first_point_id=0):
+        """
+        Converts a block of point lines to a PointCloud using bulk NumPy operations.
+        If num_3D_points is None, all points in the block are converted.
+
+        From the VSFM docs:
+            <Point>  = <XYZ> <RGB> <number of measurements> <List of Measurements>
+            <Measurement> = <Image index> <Feature Index> <xy>
+        """
+        if num_3D_points == 0:
+            return PointCloud()
+
+        values = np.fromstring(point_block, dtype=np.float64, sep=' ')
+
+        # Determine the number of tokens in each line, which is required to
+        # locate the (variable length) records in the flat value array
+        block_bytes = np.frombuffer(point_block, dtype=np.uint8)
+        # Spaces, tabs and line breaks (\r and \n) are the only characters <= ' '
+        is_space = block_bytes <= ord(' ')
+        is_token_start = ~is_space
+        is_token_start[1:] &= is_space[:-1]
+        token_starts = np.flatnonzero(is_token_start)
+        assert len(values) == len(token_starts)
+        line_ends = np.append(np.flatnonzero(block_bytes == ord('\n')), len(block_bytes))
+        tokens_per_line = np.diff(np.concatenate(([0], np.searchsorted(token_starts, line_ends))))
+        tokens_per_point = tokens_per_line[tokens_per_line > 0]
+        if num_3D_points is None:
+            num_3D_points = len(tokens_per_point)
+            if num_3D_points == 0:
+                return PointCloud()
+        assert len(tokens_per_point) == num_3D_points
+        point_starts = np.zeros(num_3D_points, dtype=np.int64)
+        point_starts[1:] = np.cumsum(tokens_per_point)[:-1]
+
+        coords = values[point_starts[:, np.newaxis] + np.arange(0, 3)]
+        colors = values[point_starts[:, np.newaxis] + np.arange(3, 6)].astype(np.uint8)
+        number_measurements = values[point_starts + 6].astype(np.int64)
+        assert np.array_equal(tokens_per_point, 7 + 4 * number_measurements)
+
+        measurement_offsets = np.zeros(num_3D_points + 1, dtype=np.int64)
+        measurement_offsets[1:] = np.cumsum(number_measurements)
+        measurement_point_indices = np.repeat(np.arange(num_3D_points), number_measurements)
+        index_in_point = np.arange(measurement_offsets[-1]) - measurement_offsets[measurement_point_indices]
+        measurement_starts = point_starts[measurement_point_indices] + 7 + 4 * index_in_point
+
+        return PointCloud(
+            coords=coords,
+            colors=colors,
+            ids=np.arange(first_point_id, first_point_id + num_3D_points, dtype=np.int64),
+            measurement_offsets=measurement_offsets,
+            measurement_image_indices=values[measurement_starts],
+            measurement_feature_indices=values[measurement_starts + 1],
+            measurement_x=values[measurement_starts + 2],
+            measurement_y=values[measurement_starts + 3])
 
     @staticmethod
     def parse_fixed_calibration(line, op):
@@ -183,42 +257,284 @@ class NVMFileHandler(object):
         return calib_mat
 
     @staticmethod
-    def parse_nvm_file(input_visual_fsm_file_name, op):
-
-        op.report({'INFO'}, 'Parse NVM file: ' + input_visual_fsm_file_name)
-        input_file = open(input_visual_fsm_file_name, 'r')
-        # Documentation of *.NVM data format
-        # http://ccwu.me/vsfm/doc.html#nvm
+    def _read_line(input_file):
+        return input_file.readline().decode().rstrip()
 
-        # In a simple case there is only one model
+    @staticmethod
+    def _read_non_empty_line(input_file):
+        # Returns an empty string, if the end of the file is reached
+        while True:
+            line = input_file.readline()
+            if line == b'' or line.strip() != b'':
+                return line.decode().strip()
 
-        # Each reconstructed <model> contains the following
-        # <Number of cameras>   <List of cameras>
-        # <Number of 3D points> <List of points>
+    @staticmethod
+    def _skip_lines(input_file, amount_lines, chunk_size=1 << 20):
+        # Counts the line breaks chunk-wise instead of creating an object per line
+        while amount_lines > 0:
+            chunk = input_file.read(chunk_size)
+            if chunk == b'':
+                break
+            amount_line_breaks = chunk.count(b'\n')
+            if amount_line_breaks < amount_lines:
+                amount_lines -= amount_line_breaks
+                continue
+            position = -1
+            for _ in range(amount_lines):
+                position = chunk.find(b'\n', position + 1)
+            # Move the file position to the beginning of the next line
+            input_file.seek(position + 1 - len(chunk), os.SEEK_CUR)
+            amount_lines = 0
 
+    @staticmethod
+    def _parse_nvm_header(input_file, op):
         # Read the first two lines (fixed)
-        current_line = (input_file.readline()).rstrip()
+        current_line = NVMFileHandler._read_line(input_file)
         calibration_matrix = NVMFileHandler.parse_fixed_calibration(current_line, op)
-        current_line = (input_file.readline()).rstrip()
+        current_line = NVMFileHandler._read_line(input_file)
         assert current_line == ''
+        return calibration_matrix
 
-        amount_cameras = int((input_file.readline()).rstrip())
+    @staticmethod
+    def _parse_amount_cameras(input_file):
+        amount_cameras = int(NVMFileHandler._read_line(input_file))
         print('Amount Cameras (Images in NVM file): ' + str(amount_cameras))
+        return amount_cameras
 
-        cameras = NVMFileHandler._parse_cameras(input_file, amount_cameras, calibration_matrix, op)
-        current_line = (input_file.readline()).rstrip()
-        assert current_line == ''
-        current_line = (input_file.readline()).rstrip()
+    @staticmethod
+    def _parse_amount_points(input_file):
+        current_line = NVMFileHandler._read_non_empty_line(input_file)
         if current_line.isdigit():
             amount_points = int(current_line)
             print('Amount Sparse Points (Points in NVM file): ' + str(amount_points))
-            points = NVMFileHandler._parse_nvm_points(input_file, amount_points)
         else:
-            points = []
+            amount_points = 0
+        return amount_points
+
+    @staticmethod
+    def _is_last_model(input_file):
+        # Returns True, if the model list ends after the current position (i.e. the next
+        # model is empty or the PLY section starts). The file position is not changed.
+        position = input_file.tell()
+        current_line = NVMFileHandler._read_non_empty_line(input_file)
+        input_file.seek(position)
+        return not current_line.isdigit() or int(current_line) == 0
+
+    @staticmethod
+    def index_nvm_models(input_visual_fsm_file_name, op, max_amount_models=None, metrics=None):
+
+        """
+        Returns a NVMModel for each <model> in the NVM file, which stores the byte offsets
+        of the camera and the point section. The sections are skipped without parsing them.
+
+        From the VSFM docs:
+            <Model1> <Model2> ... <Empty Model containing the unregistered Images>
+        VisualSFM lists the unregistered images as a trailing model with cameras, but without
+        points. This model is skipped (a file with a single model without points, e.g. an
+        exported camera path, is indexed as usual).
+        """
+
+        if metrics is None:
+            metrics = ImportMetrics()
+        metrics.log(op, 'Index NVM models: ' + input_visual_fsm_file_name)
+        models = []
+        with open(input_visual_fsm_file_name, 'rb') as input_file:
+            NVMFileHandler._parse_nvm_header(input_file, op)
+            while max_amount_models is None or len(models) < max_amount_models:
+                current_line = NVMFileHandler._read_non_empty_line(input_file)
+                # The model list is terminated by an empty model (or by the PLY section)
+                if not current_line.isdigit() or int(current_line) == 0:
+                    break
+                amount_cameras = int(current_line)
+                camera_offset = input_file.tell()
+                NVMFileHandler._skip_lines(input_file, amount_cameras)
+
+                current_line = NVMFileHandler._read_non_empty_line(input_file)
+                if current_line.isdigit():
+                    amount_points = int(current_line)
+                else:
+                    amount_points = 0
+                point_offset = input_file.tell()
+                NVMFileHandler._skip_lines(input_file, amount_points)
+                if amount_points == 0 and len(models) > 0 and NVMFileHandler._is_last_model(input_file):
+                    metrics.log(op, 'Skipped the unregistered images (' + str(amount_cameras) + ' cameras)')
+                    break
+
+                model = NVMModel(index=len(models),
+                                 amount_cameras=amount_cameras,
+                                 camera_offset=camera_offset,
+                                 amount_points=amount_points,
+                                 point_offset=point_offset)
+                metrics.log(op, 'Model ' + str(model.index) + ': ' +
+                            str(amount_cameras) + ' cameras, ' + str(amount_points) + ' points', level=2)
+                models.append(model)
+
+        metrics.log(op, 'Index NVM models: Done')
+        return models
+
+    @staticmethod
+    def parse_nvm_file(input_visual_fsm_file_name, op, as_point_cloud=False, parse_points=True, model=None,
+                       num_workers=1, cache=None, metrics=None):
+
+        """
+        Returns the cameras and the points of the first model (or of the provided NVMModel)
+        in the NVM file.
+        If as_point_cloud is True, the points are returned as PointCloud (structure of arrays)
+        instead of a list of Point objects.
+        If parse_points is False, the points section is skipped (use iter_nvm_points to
+        read the points in batches).
+        If num_workers is larger than 1, the points section is parsed in parallel processes.
+        If a NVMParseCache is provided, the result is loaded from (or stored in) the cache.
+        The durations of the parsing steps are recorded in the (optional) ImportMetrics.
+        """
+
+        if metrics is None:
+            metrics = ImportMetrics()
+        metrics.log(op, 'Parse NVM file: ' + input_visual_fsm_file_name)
+        model_index = 0 if model is None else model.index
+        cache_entry = None
+        if cache is not None and parse_points:
+            with metrics.span('load_parse_cache'):
+                cache_entry = cache.load(input_visual_fsm_file_name, model_index, op, metrics)
+        if cache_entry is not None:
+            cameras, point_cloud = cache_entry
+            metrics.increment('parse_cache_hits')
+        else:
+            cameras, point_cloud = NVMFileHandler._parse_nvm_model(
+                input_visual_fsm_file_name, op, parse_points, model, num_workers, metrics)
+            if cache is not None and parse_points:
+                with metrics.span('store_parse_cache'):
+                    cache.store(input_visual_fsm_file_name, model_index, cameras, point_cloud, op, metrics)
+
+        if as_point_cloud:
+            points = point_cloud
+        else:
+            points = point_cloud.get_points()
 
-        op.report({'INFO'}, 'Parse NVM file: Done')
+        metrics.log(op, 'Parse NVM file: Done')
         return cameras, points
 
+    @staticmethod
+    def _parse_nvm_model(input_visual_fsm_file_name, op, parse_points, model, num_workers, metrics):
+        # The file is read in binary mode, which allows to convert the points section in bulk
+        with open(input_visual_fsm_file_name, 'rb') as input_file:
+            # Documentation of *.NVM data format
+            # http://ccwu.me/vsfm/doc.html#nvm
+
+            # In a simple case there is only one model
+
+            # Each reconstructed <model> contains the following
+            # <Number of cameras>   <List of cameras>
+            # <Number of 3D points> <List of points>
+
+            with metrics.span('parse_header'):
+                calibration_matrix = NVMFileHandler._parse_nvm_header(input_file, op)
+            metrics.increment('bytes_read', input_file.tell())
+            metrics.increment('lines_parsed', 2)
+
+            with metrics.span('parse_cameras'):
+                if model is None:
+                    amount_cameras = NVMFileHandler._parse_amount_cameras(input_file)
+                else:
+                    # Jump directly to the camera section of the model
+                    input_file.seek(model.camera_offset)
+                    amount_cameras = model.amount_cameras
+                start = input_file.tell()
+                cameras = NVMFileHandler._parse_cameras(input_file, amount_cameras, calibration_matrix, op)
+            metrics.increment('bytes_read', input_file.tell() - start)
+            metrics.increment('lines_parsed', amount_cameras)
+            metrics.increment('cameras_parsed', amount_cameras)
+
+            if parse_points:
+                with metrics.span('parse_points'):
+                    if model is None:
+                        amount_points = NVMFileHandler._parse_amount_points(input_file)
+                    else:
+                        input_file.seek(model.point_offset)
+                        amount_points = model.amount_points
+                    start = input_file.tell()
+                    point_cloud = NVMFileHandler._parse_nvm_point_cloud(input_file, amount_points, num_workers)
+                metrics.increment('bytes_read', input_file.tell() - start)
+                metrics.increment('lines_parsed', amount_points)
+                metrics.increment('points_parsed', amount_points)
+                metrics.increment('measurements_parsed', point_cloud.get_num_measurements())
+            else:
+                point_cloud = PointCloud()
+        return cameras, point_cloud
+
+    @staticmethod
+    def iter_nvm_points(input_visual_fsm_file_name, batch_size, op, model=None, metrics=None):
+
+        """
+        Yields the points of the first model (or of the provided NVMModel) in the NVM file
+        as PointCloud batches with (at most) batch_size points. Only a single batch is kept
+        in memory, i.e. the memory consumption does not depend on the number of points in the file.
+        """
+
+        assert batch_size > 0
+        if metrics is None:
+            metrics = ImportMetrics()
+        metrics.log(op, 'Iterate NVM points: ' + input_visual_fsm_file_name)
+        with open(input_visual_fsm_file_name, 'rb') as input_file:
+            if model is None:
+                NVMFileHandler._parse_nvm_header(input_file, op)
+                amount_cameras = NVMFileHandler._parse_amount_cameras(input_file)
+                # Skip the camera section
+                NVMFileHandler._skip_lines(input_file, amount_cameras)
+                amount_points = NVMFileHandler._parse_amount_points(input_file)
+            else:
+                input_file.seek(model.point_offset)
+                amount_points = model.amount_points
+            for first_point_id in range(0, amount_points, batch_size):
+                num_batch_points = min(batch_size, amount_points - first_point_id)
+                point_lines = itertools.islice(input_file, num_batch_points)
+                yield NVMFileHandler._parse_nvm_point_block(
+                    b''.join(point_lines), num_batch_points, first_point_id)
+        metrics.log(op, 'Iterate NVM points: Done')
+
+    @staticmethod
+    def iter_parsed_nvm_files(input_visual_fsm_file_names, num_workers, model_indices=None, parse_points=True,
+                              cache=None, rebuild_cache=False):
+        """
+        Parses the models (with model_indices or all models, if model_indices is None) of the NVM
+        files in a process pool, i.e. all files are parsed concurrently.
+        Yields a tuple (file name, NVMModels, list of (cameras, PointCloud) tuples, ImportMetrics)
+        for each file as soon as it is parsed (i.e. in the order of completion), which allows to
+        process the parsed files while the remaining files are parsed.
+        """
+        tasks = [(input_visual_fsm_file_name, model_indices, parse_points, cache, rebuild_cache)
+                 for input_visual_fsm_file_name in input_visual_fsm_file_names]
+        if num_workers <= 1:
+            for task in tasks:
+                yield _parse_nvm_file_models(*task)
+            return
+        executor = create_process_pool_executor(num_workers)
+        futures = [executor.submit(_parse_nvm_file_models, *task) for task in tasks]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+        finally:
+            # The remaining files are not required, if the caller stops early (e.g. after an error)
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def compute_visibility_index(cameras, points, metrics=None):
+        """
+        Returns the VisibilityIndex (i.e. the points observed by each camera) of the parsed
+        cameras and points (a PointCloud or a list of Point objects).
+        The index is built once from the measurement arrays, afterwards the points of a camera
+        are retrieved without iterating over all points.
+        """
+        if metrics is None:
+            metrics = ImportMetrics()
+        if not isinstance(points, PointCloud):
+            points = PointCloud.from_points(points)
+        with metrics.span('build_visibility_index'):
+            visibility_index = VisibilityIndex.from_point_cloud(points, len(cameras))
+        return visibility_index
+
     @staticmethod
     def create_nvm_first_line(cameras, op):
 
@@ -260,63 +576,226 @@ class NVMFileHandler(object):
         return content + ' ' + os.linesep
 
     @staticmethod
-    def write_nvm_file(op, output_nvm_file_name, cameras, points):
+    def _to_decimal_numbers(values, max_decimals=12):
+        """
+        Returns the absolute values as integers and numbers of decimals, i.e.
+        |value| = integer / 10^decimals, and a mask of the values, which are represented exactly.
+
+        The number of decimals is determined for all values at once (the smallest number d with
+        rint(|value| * 10^d) / 10^d == |value|), afterwards the trailing zeros of each value are removed.
+        A represented value is the float closest to integer / 10^decimals, i.e. parsing the
+        written decimal number yields exactly the same value. Values, which require more than
+        max_decimals decimals (and non finite values), are not represented.
+        """
+        abs_values = np.abs(values)
+        for amount_decimals in range(max_decimals + 1):
+            scale = 10.0 ** amount_decimals
+            with np.errstate(over='ignore', invalid='ignore'):
+                integers = np.rint(abs_values * scale)
+                # Larger integers are not exactly representable as float
+                representable = (integers < 2.0 ** 53) & (integers / scale == abs_values)
+            if np.all(representable | ~np.isfinite(values)):
+                break
+        integers = np.where(representable, integers, 0).astype(np.int64)
+        decimals = np.full(len(values), amount_decimals, dtype=np.int64)
+        for _ in range(amount_decimals):
+            has_trailing_zero = (decimals > 0) & (integers % 10 == 0)
+            if not np.any(has_trailing_zero):
+                break
+            integers = np.where(has_trailing_zero, integers // 10, integers)
+            decimals -= has_trailing_zero
+        return integers, decimals, representable
+
+    @staticmethod
+    def _format_column(values):
+        """
+        Returns the values (followed by a space) as rows of a byte matrix, which are padded with zero bytes.
 
-        op.report({'INFO'}, 'Write NVM file: ' + output_nvm_file_name)
+        The float values are converted to decimal numbers (see _to_decimal_numbers) and the digits are
+        computed with integer arithmetic for all values at once, i.e. each column of the matrix
+        contains the sign, a digit or the decimal point of all values. Float values, which can
+        not be represented as decimal numbers, are converted with repr().
+        """
+        if np.issubdtype(values.dtype, np.integer):
+            integers = np.abs(values.astype(np.int64))
+            decimals = np.zeros(len(values), dtype=np.int64)
+            representable = np.ones(len(values), dtype=bool)
+        else:
+            integers, decimals, representable = NVMFileHandler._to_decimal_numbers(values)
+        negative = np.signbit(values) & representable
+        powers_of_ten = 10 ** np.arange(19, dtype=np.int64)
+        integer_parts = integers // powers_of_ten[decimals]
+        fractional_parts = integers - integer_parts * powers_of_ten[decimals]
+        amount_integer_digits = len(str(int(integer_parts.max()))) if len(values) > 0 else 1
+        amount_decimals = int(decimals.max()) if len(values) > 0 else 0
+
+        # <sign> <integer digits> <decimal point> <decimal digits> <space>
+        width = 1 + amount_integer_digits + (1 + amount_decimals if amount_decimals > 0 else 0) + 1
+        value_matrix = np.zeros((len(values), width), dtype=np.uint8)
+        value_matrix[negative, 0] = ord('-')
+        # The leading zeros are removed (except for the last digit of the integer part)
+        amounts_digits = np.ones(len(values), dtype=np.int64)
+        for digit_index in range(1, amount_integer_digits):
+            amounts_digits += integer_parts >= powers_of_ten[digit_index]
+        remaining_parts = integer_parts
+        for digit_index in range(amount_integer_digits):
+            value_matrix[:, amount_integer_digits - digit_index] = np.where(
+                digit_index < amounts_digits, ord('0') + remaining_parts % 10, 0)
+            remaining_parts = remaining_parts // 10
+        if amount_decimals > 0:
+            value_matrix[decimals > 0, amount_integer_digits + 1] = ord('.')
+            # The digits after the last decimal of each value are removed
+            remaining_parts = fractional_parts * powers_of_ten[amount_decimals - decimals]
+            for digit_index in range(amount_decimals):
+                value_matrix[:, width - 2 - digit_index] = np.where(
+                    amount_decimals - digit_index <= decimals, ord('0') + remaining_parts % 10, 0)
+                remaining_parts = remaining_parts // 10
+        value_matrix[:, width - 1] = ord(' ')
+
+        if not np.all(representable):
+            fallback_indices = np.flatnonzero(~representable)
+            fallback_strings = np.array([repr(value) for value in values[fallback_indices].tolist()], dtype=bytes)
+            fallback_width = fallback_strings.dtype.itemsize
+            if fallback_width + 1 > width:
+                value_matrix = np.hstack(
+                    [np.zeros((len(values), fallback_width + 1 - width), dtype=np.uint8), value_matrix])
+            value_matrix[fallback_indices, :-1] = 0
+            value_matrix[fallback_indices, :fallback_width] = fallback_strings.view(np.uint8).reshape(
+                len(fallback_indices), fallback_width)
+        return value_matrix
 
-        nvm_content = []
-        nvm_content.append(NVMFileHandler.nvm_line(
-            NVMFileHandler.create_nvm_first_line(cameras, op)))
-        nvm_content.append(NVMFileHandler.nvm_line(''))
-        amount_cameras = len(cameras)
-        nvm_content.append(NVMFileHandler.nvm_line(str(amount_cameras)))
-        print('Amount Cameras (Images in NVM file):', amount_cameras)
+    @staticmethod
+    def _format_nvm_points(point_cloud):
 
-        # Write the camera section
-        # From the VSFM docs:
-        # <Camera> = <File name> <focal length> <quaternion WXYZ> <camera center> <radial distortion> 0
+        """
+        Returns the point lines of point_cloud as bytes.
 
-        for camera in cameras:
+        Each column (e.g. the x coordinates of the points or the image indices of the measurements)
+        is formatted at once (see _format_column). The formatted columns of the points and of the
+        measurements are stacked to one row per point and one row per measurement, respectively.
+        The rows are arranged in the order of the file (i.e. each point row is followed by the rows of
+        its measurements) in a byte matrix, removing the zero bytes of the matrix yields the lines.
 
-            #quaternion = TransformationFunctions.rotation_matrix_to_quaternion(camera.rotation_mat)
-            quaternion = camera.get_quaternion()
+        From the VSFM docs:
+            <Point>  = <XYZ> <RGB> <number of measurements> <List of Measurements>
+            <Measurement> = <Image index> <Feature Index> <xy>
+        """
+        num_points = len(point_cloud)
+        if num_points == 0:
+            return b''
+        number_measurements = point_cloud.get_track_lengths()
+        start, end = point_cloud.measurement_offsets[0], point_cloud.measurement_offsets[-1]
+        measurement_offsets = point_cloud.measurement_offsets - start
+        num_measurements = measurement_offsets[-1]
+
+        # Each point row starts with the line break of the previous line
+        line_separator = os.linesep.encode()
+        line_breaks = np.tile(np.frombuffer(line_separator, dtype=np.uint8), (num_points, 1))
+        line_breaks[0] = 0
+        point_matrix = np.hstack(
+            [line_breaks] +
+            [NVMFileHandler._format_column(point_cloud.coords[:, axis]) for axis in range(3)] +
+            [NVMFileHandler._format_column(point_cloud.colors[:, channel]) for channel in range(3)] +
+            [NVMFileHandler._format_column(number_measurements)])
+        measurement_matrix = np.hstack([
+            NVMFileHandler._format_column(point_cloud.measurement_image_indices[start:end]),
+            NVMFileHandler._format_column(point_cloud.measurement_feature_indices[start:end]),
+            NVMFileHandler._format_column(point_cloud.measurement_x[start:end]),
+            NVMFileHandler._format_column(point_cloud.measurement_y[start:end])])
+        # No space at the end of the lines
+        point_matrix[number_measurements == 0, -1] = 0
+        measurement_matrix[measurement_offsets[1:][number_measurements > 0] - 1, -1] = 0
+
+        row_matrix = np.zeros(
+            (num_points + num_measurements, max(point_matrix.shape[1], measurement_matrix.shape[1])), dtype=np.uint8)
+        point_rows = np.arange(num_points) + measurement_offsets[:-1]
+        row_matrix[point_rows, :point_matrix.shape[1]] = point_matrix
+        measurement_rows = np.arange(num_measurements) + np.repeat(np.arange(1, num_points + 1), number_measurements)
+        row_matrix[measurement_rows, :measurement_matrix.shape[1]] = measurement_matrix
+        return row_matrix[row_matrix != 0].tobytes() + line_separator
 
-            current_line = camera.file_name
-            current_line += '\t' + str(camera.get_calibration_mat()[0][0])
-            current_line += ' ' + ' '.join(list(map(str, quaternion)))
-            current_line += ' ' + ' '.join(list(map(str, camera.get_camera_center())))
-            current_line += ' ' + '0'   # TODO USE RADIAL DISTORTION
-            current_line += ' ' + '0'
-            nvm_content.append(current_line + ' ' + os.linesep)
+    @staticmethod
+    def _iter_formatted_point_chunks(point_cloud, chunk_size, num_workers):
+        chunk_starts = range(0, len(point_cloud), chunk_size)
+        chunks = (point_cloud.get_range(start, min(start + chunk_size, len(point_cloud)))
+                  for start in chunk_starts)
+        if num_workers <= 1:
+            for chunk in chunks:
+                yield NVMFileHandler._format_nvm_points(chunk)
+        else:
+            with create_process_pool_executor(num_workers) as executor:
+                # Keep only a limited number of chunks in flight to bound the memory consumption
+                futures = []
+                for chunk in chunks:
+                    futures.append(executor.submit(_format_nvm_point_chunk, chunk))
+                    if len(futures) >= 2 * num_workers:
+                        yield futures.pop(0).result()
+                for future in futures:
+                    yield future.result()
+
+    @staticmethod
+    def write_nvm_file(op, output_nvm_file_name, cameras, points, num_workers=1, chunk_size=65536):
 
-        nvm_content.append(' ' + os.linesep)
-        number_points = len(points)
-        nvm_content.append(str(number_points) + ' ' + os.linesep)
-        print('Found ' + str(number_points) + ' object points')
+        """
+        Writes the cameras and points (a list of Point objects or a PointCloud) to a NVM file.
+        The point lines are formatted in chunks of chunk_size points, which are
+        streamed to the file. If num_workers is larger than 1, the chunks are formatted
+        in parallel processes.
+        """
 
-        for point in points:
+        op.report({'INFO'}, 'Write NVM file: ' + output_nvm_file_name)
+
+        if isinstance(points, PointCloud):
+            point_cloud = points
+        else:
+            point_cloud = PointCloud.from_points(points)
+
+        with open(output_nvm_file_name, 'wb', buffering=1 << 20) as output_file:
+            nvm_content = []
+            nvm_content.append(NVMFileHandler.nvm_line(
+                NVMFileHandler.create_nvm_first_line(cameras, op)))
+            nvm_content.append(NVMFileHandler.nvm_line(''))
+            amount_cameras = len(cameras)
+            nvm_content.append(NVMFileHandler.nvm_line(str(amount_cameras)))
+            print('Amount Cameras (Images in NVM file):', amount_cameras)
+
+            # Write the camera section
             # From the VSFM docs:
-            # <Point>  = <XYZ> <RGB> <number of measurements> <List of Measurements>
-            current_line = ' '.join(list(map(str, point.coord)))
-            current_line += ' ' + ' '.join(list(map(str, point.color)))
-            current_line += ' ' + str(len(point.measurements))
-            for measurement in point.measurements:
-                current_line += ' ' + str(measurement)
-
-            nvm_content.append(current_line + ' ' + os.linesep)
-
-        nvm_content.append(' ' + os.linesep)
-        nvm_content.append(' ' + os.linesep)
-        nvm_content.append(' ' + os.linesep)
-        nvm_content.append('0' + os.linesep)
-        nvm_content.append(' ' + os.linesep)
-        nvm_content.append('#the last part of NVM file points to the PLY files ' + os.linesep)
-        nvm_content.append('#the first number is the number of associated PLY files ' + os.linesep)
-        nvm_content.append('#each following number gives a model-index that has PLY ' + os.linesep)
-        nvm_content.append('0' + os.linesep)
-
-        output_file = open(output_nvm_file_name, 'wb')
-        output_file.writelines([item.encode() for item in nvm_content])
+            # <Camera> = <File name> <focal length> <quaternion WXYZ> <camera center> <radial distortion> 0
+
+            for camera in cameras:
+
+                #quaternion = TransformationFunctions.rotation_matrix_to_quaternion(camera.rotation_mat)
+                quaternion = camera.get_quaternion()
+
+                current_line = camera.file_name
+                current_line += '\t' + str(camera.get_calibration_mat()[0][0])
+                current_line += ' ' + ' '.join(list(map(str, quaternion)))
+                current_line += ' ' + ' '.join(list(map(str, camera.get_camera_center())))
+                current_line += ' ' + '0'   # TODO USE RADIAL DISTORTION
+                current_line += ' ' + '0'
+                nvm_content.append(current_line + ' ' + os.linesep)
+
+            nvm_content.append(' ' + os.linesep)
+            number_points = len(point_cloud)
+            nvm_content.append(str(number_points) + ' ' + os.linesep)
+            print('Found ' + str(number_points) + ' object points')
+            output_file.writelines([item.encode() for item in nvm_content])
+
+            for point_chunk in NVMFileHandler._iter_formatted_point_chunks(point_cloud, chunk_size, num_workers):
+                output_file.write(point_chunk)
+
+            nvm_content = []
+            nvm_content.append(' ' + os.linesep)
+            nvm_content.append(' ' + os.linesep)
+            nvm_content.append(' ' + os.linesep)
+            nvm_content.append('0' + os.linesep)
+            nvm_content.append(' ' + os.linesep)
+            nvm_content.append('#the last part of NVM file points to the PLY files ' + os.linesep)
+            nvm_content.append('#the first number is the number of associated PLY files ' + os.linesep)
+            nvm_content.append('#each following number gives a model-index that has PLY ' + os.linesep)
+            nvm_content.append('0' + os.linesep)
+            output_file.writelines([item.encode() for item in nvm_content])
 
         op.report({'INFO'}, 'Write NVM file: Done')
 
@@ -327,7 +806,39 @@ class NVMFileHandler(object):
         x_cam = R (X - C) = RX - RC == RX + t
         <=> t = -RC
         """
-        t = np.zeros(3, dtype=float)
-        for j in range(0, 3):
-            t[j] = -float(R[j][0] * c[0] + R[j][1] * c[1] + R[j][2] * c[2])
-        return t
\ No newline at end of file
+        return -np.dot(R, c)
+
+
+def _parse_nvm_point_byte_range(input_visual_fsm_file_name, start, end):
+    # Worker function of NVMFileHandler._parse_nvm_point_cloud_parallel
+    # (defined on module level, so it can be pickled)
+    with open(input_visual_fsm_file_name, 'rb') as input_file:
+        input_file.seek(start)
+        point_block = input_file.read(end - start)
+    return NVMFileHandler._parse_nvm_point_block(point_block)
+
+
+def _parse_nvm_file_models(input_visual_fsm_file_name, model_indices, parse_points, cache, rebuild_cache):
+    # Worker function of NVMFileHandler.iter_parsed_nvm_files (runs in a separate process, i.e. the
+    # Blender operator is not available)
+    op = ConsoleOperator()
+    metrics = ImportMetrics()
+    with metrics.span('index_models'):
+        max_amount_models = None if model_indices is None else max(model_indices) + 1
+        models = NVMFileHandler.index_nvm_models(input_visual_fsm_file_name, op, max_amount_models, metrics)
+    if model_indices is not None:
+        models = [model for model in models if model.index in model_indices]
+    parsed_models = []
+    for model in models:
+        if cache is not None and rebuild_cache:
+            cache.invalidate(input_visual_fsm_file_name, model.index)
+        # The points are parsed serially, since each file is parsed in a separate process
+        parsed_models.append(NVMFileHandler.parse_nvm_file(
+            input_visual_fsm_file_name, op, as_point_cloud=True, parse_points=parse_points, model=model,
+            cache=cache, metrics=metrics))
+    return input_visual_fsm_file_name, models, parsed_models, metrics
+
+
+def _format_nvm_point_chunk(point_cloud):
+    # Worker function of NVMFileHandler._iter_formatted_point_chunks
+    return NVMFileHandler._format_nvm_points(point_cloud)
@@ -0,0 +1,174 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+from nvm_import_export.camera import CameraArray
+from nvm_import_export.point_cloud import PointCloud
+from nvm_import_export.metrics import ImportMetrics
+
+
+class NVMParseCache(object):
+    """
+    Binary cache of parsed NVM files.
+
+    Each entry is a directory containing a meta.json file and one .npy file per array,
+    which allows to memory-map the (large) point arrays when loading an entry.
+    Entries are validated by the size, the modification time and (optionally)
+    the content hash of the NVM file. If the total size of the cache exceeds
+    max_size_in_bytes, the least recently used entries are evicted.
+    """
+
+    version = 1
+
+    def __init__(self, cache_directory=None, max_size_in_bytes=4 * 1024 ** 3, use_content_hash=False):
+        if cache_directory is None or cache_directory == '':
+            cache_directory = NVMParseCache.get_default_cache_directory()
+        self.cache_directory = cache_directory
+        self.max_size_in_bytes = max_size_in_bytes
+        self.use_content_hash = use_content_hash
+
+    @staticmethod
+    def get_default_cache_directory():
+        return os.path.join(tempfile.gettempdir(), 'nvm_import_export_cache')
+
+    def _get_entry_directory(self, input_visual_fsm_file_name, model_index):
+        abs_path = os.path.abspath(input_visual_fsm_file_name)
+        key = hashlib.sha1((abs_path + '|' + str(model_index)).encode()).hexdigest()
+        return os.path.join(self.cache_directory, key)
+
+    @staticmethod
+    def _compute_content_hash(input_visual_fsm_file_name, chunk_size=1 << 24):
+        content_hash = hashlib.sha1()
+        with open(input_visual_fsm_file_name, 'rb') as input_file:
+            for chunk in iter(lambda: input_file.read(chunk_size), b''):
+                content_hash.update(chunk)
+        return content_hash.hexdigest()
+
+    def _get_source_signature(self, input_visual_fsm_file_name):
+        stat_result = os.stat(input_visual_fsm_file_name)
+        signature = {'source_size': stat_result.st_size,
+                     'source_mtime': stat_result.st_mtime}
+        if self.use_content_hash:
+            signature['content_hash'] = NVMParseCache._compute_content_hash(input_visual_fsm_file_name)
+        return signature
+
+    def load(self, input_visual_fsm_file_name, model_index, op, metrics=None):
+        """
+        Returns the cached (cameras, point_cloud) tuple or None, if there is no valid entry
+        """
+        if metrics is None:
+            metrics = ImportMetrics()
+        entry_directory = self._get_entry_directory(input_visual_fsm_file_name, model_index)
+        meta_file_name = os.path.join(entry_directory, 'meta.json')
+        if not os.path.isfile(meta_file_name):
+            return None
+        with open(meta_file_name, 'r') as meta_file:
+            meta = json.load(meta_file)
+
+        signature = self._get_source_signature(input_visual_fsm_file_name)
+        valid = meta['version'] == NVMParseCache.version
+        for key, value in signature.items():
+            valid = valid and meta.get(key) == value
+        if not valid:
+            metrics.log(op, 'Parse cache entry is outdated: ' + input_visual_fsm_file_name)
+            self.invalidate(input_visual_fsm_file_name, model_index)
+            return None
+
+        def load_array(prefix, name):
+            return np.load(os.path.join(entry_directory, prefix + name + '.npy'), mmap_mode='r')
+
+        camera_array = CameraArray(
+            meta['camera_file_names'],
+            **{name: load_array('camera_', name) for name in CameraArray.array_names})
+        cameras = camera_array.get_cameras()
+        point_cloud = PointCloud(
+            **{name: load_array('point_', name) for name in PointCloud.array_names})
+
+        # The modification time of the entry directory is used for the LRU eviction
+        os.utime(entry_directory, None)
+        metrics.log(op, 'Loaded parse cache entry: ' + entry_directory)
+        return cameras, point_cloud
+
+    def store(self, input_visual_fsm_file_name, model_index, cameras, point_cloud, op, metrics=None):
+        if metrics is None:
+            metrics = ImportMetrics()
+        entry_directory = self._get_entry_directory(input_visual_fsm_file_name, model_index)
+        if not os.path.isdir(self.cache_directory):
+            os.makedirs(self.cache_directory)
+        # Write the entry to a temporary directory first, so incomplete entries are never loaded
+        temp_directory = tempfile.mkdtemp(dir=self.cache_directory, prefix='tmp_')
+        try:
+            camera_array = CameraArray.from_cameras(cameras)
+            for name in CameraArray.array_names:
+                np.save(os.path.join(temp_directory, 'camera_' + name + '.npy'), getattr(camera_array, name))
+            for name in PointCloud.array_names:
+                np.save(os.path.join(temp_directory, 'point_' + name + '.npy'), getattr(point_cloud, name))
+
+            meta = self._get_source_signature(input_visual_fsm_file_name)
+            meta['version'] = NVMParseCache.version
+            meta['source_path'] = os.path.abspath(input_visual_fsm_file_name)
+            meta['model_index'] = model_index
+            meta['camera_file_names'] = camera_array.file_names
+            with open(os.path.join(temp_directory, 'meta.json'), 'w') as meta_file:
+                json.dump(meta, meta_file)
+
+            shutil.rmtree(entry_directory, ignore_errors=True)
+            os.rename(temp_directory, entry_directory)
+        except OSError:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+            op.report({'WARNING'}, 'Could not write parse cache entry: ' + entry_directory)
+            return
+        metrics.log(op, 'Stored parse cache entry: ' + entry_directory)
+        self._evict(keep_entry_directory=entry_directory)
+
+    def invalidate(self, input_visual_fsm_file_name=None, model_index=None):
+        """
+        Removes the entry of the provided file and model, all entries of the provided file
+        (if model_index is None) or all entries (if no file is provided)
+        """
+        if input_visual_fsm_file_name is None:
+            entry_directories = self._get_entry_directories()
+        elif model_index is None:
+            # The entries of a file are identified by the source path stored in their meta data
+            abs_path = os.path.abspath(input_visual_fsm_file_name)
+            entry_directories = [entry_directory for entry_directory in self._get_entry_directories()
+                                 if NVMParseCache._get_source_path(entry_directory) == abs_path]
+        else:
+            entry_directories = [self._get_entry_directory(input_visual_fsm_file_name, model_index)]
+        for entry_directory in entry_directories:
+            shutil.rmtree(entry_directory, ignore_errors=True)
+
+    @staticmethod
+    def _get_source_path(entry_directory):
+        try:
+            with open(os.path.join(entry_directory, 'meta.json'), 'r') as meta_file:
+                return json.load(meta_file).get('source_path')
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _get_entry_directories(self):
+        if not os.path.isdir(self.cache_directory):
+            return []
+        return [os.path.join(self.cache_directory, name) for name in os.listdir(self.cache_directory)
+                if os.path.isdir(os.path.join(self.cache_directory, name)) and not name.startswith('tmp_')]
+
+    @staticmethod
+    def _get_directory_size(directory):
+        return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+    def _evict(self, keep_entry_directory=None):
+        entry_directories = sorted(self._get_entry_directories(), key=os.path.getmtime)
+        sizes = {entry_directory: NVMParseCache._get_directory_size(entry_directory)
+                 for entry_directory in entry_directories}
+        total_size = sum(sizes.values())
+        # Remove the least recently used entries first
+        for entry_directory in entry_directories:
+            if total_size <= self.max_size_in_bytes:
+                break
+            if entry_directory == keep_entry_directory:
+                continue
+            shutil.rmtree(entry_directory, ignore_errors=True)
+            total_size -= sizes[entry_directory]
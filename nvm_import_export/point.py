@@ -1,2 +1,3 @@
 from collections import namedtuple
+Measurement = namedtuple('Measurement', ['image_index', 'feature_index', 'x', 'y'])
 Point = namedtuple('Point', ['coord', 'color', 'measurements', 'id', 'scalars']) 
\ No newline at end of file
@@ -0,0 +1,337 @@
+import numpy as np
+from nvm_import_export.point import Point, Measurement
+
+
+class PointCloud(object):
+    """
+    Structure of arrays representation of the points in a NVM file.
+
+    The measurements are stored in compressed sparse row (CSR) layout, i.e.
+    the measurements of point i are stored at the positions
+        measurement_offsets[i]:measurement_offsets[i+1]
+    of the flat measurement arrays.
+    Optional per point values (e.g. reprojection errors) are stored in scalars,
+    which maps the name of each value to an array with one entry per point.
+    """
+
+    # The names of the arrays, which are passed to the constructor (e.g. when loading stored arrays)
+    array_names = ['coords', 'colors', 'ids', 'measurement_offsets', 'measurement_image_indices',
+                   'measurement_feature_indices', 'measurement_x', 'measurement_y']
+
+    def __init__(self,
+                 coords=None,
+                 colors=None,
+                 ids=None,
+                 measurement_offsets=None,
+                 measurement_image_indices=None,
+                 measurement_feature_indices=None,
+                 measurement_x=None,
+                 measurement_y=None,
+                 scalars=None):
+
+        if coords is None:
+            coords = np.zeros((0, 3), dtype=np.float64)
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+        num_points = len(self.coords)
+
+        if colors is None:
+            colors = np.full((num_points, 3), 255, dtype=np.uint8)
+        self.colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+
+        if ids is None:
+            ids = np.arange(num_points, dtype=np.int64)
+        self.ids = np.asarray(ids, dtype=np.int64)
+
+        if measurement_offsets is None:
+            measurement_offsets = np.zeros(num_points + 1, dtype=np.int64)
+        self.measurement_offsets = np.asarray(measurement_offsets, dtype=np.int64)
+
+        num_measurements = self.measurement_offsets[-1]
+        self.measurement_image_indices = PointCloud._as_flat_array(
+            measurement_image_indices, num_measurements, np.int32)
+        self.measurement_feature_indices = PointCloud._as_flat_array(
+            measurement_feature_indices, num_measurements, np.int32)
+        self.measurement_x = PointCloud._as_flat_array(
+            measurement_x, num_measurements, np.float64)
+        self.measurement_y = PointCloud._as_flat_array(
+            measurement_y, num_measurements, np.float64)
+
+        self.scalars = {}
+        if scalars is not None:
+            for name, values in scalars.items():
+                self.set_scalars(name, values)
+
+        assert len(self.colors) == num_points
+        assert len(self.ids) == num_points
+        assert len(self.measurement_offsets) == num_points + 1
+
+    @staticmethod
+    def _as_flat_array(values, size, dtype):
+        if values is None:
+            return np.zeros(size, dtype=dtype)
+        values = np.asarray(values, dtype=dtype)
+        assert len(values) == size
+        return values
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return 'PointCloud: ' + str(len(self)) + ' points ' + str(self.get_num_measurements()) + ' measurements'
+
+    def set_scalars(self, name, values):
+        values = np.asarray(values, dtype=np.float64)
+        assert len(values) == len(self)
+        self.scalars[name] = values
+
+    def get_num_measurements(self):
+        return int(self.measurement_offsets[-1])
+
+    def get_track_lengths(self):
+        return np.diff(self.measurement_offsets)
+
+    def get_point(self, index):
+        start = self.measurement_offsets[index]
+        end = self.measurement_offsets[index + 1]
+        measurements = [
+            Measurement(int(image_index), int(feature_index), float(x), float(y))
+            for image_index, feature_index, x, y in zip(
+                self.measurement_image_indices[start:end],
+                self.measurement_feature_indices[start:end],
+                self.measurement_x[start:end],
+                self.measurement_y[start:end])]
+        if self.scalars:
+            scalars = {name: float(values[index]) for name, values in self.scalars.items()}
+        else:
+            scalars = None
+        return Point(coord=self.coords[index].tolist(),
+                     color=self.colors[index].tolist(),
+                     measurements=measurements,
+                     id=int(self.ids[index]),
+                     scalars=scalars)
+
+    def iter_points(self):
+        """
+        Adapter for callers, which require Point objects.
+        """
+        for index in range(len(self)):
+            yield self.get_point(index)
+
+    def get_points(self):
+        return list(self.iter_points())
+
+    def get_range(self, start, end):
+        """
+        Returns the points with the indices start, ..., end-1 as PointCloud
+        """
+        measurement_start = self.measurement_offsets[start]
+        measurement_end = self.measurement_offsets[end]
+        return PointCloud(
+            coords=self.coords[start:end],
+            colors=self.colors[start:end],
+            ids=self.ids[start:end],
+            measurement_offsets=self.measurement_offsets[start:end + 1] - measurement_start,
+            measurement_image_indices=self.measurement_image_indices[measurement_start:measurement_end],
+            measurement_feature_indices=self.measurement_feature_indices[measurement_start:measurement_end],
+            measurement_x=self.measurement_x[measurement_start:measurement_end],
+            measurement_y=self.measurement_y[measurement_start:measurement_end],
+            scalars={name: values[start:end] for name, values in self.scalars.items()})
+
+    def select(self, point_indices):
+        """
+        Returns the points with the provided indices (or boolean mask) as PointCloud
+        """
+        point_indices = np.asarray(point_indices)
+        if point_indices.dtype == bool:
+            point_indices = np.flatnonzero(point_indices)
+        track_lengths = self.get_track_lengths()[point_indices]
+        measurement_offsets = np.zeros(len(point_indices) + 1, dtype=np.int64)
+        measurement_offsets[1:] = np.cumsum(track_lengths)
+        # The positions of the measurements of the selected points in the flat measurement arrays
+        measurement_indices = np.repeat(
+            self.measurement_offsets[point_indices] - measurement_offsets[:-1],
+            track_lengths) + np.arange(measurement_offsets[-1])
+        return PointCloud(
+            coords=self.coords[point_indices],
+            colors=self.colors[point_indices],
+            ids=self.ids[point_indices],
+            measurement_offsets=measurement_offsets,
+            measurement_image_indices=self.measurement_image_indices[measurement_indices],
+            measurement_feature_indices=self.measurement_feature_indices[measurement_indices],
+            measurement_x=self.measurement_x[measurement_indices],
+            measurement_y=self.measurement_y[measurement_indices],
+            scalars={name: values[point_indices] for name, values in self.scalars.items()})
+
+    @staticmethod
+    def from_points(points):
+        coords = np.array([point.coord for point in points], dtype=np.float64).reshape(-1, 3)
+        colors = np.array([point.color for point in points], dtype=np.uint8).reshape(-1, 3)
+        ids = np.array([point.id for point in points], dtype=np.int64)
+        measurement_offsets = np.zeros(len(points) + 1, dtype=np.int64)
+        measurement_offsets[1:] = np.cumsum([len(point.measurements) for point in points])
+        measurements = np.array(
+            [tuple(measurement) for point in points for measurement in point.measurements],
+            dtype=np.float64).reshape(-1, 4)
+        scalars = None
+        if len(points) > 0 and points[0].scalars:
+            scalars = {name: [point.scalars[name] for point in points] for name in points[0].scalars}
+        return PointCloud(coords=coords,
+                          colors=colors,
+                          ids=ids,
+                          measurement_offsets=measurement_offsets,
+                          measurement_image_indices=measurements[:, 0],
+                          measurement_feature_indices=measurements[:, 1],
+                          measurement_x=measurements[:, 2],
+                          measurement_y=measurements[:, 3],
+                          scalars=scalars)
+
+    @staticmethod
+    def concatenate(point_clouds):
+        point_clouds = list(point_clouds)
+        if len(point_clouds) == 0:
+            return PointCloud()
+        measurement_offsets = [np.zeros(1, dtype=np.int64)]
+        num_measurements = 0
+        for point_cloud in point_clouds:
+            measurement_offsets.append(point_cloud.measurement_offsets[1:] + num_measurements)
+            num_measurements += point_cloud.get_num_measurements()
+        return PointCloud(
+            coords=np.concatenate([pc.coords for pc in point_clouds]),
+            colors=np.concatenate([pc.colors for pc in point_clouds]),
+            ids=np.concatenate([pc.ids for pc in point_clouds]),
+            measurement_offsets=np.concatenate(measurement_offsets),
+            measurement_image_indices=np.concatenate([pc.measurement_image_indices for pc in point_clouds]),
+            measurement_feature_indices=np.concatenate([pc.measurement_feature_indices for pc in point_clouds]),
+            measurement_x=np.concatenate([pc.measurement_x for pc in point_clouds]),
+            measurement_y=np.concatenate([pc.measurement_y for pc in point_clouds]),
+            # Only scalars available for all point clouds are kept
+            scalars={name: np.concatenate([pc.scalars[name] for pc in point_clouds])
+                     for name in point_clouds[0].scalars
+                     if all(name in pc.scalars for pc in point_clouds)})
+
+
+class VisibilityIndex(object):
+    """
+    Inverted index of the measurements, i.e. the points observed by each camera.
+
+    The index is stored in compressed sparse row (CSR) layout, i.e. the indices of the
+    points observed by camera i are stored at the positions
+        camera_offsets[i]:camera_offsets[i+1]
+    of point_indices (in ascending order).
+    """
+
+    def __init__(self, camera_offsets, point_indices):
+        self.camera_offsets = np.asarray(camera_offsets, dtype=np.int64)
+        self.point_indices = np.asarray(point_indices, dtype=np.int64)
+        assert self.camera_offsets[-1] == len(self.point_indices)
+
+    def __len__(self):
+        return len(self.camera_offsets) - 1
+
+    def __str__(self):
+        return 'VisibilityIndex: ' + str(len(self)) + ' cameras ' + str(len(self.point_indices)) + ' observations'
+
+    @staticmethod
+    def from_point_cloud(point_cloud, amount_cameras=None):
+        """
+        Builds the index from the measurement arrays of the point cloud.
+        If amount_cameras is None, the largest image index of the measurements determines the
+        number of cameras.
+        """
+        image_indices = point_cloud.measurement_image_indices
+        if amount_cameras is None:
+            amount_cameras = int(image_indices.max()) + 1 if len(image_indices) > 0 else 0
+        assert len(image_indices) == 0 or (image_indices.min() >= 0 and image_indices.max() < amount_cameras)
+        point_of_measurements = np.repeat(
+            np.arange(len(point_cloud), dtype=np.int64), point_cloud.get_track_lengths())
+        # A stable sort keeps the points of each camera in ascending order
+        order = np.argsort(image_indices, kind='mergesort')
+        camera_offsets = np.zeros(amount_cameras + 1, dtype=np.int64)
+        camera_offsets[1:] = np.cumsum(np.bincount(image_indices, minlength=amount_cameras))
+        return VisibilityIndex(camera_offsets, point_of_measurements[order])
+
+    def get_amount_observed_points(self, camera_index):
+        return int(self.camera_offsets[camera_index + 1] - self.camera_offsets[camera_index])
+
+    def get_observed_point_indices(self, camera_index):
+        """
+        Returns the indices of the points observed by the camera (a view of the index)
+        """
+        return self.point_indices[self.camera_offsets[camera_index]:self.camera_offsets[camera_index + 1]]
+
+    def get_points_observed_by_cameras(self, camera_indices):
+        """
+        Returns the (unique) indices of the points observed by at least one of the cameras.
+        Only the observations of the provided cameras are processed.
+        """
+        observed_point_indices = [np.zeros(0, dtype=np.int64)]
+        for camera_index in camera_indices:
+            observed_point_indices.append(self.get_observed_point_indices(camera_index))
+        return np.unique(np.concatenate(observed_point_indices))
+
+
+def get_coords_and_colors(points):
+    """
+    Returns the coordinates (float32) and the colors (uint8) of points, which can be
+    a list of Point objects, a PointCloud or an iterable of PointCloud batches
+    (see NVMFileHandler.iter_nvm_points). Batches are consumed one after another,
+    i.e. only the coordinates and colors of previous batches are kept in memory.
+    """
+    if isinstance(points, PointCloud):
+        batches = [points]
+    elif isinstance(points, list) and len(points) > 0 and not isinstance(points[0], PointCloud):
+        batches = [PointCloud(coords=[point.coord for point in points],
+                              colors=[point.color for point in points])]
+    else:
+        batches = points
+
+    coords_list = [np.zeros((0, 3), dtype=np.float32)]
+    colors_list = [np.zeros((0, 3), dtype=np.uint8)]
+    for batch in batches:
+        coords_list.append(batch.coords.astype(np.float32))
+        colors_list.append(batch.colors)
+    return np.concatenate(coords_list), np.concatenate(colors_list)
+
+
+def voxel_grid_downsample(coords, colors, voxel_size):
+    """
+    Returns the coordinates and the colors of a single representative point per voxel of a
+    regular grid with the provided voxel size. The representative is the point closest to
+    the centroid of the points in the voxel, its color is the average color of the voxel.
+    """
+    coords = np.asarray(coords)
+    colors = np.asarray(colors)
+    assert voxel_size > 0
+    if len(coords) == 0:
+        return coords, colors
+    voxel_indices = np.floor((coords - coords.min(axis=0)) / voxel_size).astype(np.int64)
+    grid_shape = voxel_indices.max(axis=0) + 1
+    if np.prod(grid_shape.astype(float)) < 2 ** 62:
+        voxel_keys = (voxel_indices[:, 0] * grid_shape[1] + voxel_indices[:, 1]) * grid_shape[2] + voxel_indices[:, 2]
+        _, voxel_of_points, points_per_voxel = np.unique(voxel_keys, return_inverse=True, return_counts=True)
+    else:
+        # The linear voxel index would overflow
+        _, voxel_of_points, points_per_voxel = np.unique(
+            voxel_indices, axis=0, return_inverse=True, return_counts=True)
+    voxel_of_points = voxel_of_points.ravel()
+    num_voxels = len(points_per_voxel)
+
+    centroids = np.empty((num_voxels, 3), dtype=np.float64)
+    mean_colors = np.empty((num_voxels, colors.shape[1]), dtype=np.float64)
+    for axis in range(3):
+        centroids[:, axis] = np.bincount(voxel_of_points, weights=coords[:, axis], minlength=num_voxels)
+    for channel in range(colors.shape[1]):
+        mean_colors[:, channel] = np.bincount(voxel_of_points, weights=colors[:, channel], minlength=num_voxels)
+    centroids /= points_per_voxel[:, np.newaxis]
+    mean_colors /= points_per_voxel[:, np.newaxis]
+
+    # Sort the points by voxel and by the distance to the centroid of the voxel,
+    # i.e. the first point of each voxel is the representative
+    squared_distances = np.sum((coords - centroids[voxel_of_points]) ** 2, axis=1)
+    order = np.lexsort((squared_distances, voxel_of_points))
+    first_positions = np.concatenate(([0], np.cumsum(points_per_voxel)[:-1]))
+    representatives = order[first_positions]
+    return coords[representatives], np.round(mean_colors).astype(colors.dtype)
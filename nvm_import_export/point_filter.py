@@ -0,0 +1,212 @@
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# Offsets of the 27 cells in the neighborhood of a cell (including the cell itself)
+_neighbor_cell_offsets = np.array(
+    [[x, y, z] for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)], dtype=np.int64)
+
+
+def _compute_cell_keys(cell_indices, min_cell_indices, grid_shape):
+    # Unique keys of the cells (the grid includes a margin of one cell for the neighboring cells)
+    cell_indices = cell_indices - min_cell_indices + 1
+    return (cell_indices[..., 0] * grid_shape[1] + cell_indices[..., 1]) * grid_shape[2] + cell_indices[..., 2]
+
+
+def estimate_cell_size(coords, amount_neighbors, iterations=3):
+    """
+    Returns a cell size, for which the cell of a (median) point contains
+    approximately amount_neighbors + 1 points.
+    """
+    extent = np.maximum(coords.max(axis=0) - coords.min(axis=0), 1e-9)
+    cell_size = (np.prod(extent) * (amount_neighbors + 1) / len(coords)) ** (1.0 / 3.0)
+    for _ in range(iterations):
+        cell_size = max(cell_size, np.max(extent) / (1 << 20))
+        cell_indices = np.floor(coords / cell_size).astype(np.int64)
+        min_cell_indices = cell_indices.min(axis=0)
+        grid_shape = cell_indices.max(axis=0) - min_cell_indices + 3
+        _, points_per_cell = np.unique(
+            _compute_cell_keys(cell_indices, min_cell_indices, grid_shape), return_counts=True)
+        # The median w.r.t. the points (not w.r.t. the cells), 
+        # i.e. cells containing only outliers are not over-represented
+        points_per_cell = np.sort(points_per_cell)
+        median_position = np.searchsorted(np.cumsum(points_per_cell), len(coords) / 2.0)
+        median_points_per_cell = float(points_per_cell[median_position])
+        # Reconstructed points are mostly located on surfaces, i.e. the number of points
+        # per cell grows (approximately) with the square of the cell size
+        cell_size *= np.sqrt((amount_neighbors + 1) / median_points_per_cell)
+    return cell_size
+
+
+def _compute_mean_neighbor_distances_with_cells(coords, query_indices, amount_neighbors, cell_size,
+                                                max_candidates):
+    """
+    Voxel grid based neighbor search. The candidates of a query point are the points in the 27 cells
+    around the cell of the query point, i.e. all neighbors within a distance of cell_size are found.
+    Returns the mean distances of the query points and a mask of the query points with at least
+    amount_neighbors neighbors within cell_size (i.e. the query points with exact mean distances).
+    """
+    cell_indices = np.floor(coords / cell_size).astype(np.int64)
+    min_cell_indices = cell_indices.min(axis=0)
+    grid_shape = cell_indices.max(axis=0) - min_cell_indices + 3
+    cell_keys = _compute_cell_keys(cell_indices, min_cell_indices, grid_shape)
+    order = np.argsort(cell_keys, kind='mergesort')
+    sorted_coordinates = [np.ascontiguousarray(coords[order, dimension]) for dimension in range(3)]
+    unique_cell_keys, cell_starts, points_per_cell = np.unique(
+        cell_keys[order], return_index=True, return_counts=True)
+
+    # The point ranges of the neighboring cells of each (occupied) cell
+    neighbor_keys = _compute_cell_keys(
+        cell_indices[order[cell_starts]][:, np.newaxis, :] + _neighbor_cell_offsets[np.newaxis, :, :],
+        min_cell_indices, grid_shape)
+    neighbor_positions = np.searchsorted(unique_cell_keys, neighbor_keys)
+    neighbor_positions = np.minimum(neighbor_positions, len(unique_cell_keys) - 1)
+    neighbor_exists = unique_cell_keys[neighbor_positions] == neighbor_keys
+    neighbor_starts = np.where(neighbor_exists, cell_starts[neighbor_positions], 0)
+    neighbor_counts = np.where(neighbor_exists, points_per_cell[neighbor_positions], 0)
+    candidates_per_cell = neighbor_counts.sum(axis=1)
+
+    # Process the query points (sorted by cell) in chunks with a bounded number of candidates
+    query_cells = np.searchsorted(unique_cell_keys, cell_keys[query_indices])
+    query_order = np.argsort(query_cells, kind='mergesort')
+    query_cells = query_cells[query_order]
+    query_coordinates = [np.ascontiguousarray(coords[query_indices[query_order], dimension])
+                         for dimension in range(3)]
+    amount_queries = len(query_cells)
+    candidates_per_query = candidates_per_cell[query_cells]
+    cumulative_candidates = np.cumsum(candidates_per_query)
+    chunk_boundaries = [0]
+    while chunk_boundaries[-1] < amount_queries:
+        processed_candidates = cumulative_candidates[chunk_boundaries[-1] - 1] if chunk_boundaries[-1] > 0 else 0
+        chunk_end = np.searchsorted(cumulative_candidates, processed_candidates + max_candidates, side='right')
+        chunk_boundaries.append(max(chunk_end, chunk_boundaries[-1] + 1))
+
+    squared_cell_size = cell_size ** 2
+    mean_distances = np.full(amount_queries, np.inf)
+    resolved = np.zeros(amount_queries, dtype=bool)
+    for chunk_start, chunk_end in zip(chunk_boundaries[:-1], chunk_boundaries[1:]):
+        amount_chunk_queries = chunk_end - chunk_start
+        chunk_cells = query_cells[chunk_start:chunk_end]
+        range_starts = neighbor_starts[chunk_cells].ravel()
+        range_counts = neighbor_counts[chunk_cells].ravel()
+        chunk_candidates = candidates_per_query[chunk_start:chunk_end]
+        amount_candidates = int(chunk_candidates.sum())
+
+        # Expand the ranges to the indices of the candidates
+        range_offsets = np.concatenate(([0], np.cumsum(range_counts)[:-1]))
+        candidate_indices = np.repeat(range_starts - range_offsets, range_counts) + np.arange(amount_candidates)
+        candidate_queries = np.repeat(np.arange(amount_chunk_queries), chunk_candidates)
+        squared_distances = np.zeros(amount_candidates, dtype=np.float64)
+        for dimension in range(3):
+            # Contiguous coordinate arrays are faster than indexing the rows of the coordinate matrix
+            differences = (sorted_coordinates[dimension][candidate_indices] -
+                           query_coordinates[dimension][chunk_start:chunk_end][candidate_queries])
+            squared_distances += differences * differences
+
+        # Only candidates within cell_size are guaranteed to be complete
+        within = squared_distances <= squared_cell_size
+        candidate_queries = candidate_queries[within]
+        squared_distances = squared_distances[within]
+        amounts_within = np.bincount(candidate_queries, minlength=amount_chunk_queries)
+
+        # Sort the candidates of each query point by distance (the first candidate is the point itself).
+        # The candidates are already grouped by query point, i.e. a single floating point key suffices.
+        candidate_order = np.argsort(candidate_queries + squared_distances / (squared_cell_size * 1.001))
+        query_offsets = np.concatenate(([0], np.cumsum(amounts_within)[:-1]))
+        ranks = np.arange(len(candidate_order)) - np.repeat(query_offsets, amounts_within)
+        is_neighbor = (ranks >= 1) & (ranks <= amount_neighbors)
+        neighbor_indices = candidate_order[is_neighbor]
+        distance_sums = np.bincount(candidate_queries[neighbor_indices],
+                                    weights=np.sqrt(squared_distances[neighbor_indices]),
+                                    minlength=amount_chunk_queries)
+        chunk_resolved = amounts_within > amount_neighbors
+        mean_distances[chunk_start:chunk_end][chunk_resolved] = distance_sums[chunk_resolved] / amount_neighbors
+        resolved[chunk_start:chunk_end] = chunk_resolved
+
+    inverse_query_order = np.empty_like(query_order)
+    inverse_query_order[query_order] = np.arange(amount_queries)
+    return mean_distances[inverse_query_order], resolved[inverse_query_order]
+
+
+def compute_mean_neighbor_distances(coords, amount_neighbors, use_kd_tree=True, cell_size=None,
+                                    max_candidates=1 << 22):
+    """
+    Returns the mean distance of each point to its amount_neighbors nearest neighbors.
+    If scipy is installed (and use_kd_tree is True), a KD-tree is used. Otherwise, a voxel grid
+    with the provided (or an estimated) cell_size is used (see estimate_cell_size). The cell size
+    is doubled for the points with less than amount_neighbors neighbors within the cell size.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    assert amount_neighbors > 0
+    if len(coords) <= amount_neighbors:
+        return np.full(len(coords), np.inf)
+    if use_kd_tree and cKDTree is not None:
+        kd_tree = cKDTree(coords)
+        try:
+            distances, _ = kd_tree.query(coords, k=amount_neighbors + 1, workers=-1)
+        except TypeError:
+            # scipy < 1.6
+            distances, _ = kd_tree.query(coords, k=amount_neighbors + 1)
+        # The first neighbor is the point itself
+        return distances[:, 1:].mean(axis=1)
+    if cell_size is None:
+        cell_size = estimate_cell_size(coords, amount_neighbors)
+    max_extent = float(np.max(coords.max(axis=0) - coords.min(axis=0)))
+    # The cell keys must not exceed the range of int64
+    cell_size = max(cell_size, max_extent / (1 << 20))
+    # If the cell size exceeds the diagonal of the bounding box, all points are resolved
+    max_cell_size = max(2.0 * max_extent, cell_size)
+    mean_distances = np.empty(len(coords), dtype=np.float64)
+    unresolved_indices = np.arange(len(coords))
+    while len(unresolved_indices) > 0:
+        cell_size = min(cell_size, max_cell_size)
+        unresolved_mean_distances, resolved = _compute_mean_neighbor_distances_with_cells(
+            coords, unresolved_indices, amount_neighbors, cell_size, max_candidates)
+        mean_distances[unresolved_indices[resolved]] = unresolved_mean_distances[resolved]
+        unresolved_indices = unresolved_indices[~resolved]
+        cell_size *= 2
+    return mean_distances
+
+
+def compute_statistical_outlier_mask(coords, amount_neighbors=8, std_ratio=2.0, use_kd_tree=True):
+    """
+    Returns a boolean mask of the outliers, i.e. the points whose mean distance to their
+    nearest neighbors exceeds the mean of all mean distances by more than std_ratio standard deviations.
+    """
+    mean_distances = compute_mean_neighbor_distances(coords, amount_neighbors, use_kd_tree)
+    finite = np.isfinite(mean_distances)
+    if not np.any(finite):
+        return ~finite
+    threshold = mean_distances[finite].mean() + std_ratio * mean_distances[finite].std()
+    return ~(mean_distances <= threshold)
+
+
+def remove_statistical_outliers(point_cloud, amount_neighbors=8, std_ratio=2.0, use_kd_tree=True):
+    """
+    Returns a PointCloud without the outliers (see compute_statistical_outlier_mask)
+    and the number of removed points.
+    """
+    outlier_mask = compute_statistical_outlier_mask(
+        point_cloud.coords, amount_neighbors, std_ratio, use_kd_tree)
+    return point_cloud.select(~outlier_mask), int(np.count_nonzero(outlier_mask))
+
+
+def compute_reliable_point_mask(cameras, point_cloud, min_track_length=2, max_mean_reprojection_error=None,
+                                absolute_measurements=False):
+    """
+    Returns a boolean mask of the points with at least min_track_length measurements and
+    (if max_mean_reprojection_error is not None) a mean reprojection error (in pixels) of at
+    most max_mean_reprojection_error. The errors of all measurements are computed at once
+    (see reprojection.compute_reprojection_errors).
+    """
+    from nvm_import_export.reprojection import compute_reprojection_errors, compute_mean_errors_per_point
+    reliable = point_cloud.get_track_lengths() >= min_track_length
+    if max_mean_reprojection_error is not None:
+        errors = compute_reprojection_errors(cameras, point_cloud, absolute_measurements)
+        mean_errors = compute_mean_errors_per_point(point_cloud, errors)
+        # Points without measurements are only removed by the track length
+        reliable &= ~(mean_errors > max_mean_reprojection_error)
+    return reliable
@@ -0,0 +1,48 @@
+import math
+
+
+def set_principal_point_for_cameras(cameras, default_pp_x, default_pp_y, op):
+    """
+    Sets the principal points of the cameras without principal point to the default
+    values or (if the default values are NaN) to the image centers.
+    """
+    if not math.isnan(default_pp_x) and not math.isnan(default_pp_y):
+        op.report({'WARNING'}, 'Setting principal points to default values!')
+    else:
+        op.report({'WARNING'}, 'Setting principal points to image centers!')
+
+    for camera in cameras:
+        if not camera.is_principal_point_initialized():
+            if math.isnan(default_pp_x) or math.isnan(default_pp_y):
+                camera.set_principal_point([camera.width / 2.0, camera.height / 2.0])
+            else:
+                camera.set_principal_point([default_pp_x, default_pp_y])
+
+def principal_points_initialized(cameras):
+    principal_points_initialized = True
+    for camera in cameras:
+        if not camera.is_principal_point_initialized():
+            principal_points_initialized = False
+            break
+    return principal_points_initialized
+
+def initialize_principal_points(op, cameras, path_to_images, default_pp_x=float('nan'), default_pp_y=float('nan'),
+                                default_width=-1, default_height=-1, num_workers=8, image_size_cache=None,
+                                metrics=None):
+    """
+    Returns True, if the principal points of the cameras are initialized. The principal points
+    are only contained in NVM files with fixed calibration, i.e. the missing principal points
+    are set to the default values or to the image centers (i.e. the image sizes are read
+    from the images in path_to_images).
+    """
+    from nvm_import_export.nvm_file_handler import NVMFileHandler
+    if len(cameras) == 0 or principal_points_initialized(cameras):
+        return True
+    if math.isnan(default_pp_x) or math.isnan(default_pp_y):
+        cameras, success = NVMFileHandler.parse_camera_image_files(
+            cameras, path_to_images, default_width, default_height, op,
+            num_workers=num_workers, image_size_cache=image_size_cache, metrics=metrics)
+        if not success:
+            return False
+    set_principal_point_for_cameras(cameras, default_pp_x, default_pp_y, op)
+    return True
@@ -0,0 +1,38 @@
+import os
+import sys
+import multiprocessing
+import concurrent.futures
+
+
+def get_blender_python_executable():
+    """
+    Returns the path of the Python interpreter bundled with Blender (or None, if it is not found).
+    In Blender versions before 2.91, sys.executable is the Blender binary itself.
+    """
+    bpy = sys.modules.get('bpy')
+    if bpy is None:
+        return None
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+    python_executable = getattr(bpy.app, 'binary_path_python', None)
+    if python_executable and os.path.isfile(python_executable):
+        return python_executable
+    return None
+
+
+def create_process_pool_executor(max_workers):
+    """
+    Returns a ProcessPoolExecutor with max_workers processes, which also works inside Blender.
+
+    Processes started with spawn (the default on Windows and macOS) run sys.executable, which is
+    the Blender binary inside Blender. In this case the child processes use the Python interpreter
+    bundled with Blender instead. If this interpreter can not be found, a ThreadPoolExecutor
+    is returned (i.e. the tasks are executed concurrently in threads of the Blender process).
+    """
+    if 'bpy' not in sys.modules or multiprocessing.get_start_method() == 'fork':
+        return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    python_executable = get_blender_python_executable()
+    if python_executable is None:
+        return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    multiprocessing.set_executable(python_executable)
+    return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
@@ -0,0 +1,219 @@
+import json
+import numpy as np
+
+from nvm_import_export.camera import CameraArray
+
+
+def get_point_indices_of_measurements(point_cloud):
+    """
+    Returns the index of the corresponding point for each measurement of the point cloud
+    """
+    return np.repeat(np.arange(len(point_cloud), dtype=np.int64), point_cloud.get_track_lengths())
+
+
+def compute_reprojection_errors(cameras, point_cloud, absolute_measurements=False, chunk_size=1 << 18):
+    """
+    Returns the reprojection error (in pixels) of each measurement of the point cloud.
+    cameras can be a list of Camera objects or a CameraArray.
+
+    The measurements in NVM files are relative to the principal point, i.e. the projection of
+    a point X is
+        x_cam = R (X - C),  x = f_x * x_cam[0] / x_cam[2],  y = f_y * x_cam[1] / x_cam[2]
+    Some tools write absolute image coordinates instead (see detect_absolute_measurements), in this
+    case (absolute_measurements is True) the principal points of the cameras are subtracted.
+    The radial distortion is not considered (it is not stored by the parser).
+    Measurements of points behind the camera get an infinite error.
+    """
+    if not isinstance(cameras, CameraArray):
+        cameras = CameraArray.from_cameras(cameras)
+    focal_lengths_x = cameras.calibration_mats[:, 0, 0]
+    focal_lengths_y = cameras.calibration_mats[:, 1, 1]
+    if absolute_measurements:
+        principal_points_x = cameras.calibration_mats[:, 0, 2]
+        principal_points_y = cameras.calibration_mats[:, 1, 2]
+    else:
+        principal_points_x = np.zeros(len(cameras))
+        principal_points_y = np.zeros(len(cameras))
+    point_indices = get_point_indices_of_measurements(point_cloud)
+    image_indices = point_cloud.measurement_image_indices
+
+    errors = np.empty(point_cloud.get_num_measurements(), dtype=np.float64)
+    # The chunks limit the size of the (per measurement) rotation matrices
+    for start in range(0, len(errors), chunk_size):
+        end = min(start + chunk_size, len(errors))
+        chunk_image_indices = image_indices[start:end]
+        cam_coords = np.einsum(
+            'nij,nj->ni',
+            cameras.rotation_mats[chunk_image_indices],
+            point_cloud.coords[point_indices[start:end]] - cameras.centers[chunk_image_indices])
+        in_front = cam_coords[:, 2] > 0
+        depths = np.where(in_front, cam_coords[:, 2], 1.0)
+        residuals_x = (focal_lengths_x[chunk_image_indices] * cam_coords[:, 0] / depths -
+                       point_cloud.measurement_x[start:end] + principal_points_x[chunk_image_indices])
+        residuals_y = (focal_lengths_y[chunk_image_indices] * cam_coords[:, 1] / depths -
+                       point_cloud.measurement_y[start:end] + principal_points_y[chunk_image_indices])
+        errors[start:end] = np.where(in_front, np.hypot(residuals_x, residuals_y), np.inf)
+    return errors
+
+
+def compute_mean_errors_per_point(point_cloud, errors):
+    """
+    Returns the mean of the measurement errors of each point (NaN for points without measurements)
+    """
+    track_lengths = point_cloud.get_track_lengths()
+    error_sums = np.bincount(
+        get_point_indices_of_measurements(point_cloud), weights=errors, minlength=len(point_cloud))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return error_sums / track_lengths
+
+
+def detect_absolute_measurements(cameras, point_cloud, max_amount_points=10000):
+    """
+    Returns True, if the measurements are absolute image coordinates (instead of coordinates
+    relative to the principal point), i.e. if subtracting the principal points reduces the
+    median reprojection error of (a subset of) the points.
+    Requires initialized principal points (otherwise False is returned).
+    """
+    if not all(camera.is_principal_point_initialized() for camera in cameras):
+        return False
+    if len(point_cloud) > max_amount_points:
+        point_cloud = point_cloud.select(
+            np.linspace(0, len(point_cloud) - 1, max_amount_points).astype(np.int64))
+    camera_array = CameraArray.from_cameras(cameras)
+    relative_errors = compute_reprojection_errors(camera_array, point_cloud, absolute_measurements=False)
+    absolute_errors = compute_reprojection_errors(camera_array, point_cloud, absolute_measurements=True)
+    if len(relative_errors) == 0:
+        return False
+    return np.median(absolute_errors) < np.median(relative_errors)
+
+
+class ReprojectionErrorReport(object):
+    """
+    Reprojection error statistics of a reconstruction per camera and per point.
+
+    The errors of all measurements are computed in a single (batched) pass and reduced
+    per camera and per point with np.bincount. Measurements of points behind the
+    camera (i.e. infinite errors) are counted separately and excluded from the statistics.
+    """
+
+    def __init__(self, camera_file_names, point_cloud, errors):
+        self.camera_file_names = list(camera_file_names)
+        amount_cameras = len(self.camera_file_names)
+        amount_points = len(point_cloud)
+        finite = np.isfinite(errors)
+        finite_errors = np.where(finite, errors, 0.0)
+        self.amount_measurements = len(errors)
+        self.amount_behind_camera = int(len(errors) - np.count_nonzero(finite))
+        self.mean_error = float(finite_errors.sum() / max(np.count_nonzero(finite), 1))
+        self.rms_error = float(np.sqrt(np.sum(finite_errors ** 2) / max(np.count_nonzero(finite), 1)))
+        self.median_error = float(np.median(errors[finite])) if np.any(finite) else 0.0
+        self.max_error = float(finite_errors.max()) if len(errors) > 0 else 0.0
+
+        image_indices = point_cloud.measurement_image_indices
+        self.camera_amounts_measurements = np.bincount(
+            image_indices, weights=finite, minlength=amount_cameras).astype(np.int64)
+        self.camera_amounts_behind_camera = np.bincount(
+            image_indices, weights=~finite, minlength=amount_cameras).astype(np.int64)
+        self.camera_mean_errors = self._divide(
+            np.bincount(image_indices, weights=finite_errors, minlength=amount_cameras),
+            self.camera_amounts_measurements)
+        self.camera_rms_errors = np.sqrt(self._divide(
+            np.bincount(image_indices, weights=finite_errors ** 2, minlength=amount_cameras),
+            self.camera_amounts_measurements))
+        # Group the measurements by camera (faster than np.maximum.at)
+        camera_order = np.argsort(image_indices, kind='mergesort')
+        camera_offsets = np.concatenate(([0], np.cumsum(np.bincount(image_indices, minlength=amount_cameras))))
+        self.camera_max_errors = self._reduce_max(finite_errors[camera_order], camera_offsets)
+
+        point_indices = get_point_indices_of_measurements(point_cloud)
+        self.point_amounts_measurements = np.bincount(
+            point_indices, weights=finite, minlength=amount_points).astype(np.int64)
+        self.point_mean_errors = self._divide(
+            np.bincount(point_indices, weights=finite_errors, minlength=amount_points),
+            self.point_amounts_measurements)
+        # The measurements of each point are stored contiguously (CSR layout)
+        self.point_max_errors = self._reduce_max(finite_errors, point_cloud.measurement_offsets)
+        self.point_max_errors[self.point_amounts_measurements == 0] = np.nan
+        self.camera_max_errors[self.camera_amounts_measurements == 0] = np.nan
+
+    @staticmethod
+    def _reduce_max(values, offsets):
+        # The maximum of each group values[offsets[i]:offsets[i+1]] (NaN for empty groups)
+        maxima = np.full(len(offsets) - 1, np.nan)
+        non_empty = np.diff(offsets) > 0
+        if np.any(non_empty):
+            maxima[non_empty] = np.maximum.reduceat(values, offsets[:-1][non_empty])
+        return maxima
+
+    @staticmethod
+    def _divide(sums, amounts):
+        # NaN for cameras or points without (finite) measurements
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(amounts > 0, sums / np.maximum(amounts, 1), np.nan)
+
+    @staticmethod
+    def compute(cameras, point_cloud, absolute_measurements=False):
+        camera_array = cameras if isinstance(cameras, CameraArray) else CameraArray.from_cameras(cameras)
+        errors = compute_reprojection_errors(camera_array, point_cloud, absolute_measurements)
+        return ReprojectionErrorReport(camera_array.file_names, point_cloud, errors)
+
+    def get_worst_camera_indices(self, amount_cameras=5):
+        # Cameras without finite measurements are listed last
+        order = np.argsort(np.where(np.isnan(self.camera_mean_errors), -np.inf, self.camera_mean_errors))
+        return order[::-1][:amount_cameras].tolist()
+
+    def get_summary(self, amount_worst_cameras=5):
+        lines = ['Reprojection errors (in pixels):',
+                 '  measurements: ' + str(self.amount_measurements) +
+                 ' (' + str(self.amount_behind_camera) + ' behind the camera)',
+                 '  mean: ' + '%.3f' % self.mean_error + ' rms: ' + '%.3f' % self.rms_error +
+                 ' median: ' + '%.3f' % self.median_error + ' max: ' + '%.3f' % self.max_error]
+        if len(self.camera_file_names) > 0:
+            lines.append('  cameras with the largest mean errors:')
+        for camera_index in self.get_worst_camera_indices(amount_worst_cameras):
+            lines.append('    ' + self.camera_file_names[camera_index] + ': ' +
+                         '%.3f' % self.camera_mean_errors[camera_index] +
+                         ' (' + str(self.camera_amounts_measurements[camera_index]) + ' measurements)')
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        def to_float(value):
+            # JSON does not support NaN
+            return None if np.isnan(value) else float(value)
+
+        cameras = []
+        for camera_index, file_name in enumerate(self.camera_file_names):
+            cameras.append({'file_name': file_name,
+                            'amount_measurements': int(self.camera_amounts_measurements[camera_index]),
+                            'amount_behind_camera': int(self.camera_amounts_behind_camera[camera_index]),
+                            'mean_error': to_float(self.camera_mean_errors[camera_index]),
+                            'rms_error': to_float(self.camera_rms_errors[camera_index]),
+                            'max_error': to_float(self.camera_max_errors[camera_index])})
+        valid_point_errors = self.point_mean_errors[~np.isnan(self.point_mean_errors)]
+        if len(valid_point_errors) > 0:
+            point_percentiles = np.percentile(valid_point_errors, [50, 90, 99]).tolist()
+        else:
+            point_percentiles = [None, None, None]
+        return {'amount_measurements': self.amount_measurements,
+                'amount_behind_camera': self.amount_behind_camera,
+                'mean_error': self.mean_error,
+                'rms_error': self.rms_error,
+                'median_error': self.median_error,
+                'max_error': self.max_error,
+                'points': {'amount_points': len(self.point_mean_errors),
+                           'mean_error_percentiles': dict(zip(['50', '90', '99'], point_percentiles))},
+                'cameras': cameras}
+
+    def write_json(self, report_file_name):
+        with open(report_file_name, 'w') as report_file:
+            json.dump(self.to_dict(), report_file, indent=2)
+
+    def write_point_errors(self, point_errors_file_name, point_cloud):
+        """
+        Writes the ids, the mean errors and the maximum errors of all points to a NPZ file
+        """
+        np.savez(point_errors_file_name,
+                 ids=point_cloud.ids,
+                 mean_errors=self.point_mean_errors,
+                 max_errors=self.point_max_errors,
+                 amounts_measurements=self.point_amounts_measurements)
@@ -0,0 +1,22 @@
+import os
+
+from nvm_import_export.cli import get_output_file_name
+
+
+def test_output_file_name_does_not_overwrite_the_input(tmpdir):
+    input_nvm_file_name = os.path.join(str(tmpdir), 'reconstruction.nvm')
+    assert get_output_file_name(input_nvm_file_name, 'nvm') == os.path.join(
+        str(tmpdir), 'reconstruction_converted.nvm')
+    assert get_output_file_name(input_nvm_file_name, 'nvm', normalize=True) == os.path.join(
+        str(tmpdir), 'reconstruction_normalized.nvm')
+    # The output directory is the directory of the input file
+    assert get_output_file_name(input_nvm_file_name, 'nvm', os.path.join(str(tmpdir), '.')) == os.path.join(
+        str(tmpdir), '.', 'reconstruction_converted.nvm')
+
+
+def test_output_file_name(tmpdir):
+    input_nvm_file_name = os.path.join(str(tmpdir), 'reconstruction.nvm')
+    output_directory = os.path.join(str(tmpdir), 'converted')
+    assert get_output_file_name(input_nvm_file_name, 'ply') == os.path.join(str(tmpdir), 'reconstruction.ply')
+    assert get_output_file_name(input_nvm_file_name, 'nvm', output_directory) == os.path.join(
+        output_directory, 'reconstruction.nvm')
@@ -0,0 +1,208 @@
+import os
+import numpy as np
+import pytest
+
+from nvm_import_export.nvm_file_handler import NVMFileHandler
+from nvm_import_export.point_cloud import PointCloud
+from nvm_import_export.console_operator import ConsoleOperator
+from benchmarks.synthetic_nvm import create_synthetic_model, format_nvm_model_lines, write_reference_nvm_file
+
+point_array_names = ['coords', 'colors', 'measurement_offsets', 'measurement_image_indices',
+                     'measurement_feature_indices', 'measurement_x', 'measurement_y']
+
+
+def assert_point_clouds_equal(point_cloud, expected_point_cloud):
+    assert len(point_cloud) == len(expected_point_cloud)
+    for name in point_array_names:
+        assert np.array_equal(getattr(point_cloud, name), getattr(expected_point_cloud, name)), name
+
+
+def assert_cameras_equal(cameras, expected_cameras, fixed_calibration):
+    assert [camera.file_name for camera in cameras] == [camera.file_name for camera in expected_cameras]
+    assert np.array_equal([camera.get_camera_center() for camera in cameras],
+                          [camera.get_camera_center() for camera in expected_cameras])
+    assert np.array_equal([camera.get_quaternion() for camera in cameras],
+                          [camera.get_quaternion() for camera in expected_cameras])
+    assert np.allclose([camera.get_rotation_mat() for camera in cameras],
+                       [camera.get_rotation_mat() for camera in expected_cameras])
+    if fixed_calibration:
+        for camera, expected_camera in zip(cameras, expected_cameras):
+            assert np.array_equal(camera.get_calibration_mat(), expected_camera.get_calibration_mat())
+    else:
+        # Without fixed calibration the NVM file contains no principal points
+        assert np.array_equal([camera.get_focal_length() for camera in cameras],
+                              [camera.get_focal_length() for camera in expected_cameras])
+        assert not any(camera.is_principal_point_initialized() for camera in cameras)
+
+
+@pytest.mark.parametrize('line_separator', ['\n', '\r\n'])
+@pytest.mark.parametrize('fixed_calibration', [False, True])
+def test_parse_first_model(tmp_path, line_separator, fixed_calibration):
+    nvm_file_name = str(tmp_path / 'model.nvm')
+    cameras, point_cloud = create_synthetic_model(
+        6, 300, fixed_calibration=fixed_calibration, min_track_length=0)
+    assert np.any(point_cloud.get_track_lengths() == 0)
+    write_reference_nvm_file(nvm_file_name, [(cameras, point_cloud)], fixed_calibration, line_separator)
+
+    parsed_cameras, parsed_point_cloud = NVMFileHandler.parse_nvm_file(
+        nvm_file_name, ConsoleOperator(), as_point_cloud=True)
+    assert_cameras_equal(parsed_cameras, cameras, fixed_calibration)
+    assert_point_clouds_equal(parsed_point_cloud, point_cloud)
+    assert np.array_equal(parsed_point_cloud.ids, np.arange(len(point_cloud)))
+
+    # The Point objects contain the same values
+    _, points = NVMFileHandler.parse_nvm_file(nvm_file_name, ConsoleOperator())
+    assert_point_clouds_equal(PointCloud.from_points(points), point_cloud)
+
+
+@pytest.fixture
+def models():
+    random_state = np.random.RandomState(0)
+    return [create_synthetic_model(5, 200, random_state=random_state, min_track_length=0),
+            create_synthetic_model(3, 50, random_state=random_state, min_track_length=0)]
+
+
+@pytest.mark.parametrize('line_separator', ['\n', '\r\n'])
+def test_parse_models(tmp_path, models, line_separator):
+    nvm_file_name = str(tmp_path / 'models.nvm')
+    write_reference_nvm_file(nvm_file_name, models, line_separator=line_separator)
+    op = ConsoleOperator()
+
+    indexed_models = NVMFileHandler.index_nvm_models(nvm_file_name, op)
+    assert [model.index for model in indexed_models] == [0, 1]
+    assert [model.amount_cameras for model in indexed_models] == [5, 3]
+    assert [model.amount_points for model in indexed_models] == [200, 50]
+    assert NVMFileHandler.index_nvm_models(nvm_file_name, op, max_amount_models=1) == indexed_models[:1]
+    for model, (cameras, point_cloud) in zip(indexed_models, models):
+        parsed_cameras, parsed_point_cloud = NVMFileHandler.parse_nvm_file(
+            nvm_file_name, op, as_point_cloud=True, model=model)
+        assert_cameras_equal(parsed_cameras, cameras, False)
+        assert_point_clouds_equal(parsed_point_cloud, point_cloud)
+        point_batches = list(NVMFileHandler.iter_nvm_points(nvm_file_name, 64, op, model=model))
+        assert_point_clouds_equal(PointCloud.concatenate(point_batches), point_cloud)
+
+
+def test_skip_trailing_model_of_unregistered_images(tmp_path, models):
+    nvm_file_name = str(tmp_path / 'unregistered.nvm')
+    unregistered_cameras, _ = create_synthetic_model(4, 0, random_state=np.random.RandomState(1))
+    write_reference_nvm_file(nvm_file_name, models + [(unregistered_cameras, PointCloud())])
+    op = ConsoleOperator()
+    assert [model.amount_cameras for model in NVMFileHandler.index_nvm_models(nvm_file_name, op)] == [5, 3]
+    assert len(NVMFileHandler.index_nvm_models(nvm_file_name, op, max_amount_models=3)) == 2
+
+    # A model without points is only skipped, if it is the last model of the file
+    write_reference_nvm_file(nvm_file_name, [models[0], (unregistered_cameras, PointCloud()), models[1]])
+    assert [model.amount_points for model in NVMFileHandler.index_nvm_models(nvm_file_name, op)] == [200, 0, 50]
+
+
+def test_parse_empty_point_section(tmp_path):
+    nvm_file_name = str(tmp_path / 'no_points.nvm')
+    cameras, _ = create_synthetic_model(4, 0)
+    write_reference_nvm_file(nvm_file_name, [(cameras, PointCloud())])
+    parsed_cameras, point_cloud = NVMFileHandler.parse_nvm_file(
+        nvm_file_name, ConsoleOperator(), as_point_cloud=True)
+    assert len(parsed_cameras) == len(cameras)
+    assert len(point_cloud) == 0
+    # The cameras of a file with a single model are imported, even without points
+    assert len(NVMFileHandler.index_nvm_models(nvm_file_name, ConsoleOperator())) == 1
+
+
+@pytest.mark.parametrize('batch_size', [1, 64, 1000])
+def test_iterate_point_batches(tmp_path, batch_size):
+    nvm_file_name = str(tmp_path / 'model.nvm')
+    cameras, point_cloud = create_synthetic_model(5, 300, min_track_length=0)
+    write_reference_nvm_file(nvm_file_name, [(cameras, point_cloud)], line_separator='\r\n')
+
+    point_batches = list(NVMFileHandler.iter_nvm_points(nvm_file_name, batch_size, ConsoleOperator()))
+    assert [len(point_batch) for point_batch in point_batches[:-1]] == [batch_size] * (len(point_batches) - 1)
+    assert 0 < len(point_batches[-1]) <= batch_size
+    concatenated_point_cloud = PointCloud.concatenate(point_batches)
+    assert_point_clouds_equal(concatenated_point_cloud, point_cloud)
+    # The ids are consecutive across the batches
+    assert np.array_equal(concatenated_point_cloud.ids, np.arange(len(point_cloud)))
+
+
+def test_iterate_empty_point_section(tmp_path):
+    nvm_file_name = str(tmp_path / 'no_points.nvm')
+    cameras, _ = create_synthetic_model(4, 0)
+    write_reference_nvm_file(nvm_file_name, [(cameras, PointCloud())])
+    assert list(NVMFileHandler.iter_nvm_points(nvm_file_name, 10, ConsoleOperator())) == []
+
+
+@pytest.mark.parametrize('num_workers', [2, 3])
+def test_parse_points_in_parallel(tmp_path, models, num_workers):
+    nvm_file_name = str(tmp_path / 'models.nvm')
+    write_reference_nvm_file(nvm_file_name, models, line_separator='\r\n')
+    op = ConsoleOperator()
+    for model, (cameras, point_cloud) in zip(NVMFileHandler.index_nvm_models(nvm_file_name, op), models):
+        parsed_cameras, parsed_point_cloud = NVMFileHandler.parse_nvm_file(
+            nvm_file_name, op, as_point_cloud=True, model=model, num_workers=num_workers)
+        assert_cameras_equal(parsed_cameras, cameras, False)
+        assert_point_clouds_equal(parsed_point_cloud, point_cloud)
+        assert np.array_equal(parsed_point_cloud.ids, np.arange(len(point_cloud)))
+
+
+@pytest.mark.parametrize('fixed_calibration', [False, True])
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_round_trip(tmp_path, fixed_calibration, num_workers):
+    nvm_file_name = str(tmp_path / 'model.nvm')
+    output_nvm_file_name = str(tmp_path / 'round_trip.nvm')
+    cameras, point_cloud = create_synthetic_model(
+        5, 300, fixed_calibration=fixed_calibration, min_track_length=0)
+    write_reference_nvm_file(nvm_file_name, [(cameras, point_cloud)], fixed_calibration, '\r\n')
+    op = ConsoleOperator()
+    parsed_cameras, parsed_point_cloud = NVMFileHandler.parse_nvm_file(nvm_file_name, op, as_point_cloud=True)
+    if not fixed_calibration:
+        for camera in parsed_cameras:
+            camera.set_principal_point([960.0, 540.0])
+
+    NVMFileHandler.write_nvm_file(
+        op, output_nvm_file_name, parsed_cameras, parsed_point_cloud, num_workers=num_workers, chunk_size=16)
+    with open(output_nvm_file_name, 'rb') as output_file:
+        first_line = output_file.readline()
+    # The synthetic cameras without fixed calibration have different focal lengths
+    assert first_line.startswith(b'NVM_V3 FixedK') == fixed_calibration
+
+    round_trip_cameras, round_trip_point_cloud = NVMFileHandler.parse_nvm_file(
+        output_nvm_file_name, op, as_point_cloud=True)
+    assert [camera.file_name for camera in round_trip_cameras] == [camera.file_name for camera in cameras]
+    assert np.allclose([camera.get_camera_center() for camera in round_trip_cameras],
+                       [camera.get_camera_center() for camera in cameras])
+    assert_point_clouds_equal(round_trip_point_cloud, point_cloud)
+    assert len(NVMFileHandler.index_nvm_models(output_nvm_file_name, op)) == 1
+
+
+def test_formatted_points_match_reference_lines():
+    cameras, point_cloud = create_synthetic_model(5, 200, min_track_length=0)
+    point_cloud.coords[:5] *= -1
+    point_cloud.measurement_x[:5] = [0.0, -0.0, 1.0, -12.5, 1234567.25]
+    lines = NVMFileHandler._format_nvm_points(point_cloud).decode().split(os.linesep)
+    reference_lines = format_nvm_model_lines(cameras, point_cloud)[len(cameras) + 3:-1]
+    assert lines[-1] == ''
+    # Integral floats are written without decimals (e.g. "1" instead of "1.0")
+    assert [line.split() for line in lines[:-1]] == [
+        [token[:-2] if token.endswith('.0') else token for token in line.split()] for line in reference_lines]
+
+
+def test_round_trip_of_arbitrary_floats():
+    # Values, which are not short decimal numbers, are written with repr()
+    random_state = np.random.RandomState(1)
+    _, point_cloud = create_synthetic_model(4, 300, random_state=random_state, min_track_length=0)
+    point_cloud.coords = random_state.normal(size=(300, 3)) * 10.0 ** random_state.randint(-8, 12, size=(300, 1))
+    point_cloud.coords[:3] = [[0.1, -0.0, 1e300], [5e-324, 2.0 ** 53, -123456789012.5], [1.5e-7, -2.5, 7.0]]
+    point_cloud.measurement_x = random_state.normal(scale=1000.0, size=point_cloud.get_num_measurements())
+    point_block = NVMFileHandler._format_nvm_points(point_cloud)
+    parsed_point_cloud = NVMFileHandler._parse_nvm_point_block(point_block, len(point_cloud))
+    assert_point_clouds_equal(parsed_point_cloud, point_cloud)
+    assert np.array_equal(np.signbit(parsed_point_cloud.coords), np.signbit(point_cloud.coords))
+
+
+def test_round_trip_of_points_without_measurements(tmp_path):
+    output_nvm_file_name = str(tmp_path / 'without_measurements.nvm')
+    cameras, point_cloud = create_synthetic_model(4, 100, fixed_calibration=True)
+    # E.g. the points of a mesh exported with the Blender exporter
+    points_without_measurements = PointCloud(coords=point_cloud.coords, colors=point_cloud.colors)
+    op = ConsoleOperator()
+    NVMFileHandler.write_nvm_file(op, output_nvm_file_name, cameras, points_without_measurements)
+    _, round_trip_point_cloud = NVMFileHandler.parse_nvm_file(output_nvm_file_name, op, as_point_cloud=True)
+    assert_point_clouds_equal(round_trip_point_cloud, points_without_measurements)
@@ -0,0 +1,117 @@
+import os
+import numpy as np
+import pytest
+
+from nvm_import_export.nvm_file_handler import NVMFileHandler
+from nvm_import_export.parse_cache import NVMParseCache
+from nvm_import_export.console_operator import ConsoleOperator
+from nvm_import_export.metrics import ImportMetrics
+from benchmarks.synthetic_nvm import create_synthetic_model, write_reference_nvm_file
+from tests.test_nvm_file_handler import assert_point_clouds_equal
+
+
+@pytest.fixture
+def nvm_file_name(tmp_path):
+    nvm_file_name = str(tmp_path / 'models.nvm')
+    random_state = np.random.RandomState(0)
+    models = [create_synthetic_model(4, 100, random_state=random_state),
+              create_synthetic_model(3, 30, random_state=random_state)]
+    write_reference_nvm_file(nvm_file_name, models)
+    return nvm_file_name
+
+
+def parse_with_cache(nvm_file_name, cache, model_index=0):
+    op = ConsoleOperator()
+    model = NVMFileHandler.index_nvm_models(nvm_file_name, op)[model_index]
+    metrics = ImportMetrics()
+    cameras, point_cloud = NVMFileHandler.parse_nvm_file(
+        nvm_file_name, op, as_point_cloud=True, model=model, cache=cache, metrics=metrics)
+    return cameras, point_cloud, metrics.counters.get('parse_cache_hits', 0)
+
+
+def test_load_stored_entry(tmp_path, nvm_file_name):
+    cache = NVMParseCache(str(tmp_path / 'cache'))
+    cameras, point_cloud, hits = parse_with_cache(nvm_file_name, cache)
+    assert hits == 0
+    cached_cameras, cached_point_cloud, hits = parse_with_cache(nvm_file_name, cache)
+    assert hits == 1
+    assert_point_clouds_equal(cached_point_cloud, point_cloud)
+    assert [camera.file_name for camera in cached_cameras] == [camera.file_name for camera in cameras]
+    assert np.allclose([camera.get_rotation_mat() for camera in cached_cameras],
+                       [camera.get_rotation_mat() for camera in cameras])
+
+    # The entries of the models are independent
+    _, second_point_cloud, hits = parse_with_cache(nvm_file_name, cache, model_index=1)
+    assert hits == 0
+    assert len(second_point_cloud) == 30
+    assert parse_with_cache(nvm_file_name, cache, model_index=1)[2] == 1
+
+
+def test_modified_file_invalidates_entry(tmp_path, nvm_file_name):
+    cache = NVMParseCache(str(tmp_path / 'cache'))
+    parse_with_cache(nvm_file_name, cache)
+    # The same content with a different modification time
+    stat_result = os.stat(nvm_file_name)
+    os.utime(nvm_file_name, (stat_result.st_atime, stat_result.st_mtime + 10))
+    assert cache.load(nvm_file_name, 0, ConsoleOperator()) is None
+    # The outdated entry is removed
+    assert cache._get_entry_directories() == []
+
+    _, _, hits = parse_with_cache(nvm_file_name, cache)
+    assert hits == 0
+    assert parse_with_cache(nvm_file_name, cache)[2] == 1
+
+
+def test_content_hash_detects_changes_with_identical_size_and_modification_time(tmp_path, nvm_file_name):
+    cache = NVMParseCache(str(tmp_path / 'cache'), use_content_hash=True)
+    parse_with_cache(nvm_file_name, cache)
+    stat_result = os.stat(nvm_file_name)
+    with open(nvm_file_name, 'rb') as nvm_file:
+        content = nvm_file.read()
+    # Rename an image without changing the file size
+    with open(nvm_file_name, 'wb') as nvm_file:
+        nvm_file.write(content.replace(b'image_000000.jpg', b'image_000009.jpg', 1))
+    os.utime(nvm_file_name, (stat_result.st_atime, stat_result.st_mtime))
+    assert os.path.getsize(nvm_file_name) == stat_result.st_size
+    assert cache.load(nvm_file_name, 0, ConsoleOperator()) is None
+
+
+def test_invalidate(tmp_path, nvm_file_name):
+    cache = NVMParseCache(str(tmp_path / 'cache'))
+    parse_with_cache(nvm_file_name, cache, model_index=0)
+    parse_with_cache(nvm_file_name, cache, model_index=1)
+    assert len(cache._get_entry_directories()) == 2
+
+    cache.invalidate(nvm_file_name, 0)
+    assert parse_with_cache(nvm_file_name, cache, model_index=1)[2] == 1
+    assert cache.load(nvm_file_name, 0, ConsoleOperator()) is None
+
+    cache.invalidate()
+    assert cache._get_entry_directories() == []
+
+
+def test_invalidate_all_models_of_a_file(tmp_path, nvm_file_name):
+    cache = NVMParseCache(str(tmp_path / 'cache'))
+    other_nvm_file_name = str(tmp_path / 'other.nvm')
+    write_reference_nvm_file(other_nvm_file_name, [create_synthetic_model(3, 10)])
+    parse_with_cache(nvm_file_name, cache, model_index=0)
+    parse_with_cache(nvm_file_name, cache, model_index=1)
+    parse_with_cache(other_nvm_file_name, cache)
+    assert len(cache._get_entry_directories()) == 3
+
+    cache.invalidate(nvm_file_name)
+    assert cache.load(nvm_file_name, 0, ConsoleOperator()) is None
+    assert cache.load(nvm_file_name, 1, ConsoleOperator()) is None
+    assert parse_with_cache(other_nvm_file_name, cache)[2] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, nvm_file_name):
+    cache = NVMParseCache(str(tmp_path / 'cache'))
+    parse_with_cache(nvm_file_name, cache, model_index=0)
+    entry_size = NVMParseCache._get_directory_size(cache._get_entry_directories()[0])
+    # The limit allows only a single (small) entry
+    cache.max_size_in_bytes = entry_size
+    parse_with_cache(nvm_file_name, cache, model_index=1)
+    assert len(cache._get_entry_directories()) == 1
+    assert parse_with_cache(nvm_file_name, cache, model_index=1)[2] == 1
+    assert parse_with_cache(nvm_file_name, cache, model_index=0)[2] == 0
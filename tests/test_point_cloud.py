@@ -0,0 +1,67 @@
+import numpy as np
+
+from nvm_import_export.point_cloud import PointCloud, VisibilityIndex
+from benchmarks.synthetic_nvm import create_synthetic_model
+from tests.test_nvm_file_handler import assert_point_clouds_equal
+
+
+def test_points_and_point_cloud_conversion():
+    _, point_cloud = create_synthetic_model(4, 100, min_track_length=0)
+    point_cloud.set_scalars('value', np.arange(len(point_cloud), dtype=float))
+    points = point_cloud.get_points()
+    for index in [0, 17, len(point_cloud) - 1]:
+        start, end = point_cloud.measurement_offsets[index:index + 2]
+        assert points[index].coord == point_cloud.coords[index].tolist()
+        assert [measurement.image_index for measurement in points[index].measurements] == \
+            point_cloud.measurement_image_indices[start:end].tolist()
+        assert points[index].scalars == {'value': float(index)}
+    converted_point_cloud = PointCloud.from_points(points)
+    assert_point_clouds_equal(converted_point_cloud, point_cloud)
+    assert np.array_equal(converted_point_cloud.scalars['value'], point_cloud.scalars['value'])
+
+
+def test_concatenate():
+    random_state = np.random.RandomState(1)
+    _, first_point_cloud = create_synthetic_model(4, 30, random_state=random_state, min_track_length=0)
+    _, second_point_cloud = create_synthetic_model(4, 20, random_state=random_state, min_track_length=0)
+    point_cloud = PointCloud.concatenate([first_point_cloud, PointCloud(), second_point_cloud])
+    assert len(point_cloud) == 50
+    assert point_cloud.get_num_measurements() == (
+        first_point_cloud.get_num_measurements() + second_point_cloud.get_num_measurements())
+    assert_point_clouds_equal(PointCloud.from_points(point_cloud.get_points()[:30]), first_point_cloud)
+    assert np.array_equal(point_cloud.measurement_x[first_point_cloud.get_num_measurements():],
+                          second_point_cloud.measurement_x)
+    assert len(PointCloud.concatenate([])) == 0
+
+
+def test_select():
+    _, point_cloud = create_synthetic_model(4, 100, random_state=np.random.RandomState(1), min_track_length=0)
+    mask = np.random.RandomState(2).uniform(size=len(point_cloud)) < 0.5
+    selected_point_cloud = point_cloud.select(mask)
+    assert len(selected_point_cloud) == np.count_nonzero(mask)
+    assert np.array_equal(selected_point_cloud.coords, point_cloud.coords[mask])
+    assert np.array_equal(selected_point_cloud.ids, point_cloud.ids[mask])
+    for selected_index, point_index in enumerate(np.flatnonzero(mask)):
+        assert selected_point_cloud.get_point(selected_index).measurements == \
+            point_cloud.get_point(point_index).measurements
+    assert len(point_cloud.select(np.zeros(len(point_cloud), dtype=bool))) == 0
+
+
+def test_visibility_index_matches_measurements():
+    _, point_cloud = create_synthetic_model(6, 300, min_track_length=0)
+    # The last camera does not observe any point
+    visibility_index = VisibilityIndex.from_point_cloud(point_cloud, 7)
+    assert len(visibility_index) == 7
+    for camera_index in range(7):
+        expected_point_indices = [
+            point_index for point_index in range(len(point_cloud))
+            for measurement_index in range(*point_cloud.measurement_offsets[point_index:point_index + 2])
+            if point_cloud.measurement_image_indices[measurement_index] == camera_index]
+        assert visibility_index.get_observed_point_indices(camera_index).tolist() == expected_point_indices
+        assert visibility_index.get_amount_observed_points(camera_index) == len(expected_point_indices)
+    assert visibility_index.get_amount_observed_points(6) == 0
+
+    observed_point_indices = visibility_index.get_points_observed_by_cameras([1, 4])
+    expected_point_indices = sorted(
+        set(visibility_index.get_observed_point_indices(1)) | set(visibility_index.get_observed_point_indices(4)))
+    assert observed_point_indices.tolist() == expected_point_indices
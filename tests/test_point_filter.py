@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from nvm_import_export.point_filter import (compute_mean_neighbor_distances, compute_statistical_outlier_mask,
+                                            compute_reliable_point_mask, remove_statistical_outliers)
+from nvm_import_export.point_cloud import PointCloud
+from nvm_import_export.reprojection import compute_reprojection_errors
+from benchmarks.synthetic_nvm import create_synthetic_cameras, create_synthetic_point_cloud
+
+
+def compute_mean_neighbor_distances_brute_force(coords, amount_neighbors):
+    distances = np.linalg.norm(coords[:, np.newaxis, :] - coords[np.newaxis, :, :], axis=2)
+    # The first neighbor is the point itself
+    return np.sort(distances, axis=1)[:, 1:amount_neighbors + 1].mean(axis=1)
+
+
+def create_points_with_outliers(random_state, amount_points=600, amount_outliers=20):
+    # Points on a (noisy) plane and a few points far away from the plane
+    surface_points = np.column_stack([random_state.uniform(0, 10, size=(amount_points, 2)),
+                                      random_state.normal(scale=0.01, size=amount_points)])
+    outliers = random_state.uniform(-50, 50, size=(amount_outliers, 3))
+    return np.concatenate([surface_points, outliers])
+
+
+@pytest.mark.parametrize('amount_neighbors', [1, 4, 8])
+def test_mean_neighbor_distances_of_voxel_grid_match_brute_force(amount_neighbors):
+    coords = create_points_with_outliers(np.random.RandomState(0))
+    expected_mean_distances = compute_mean_neighbor_distances_brute_force(coords, amount_neighbors)
+    mean_distances = compute_mean_neighbor_distances(coords, amount_neighbors, use_kd_tree=False)
+    assert np.allclose(mean_distances, expected_mean_distances)
+
+
+@pytest.mark.parametrize('cell_size', [1e-3, 0.5, 100.0])
+def test_mean_neighbor_distances_do_not_depend_on_the_cell_size(cell_size):
+    # Small cell sizes are doubled until all points are resolved
+    coords = create_points_with_outliers(np.random.RandomState(1), amount_points=200)
+    expected_mean_distances = compute_mean_neighbor_distances_brute_force(coords, 6)
+    mean_distances = compute_mean_neighbor_distances(coords, 6, use_kd_tree=False, cell_size=cell_size)
+    assert np.allclose(mean_distances, expected_mean_distances)
+
+
+def test_mean_neighbor_distances_of_duplicated_points():
+    coords = np.repeat(np.random.RandomState(2).uniform(size=(50, 3)), 3, axis=0)
+    mean_distances = compute_mean_neighbor_distances(coords, 2, use_kd_tree=False)
+    assert np.allclose(mean_distances, 0.0)
+
+
+def test_mean_neighbor_distances_of_too_few_points():
+    assert np.all(np.isinf(compute_mean_neighbor_distances(np.zeros((3, 3)), 3, use_kd_tree=False)))
+
+
+def test_statistical_outliers():
+    random_state = np.random.RandomState(3)
+    coords = create_points_with_outliers(random_state)
+    mean_distances = compute_mean_neighbor_distances_brute_force(coords, 8)
+    expected_outlier_mask = mean_distances > mean_distances.mean() + 2.0 * mean_distances.std()
+    outlier_mask = compute_statistical_outlier_mask(coords, 8, 2.0, use_kd_tree=False)
+    assert np.array_equal(outlier_mask, expected_outlier_mask)
+    # The points far away from the plane are removed
+    assert np.all(outlier_mask[-20:])
+
+    point_cloud = PointCloud(coords=coords, colors=random_state.randint(0, 256, size=(len(coords), 3)))
+    inlier_point_cloud, amount_removed = remove_statistical_outliers(point_cloud, 8, 2.0, use_kd_tree=False)
+    assert amount_removed == np.count_nonzero(expected_outlier_mask)
+    assert np.array_equal(inlier_point_cloud.coords, coords[~expected_outlier_mask])
+    assert np.array_equal(inlier_point_cloud.colors, point_cloud.colors[~expected_outlier_mask])
+
+
+@pytest.mark.parametrize('min_track_length', [0, 2, 4])
+@pytest.mark.parametrize('max_mean_reprojection_error', [None, 0.5, 1.0])
+def test_reliable_points(min_track_length, max_mean_reprojection_error):
+    random_state = np.random.RandomState(4)
+    cameras = create_synthetic_cameras(10, False, 1920, 1080, random_state)
+    point_cloud = create_synthetic_point_cloud(cameras, 300, 4, random_state)
+    errors = compute_reprojection_errors(cameras, point_cloud)
+
+    expected_reliable = []
+    for index in range(len(point_cloud)):
+        start, end = point_cloud.measurement_offsets[index:index + 2]
+        reliable = end - start >= min_track_length
+        if max_mean_reprojection_error is not None and end > start:
+            reliable = reliable and errors[start:end].mean() <= max_mean_reprojection_error
+        expected_reliable.append(reliable)
+    reliable = compute_reliable_point_mask(cameras, point_cloud, min_track_length, max_mean_reprojection_error)
+    assert np.array_equal(reliable, expected_reliable)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from nvm_import_export.reprojection import (compute_reprojection_errors, detect_absolute_measurements,
+                                            ReprojectionErrorReport)
+from benchmarks.synthetic_nvm import create_synthetic_cameras, create_synthetic_point_cloud
+
+
+def compute_reprojection_errors_per_measurement(cameras, point_cloud, absolute_measurements=False):
+    errors = []
+    for point_index in range(len(point_cloud)):
+        start, end = point_cloud.measurement_offsets[point_index:point_index + 2]
+        for measurement_index in range(start, end):
+            camera = cameras[point_cloud.measurement_image_indices[measurement_index]]
+            x_cam = camera.get_rotation_mat().dot(point_cloud.coords[point_index] - camera.get_camera_center())
+            if x_cam[2] <= 0:
+                errors.append(np.inf)
+                continue
+            calibration_mat = camera.get_calibration_mat()
+            x = calibration_mat[0][0] * x_cam[0] / x_cam[2]
+            y = calibration_mat[1][1] * x_cam[1] / x_cam[2]
+            if absolute_measurements:
+                x += calibration_mat[0][2]
+                y += calibration_mat[1][2]
+            errors.append(np.hypot(x - point_cloud.measurement_x[measurement_index],
+                                   y - point_cloud.measurement_y[measurement_index]))
+    return np.array(errors)
+
+
+@pytest.fixture
+def reconstruction():
+    random_state = np.random.RandomState(0)
+    cameras = create_synthetic_cameras(8, False, 1920, 1080, random_state)
+    point_cloud = create_synthetic_point_cloud(cameras, 400, 4, random_state)
+    # Points behind some of the cameras get infinite errors
+    point_cloud.coords[:10] *= 10
+    return cameras, point_cloud
+
+
+@pytest.mark.parametrize('absolute_measurements', [False, True])
+def test_reprojection_errors_match_per_measurement_errors(reconstruction, absolute_measurements):
+    cameras, point_cloud = reconstruction
+    expected_errors = compute_reprojection_errors_per_measurement(cameras, point_cloud, absolute_measurements)
+    assert np.any(np.isinf(expected_errors))
+    errors = compute_reprojection_errors(cameras, point_cloud, absolute_measurements, chunk_size=100)
+    assert np.array_equal(np.isinf(errors), np.isinf(expected_errors))
+    finite = np.isfinite(expected_errors)
+    assert np.allclose(errors[finite], expected_errors[finite])
+
+
+def test_detect_absolute_measurements(reconstruction):
+    cameras, point_cloud = reconstruction
+    assert not detect_absolute_measurements(cameras, point_cloud)
+    point_cloud.measurement_x += 960.0
+    point_cloud.measurement_y += 540.0
+    assert detect_absolute_measurements(cameras, point_cloud)
+
+
+def test_report_statistics_per_camera_and_per_point(reconstruction):
+    cameras, point_cloud = reconstruction
+    errors = compute_reprojection_errors_per_measurement(cameras, point_cloud)
+    report = ReprojectionErrorReport.compute(cameras, point_cloud)
+    finite = np.isfinite(errors)
+    assert report.amount_measurements == len(errors)
+    assert report.amount_behind_camera == np.count_nonzero(~finite)
+    assert np.isclose(report.mean_error, errors[finite].mean())
+    assert np.isclose(report.median_error, np.median(errors[finite]))
+
+    for camera_index in range(len(cameras)):
+        camera_errors = errors[(point_cloud.measurement_image_indices == camera_index) & finite]
+        assert report.camera_amounts_measurements[camera_index] == len(camera_errors)
+        assert np.isclose(report.camera_mean_errors[camera_index], camera_errors.mean())
+        assert np.isclose(report.camera_rms_errors[camera_index], np.sqrt(np.mean(camera_errors ** 2)))
+        assert np.isclose(report.camera_max_errors[camera_index], camera_errors.max())
+
+    for point_index in range(len(point_cloud)):
+        start, end = point_cloud.measurement_offsets[point_index:point_index + 2]
+        point_errors = errors[start:end][np.isfinite(errors[start:end])]
+        if len(point_errors) == 0:
+            assert np.isnan(report.point_mean_errors[point_index])
+            continue
+        assert np.isclose(report.point_mean_errors[point_index], point_errors.mean())
+        assert np.isclose(report.point_max_errors[point_index], point_errors.max())